@@ -8,6 +8,8 @@ import re
 import os
 from datetime import datetime
 
+from . import buildreuse
+
 ALL_FORMATS = ["markdown", "textile"]
 DEFAULT_FORMAT = "markdown"
 
@@ -84,6 +86,7 @@ def main() -> None:
 
     build_id = "0x{0}".format(config.get("menu", "build"))
     n_modules = config.get("menu", "modules")
+    source_builds = buildreuse.source_builds(config)
     username = config.get("environment", "username")
     hostname = config.get("environment", "hostname")
     timestamp = config.get("environment", "timestamp")
@@ -122,6 +125,10 @@ def main() -> None:
         ("tm-vhdlproducer", versions["tm-vhdlproducer"]),
         ("tm-reporter", versions["tm-reporter"]),
     ]
+    if source_builds:
+        # bitfiles of reused modules contain build version and timestamp of their source build
+        reused = ", ".join(f"module_{module_id} (0x{build})" for module_id, build in sorted(source_builds.items()))
+        table.insert(3, ("Reused modules", reused))
 
     if args.format == "textile":
         print("\nInsert into ISSUE description (textile format):\n")
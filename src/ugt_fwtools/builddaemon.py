@@ -0,0 +1,445 @@
+"""Host-wide build daemon admitting the module builds of all users of a host.
+
+The daemon listens on a single Unix socket shared by all users and grants
+build slots within the host's limits of concurrent jobs and memory. It never
+runs a build itself: every build job is run by a client process of the
+submitting user, which asks the daemon for admission, waits until it is
+granted, runs the build command under its own user id and holds the
+connection until the build finished. A dropped connection frees the slot.
+
+Jobs are tracked by the user id of the connected client (peer credentials of
+the connection), a job can only be cancelled by its owner, the daemon owner
+or root. Every request and response is a single line of JSON:
+
+    {"command": "acquire", "job": {"name": ..., "command": ..., "log": ..., "mem": 16, "priority": 0}}
+    {"command": "status"}
+    {"command": "cancel", "name": ...}
+
+Responses contain `"ok": true` or `"ok": false` and an `"error"` message.
+The response to `acquire` is sent as soon as the job is admitted, the client
+then reports `{"command": "started", "pid": ...}` and
+`{"command": "finished", "returncode": ...}`, the daemon sends
+`{"command": "cancel"}` to terminate a running job. Queued jobs are admitted
+by priority (then by submission time).
+
+>>> client = Client("/run/ugt-fwtools/daemon.sock")
+>>> client.run(Job("build_mp7_ugt_legacy_1190_0", command, log, priority=1))
+
+"""
+
+import argparse
+import grp
+import io
+import json
+import logging
+import os
+import pwd
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from . import buildqueue
+from . import utils
+
+__all__ = ["Daemon", "Client", "start_daemon", "start_job"]
+
+logger = utils.get_colored_logger(__name__)
+
+DefaultDaemonDir: str = os.getenv("UGT_BUILD_DAEMON_DIR") or os.path.join("/run", "ugt-fwtools")
+"""Default directory of socket and log of the build daemon."""
+
+SocketFile: str = "daemon.sock"
+LogFile: str = "daemon.log"
+
+DefaultTimeout: float = 30.0
+"""Timeout of client requests in seconds."""
+
+
+def socket_path(daemon_dir: str) -> str:
+    return os.path.join(daemon_dir, SocketFile)
+
+
+def peer_uid(sock: socket.socket) -> int:
+    """Returns user id of the process connected to Unix socket *sock*."""
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid
+
+
+def user_name(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return format(uid)
+
+
+def send_message(fp: io.BufferedIOBase, message: Dict[str, Any]) -> None:
+    fp.write(json.dumps(message).encode() + b"\n")
+    fp.flush()
+
+
+class Lease:
+    """Admission of build *job* requested by user *uid*, messages to the
+    client are written to *wfile*."""
+
+    def __init__(self, job: buildqueue.Job, uid: int, wfile: io.BufferedIOBase) -> None:
+        self.job = job
+        self.uid = uid
+        self.wfile = wfile
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self.lock:
+            send_message(self.wfile, message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.job.to_dict(), uid=self.uid, user=user_name(self.uid))
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.build_daemon.dispatch(request, peer_uid(self.request), self.rfile, self.wfile)  # type: ignore[attr-defined]
+        except Exception as exc:
+            logger.error("request failed: %s", exc)
+            response = {"ok": False, "error": str(exc)}
+        if response is not None:
+            send_message(self.wfile, response)
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Daemon:
+    """Build daemon serving requests on a socket in *daemon_dir*, admitting
+    at most *jobs* builds at a time within a memory budget of *max_mem* GB.
+    The socket is accessible to all users of the host or only to members of
+    *group*."""
+
+    def __init__(self, daemon_dir: str = DefaultDaemonDir, jobs: Optional[int] = None, max_mem: Optional[float] = None, group: Optional[str] = None) -> None:
+        self.daemon_dir = os.path.abspath(daemon_dir)
+        self.jobs = jobs
+        self.max_mem = max_mem
+        self.group = group
+        self.leases: List[Lease] = []
+        self.condition = threading.Condition()
+        self.server: Optional[Server] = None
+
+    @property
+    def socket_path(self) -> str:
+        return socket_path(self.daemon_dir)
+
+    def dispatch(self, request: Dict[str, Any], uid: int, rfile: io.BufferedIOBase, wfile: io.BufferedIOBase) -> Optional[Dict[str, Any]]:
+        command = request.get("command")
+        if command == "acquire":
+            self.acquire(buildqueue.Job.from_dict(dict(request.get("job", {}), state="queued", submitted=time.time())), uid, rfile, wfile)
+            return None  # responses sent by acquire
+        if command == "status":
+            with self.condition:
+                queue = [lease.to_dict() for lease in self.leases]
+            return {"ok": True, "pid": os.getpid(), "jobs": self.jobs, "max_mem": self.max_mem, "queue": queue}
+        if command == "cancel":
+            self.cancel(request.get("name", ""), uid)
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command {command!r}"}
+
+    def schedule(self) -> None:
+        """Admits queued jobs by priority as long as the limits allow, the
+        condition must be held."""
+        running = [lease.job for lease in self.leases if lease.job.state == "running"]
+        queued = sorted((lease.job for lease in self.leases if lease.job.state == "queued"), key=lambda job: (-job.priority, job.submitted))
+        for job in queued:
+            if not buildqueue.admissible(job, running, self.jobs, self.max_mem):
+                break  # keeps priority order, no smaller job overtakes
+            job.state, job.started = "running", time.time()
+            running.append(job)
+        self.condition.notify_all()
+
+    def acquire(self, job: buildqueue.Job, uid: int, rfile: io.BufferedIOBase, wfile: io.BufferedIOBase) -> None:
+        """Queues *job* of user *uid*, waits for its admission and holds the
+        slot until the client reports the job finished or disconnects."""
+        lease = Lease(job, uid, wfile)
+        with self.condition:
+            for other in self.leases:
+                if other.job.name == job.name and other.job.state in ("queued", "running"):
+                    raise RuntimeError(f"build job {job.name!r} already {other.job.state}")
+            self.leases = [other for other in self.leases if other.job.name != job.name] + [lease]
+            logger.info("queued build job %s of user %s", job.name, user_name(uid))
+            self.schedule()
+            while job.state == "queued":
+                self.condition.wait()
+        if job.state == "cancelled":
+            lease.send({"ok": False, "error": f"build job {job.name!r} cancelled"})
+            return
+        logger.info("admitted build job %s of user %s", job.name, user_name(uid))
+        returncode = None
+        try:
+            lease.send({"ok": True})
+            for line in rfile:
+                message = json.loads(line)
+                if message.get("command") == "started":
+                    job.pid = message.get("pid")
+                elif message.get("command") == "finished":
+                    returncode = message.get("returncode")
+                    break
+        finally:
+            self.release(lease, returncode)
+
+    def release(self, lease: Lease, returncode: Optional[int]) -> None:
+        """Frees the slot of a finished job, *returncode* is None if the connection was lost."""
+        job = lease.job
+        with self.condition:
+            job.returncode = returncode if returncode is not None else -1
+            job.state = "cancelled" if lease.cancelled else "done" if job.returncode == 0 else "failed"
+            job.finished = time.time()
+            self.schedule()
+        if returncode is None:
+            logger.error("lost connection to client of build job %s", job.name)
+        elif job.state == "failed":
+            logger.error("build job %s failed with exit code %d, see %s", job.name, job.returncode, job.log)
+        else:
+            logger.info("build job %s %s after %s", job.name, job.state, utils.format_duration(job.elapsed()))
+
+    def cancel(self, name: str, uid: int) -> None:
+        """Cancels a queued or running job, only its owner, the daemon owner
+        and root are allowed to."""
+        with self.condition:
+            for lease in self.leases:
+                if lease.job.name == name and lease.job.state in ("queued", "running"):
+                    if uid not in (lease.uid, os.getuid(), 0):
+                        raise RuntimeError(f"cancel of build job {name!r} of user {user_name(lease.uid)} refused for user {user_name(uid)}")
+                    if lease.job.state == "queued":
+                        lease.job.state, lease.job.finished = "cancelled", time.time()
+                        self.condition.notify_all()
+                    else:
+                        lease.cancelled = True
+                        try:
+                            lease.send({"command": "cancel"})  # client terminates the build
+                        except OSError as exc:
+                            logger.error("failed to cancel build job %s: %s", name, exc)
+                    logger.warning("cancelled build job %s of user %s", name, user_name(lease.uid))
+                    return
+        raise RuntimeError(f"no queued or running build job {name!r}")
+
+    def shutdown(self) -> None:
+        """Stops serving, admitted builds continue without the daemon."""
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown).start()  # must not block the handling thread
+
+    def set_permissions(self) -> None:
+        """Makes the socket accessible to all users or to the members of the daemon group."""
+        if self.group:
+            gid = grp.getgrnam(self.group).gr_gid
+            for path, mode in ((self.daemon_dir, 0o2770), (self.socket_path, 0o660)):
+                os.chown(path, -1, gid)
+                os.chmod(path, mode)
+        else:
+            os.chmod(self.socket_path, 0o666)
+
+    def serve(self) -> None:
+        """Serves requests until shut down (also by signal SIGTERM)."""
+        os.makedirs(self.daemon_dir, mode=0o755, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if Client(self.socket_path).alive():
+                raise RuntimeError(f"build daemon already running on {self.socket_path!r}")
+            os.remove(self.socket_path)  # stale socket of a terminated daemon
+        self.server = Server(self.socket_path, RequestHandler)
+        self.server.build_daemon = self  # type: ignore[attr-defined]
+        self.set_permissions()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.shutdown())
+        logger.info("build daemon listening on %s (%s)", self.socket_path, buildqueue.format_limits(self.jobs, self.max_mem))
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            with self.condition:
+                running = [lease.job.name for lease in self.leases if lease.job.state == "running"]
+            if running:
+                logger.warning("admitted build jobs continue without the daemon: %s", ", ".join(running))
+            logger.info("build daemon stopped")
+
+
+class Client:
+    """Client of the build daemon listening on socket *path*."""
+
+    def __init__(self, path: str = socket_path(DefaultDaemonDir), timeout: float = DefaultTimeout) -> None:
+        self.path = path
+        self.timeout = timeout
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as exc:
+            sock.close()
+            raise RuntimeError(f"build daemon not running on {self.path!r}: {exc}")
+        return sock
+
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self.connect() as sock:
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as fp:
+                response = json.loads(fp.readline())
+        if not response.get("ok"):
+            raise RuntimeError(f"build daemon: {response.get('error')}")
+        return response
+
+    def alive(self) -> bool:
+        try:
+            self.request({"command": "status"})
+        except (RuntimeError, OSError, ValueError):
+            return False
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return self.request({"command": "status"})
+
+    def cancel(self, name: str) -> None:
+        self.request({"command": "cancel", "name": name})
+
+    def run(self, job: buildqueue.Job) -> int:
+        """Runs *job* as soon as the daemon admits it, returns its exit status.
+        The build runs in its own session under the user id of the caller."""
+        with self.connect() as sock:
+            sock.sendall(json.dumps({"command": "acquire", "job": job.to_dict()}).encode() + b"\n")
+            sock.settimeout(None)  # waits for admission
+            with sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+                line = rfile.readline()
+                if not line:
+                    raise RuntimeError(f"build daemon closed connection before admitting build job {job.name}")
+                response = json.loads(line)
+                if not response.get("ok"):
+                    raise RuntimeError(f"build daemon: {response.get('error')}")
+                logger.info("build job %s admitted by build daemon", job.name)
+                os.makedirs(os.path.dirname(os.path.abspath(job.log)), exist_ok=True)
+                with open(job.log, "ab") as logfile:
+                    process = subprocess.Popen(["bash", "-c", job.command], stdin=subprocess.DEVNULL, stdout=logfile, stderr=subprocess.STDOUT, start_new_session=True)
+                finished = threading.Event()
+                watcher = threading.Thread(target=self.watch, args=(rfile, process, finished), name="watcher", daemon=True)
+                watcher.start()
+                try:
+                    send_message(wfile, {"command": "started", "pid": process.pid})
+                except OSError:
+                    pass  # reported by the watcher
+                returncode = process.wait()
+                finished.set()
+                try:
+                    send_message(wfile, {"command": "finished", "returncode": returncode})
+                except OSError:
+                    pass
+                watcher.join(self.timeout)  # until the daemon closes the connection
+                return returncode
+
+    def watch(self, rfile: io.BufferedIOBase, process: subprocess.Popen, finished: threading.Event) -> None:
+        """Terminates the process group of a running build cancelled by the daemon."""
+        try:
+            for line in rfile:
+                if json.loads(line).get("command") == "cancel":
+                    logger.warning("build job cancelled, terminating pid %d", process.pid)
+                    try:
+                        os.killpg(process.pid, signal.SIGTERM)  # build is session leader of its processes
+                    except ProcessLookupError:
+                        pass
+        except (OSError, ValueError):
+            pass
+        if not finished.is_set():
+            logger.warning("lost connection to build daemon, build continues")
+
+
+def format_status(status: Dict[str, Any]) -> List[str]:
+    """Returns lines describing daemon status and the jobs of all users."""
+    jobs = [buildqueue.Job.from_dict(data) for data in status["queue"]]
+    lines = [
+        "build daemon pid {} ({})".format(status["pid"], buildqueue.format_limits(status["jobs"], status["max_mem"])),
+        f"There are {len(jobs)} build jobs ({buildqueue.format_counts(jobs)}):",
+    ]
+    return lines + [f"{line}\t{data['user']}" for line, data in zip(buildqueue.format_jobs(jobs), status["queue"])]
+
+
+def start_daemon(daemon_dir: str = DefaultDaemonDir, jobs: Optional[int] = None, max_mem: Optional[float] = None, group: Optional[str] = None) -> subprocess.Popen:
+    """Starts a detached daemon process, writing its output to the daemon log."""
+    os.makedirs(daemon_dir, mode=0o755, exist_ok=True)
+    cmd = [sys.executable, "-m", f"{__package__}.builddaemon", "--dir", daemon_dir, "serve"]
+    if jobs:
+        cmd += ["--jobs", format(jobs)]
+    if max_mem:
+        cmd += ["--max-mem", format(max_mem)]
+    if group:
+        cmd += ["--group", group]
+    with open(os.path.join(daemon_dir, LogFile), "ab") as logfile:
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=logfile, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def start_job(job: buildqueue.Job, daemon_dir: str = DefaultDaemonDir) -> subprocess.Popen:
+    """Starts a detached client process running *job* as soon as the daemon
+    admits it, writing its output to the job log."""
+    cmd = [sys.executable, "-m", f"{__package__}.builddaemon", "--dir", daemon_dir, "run", "--name", job.name, "--log", job.log, "--mem", format(job.mem), "--priority", format(job.priority), "--", job.command]
+    os.makedirs(os.path.dirname(os.path.abspath(job.log)), exist_ok=True)
+    with open(job.log, "ab") as logfile:
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=logfile, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="host-wide build daemon admitting module builds of all users")
+    parser.add_argument("--dir", metavar="<path>", default=DefaultDaemonDir, type=os.path.abspath, help=f"directory of socket and log of the daemon (default is {DefaultDaemonDir!r})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help in (("serve", "run daemon in foreground"), ("start", "start detached daemon")):
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.add_argument("-j", "--jobs", metavar="<n>", type=utils.count_t, help="maximum number of concurrent builds on the host (default is no limit)")
+        subparser.add_argument("--max-mem", metavar="<gb>", type=float, help="memory budget of concurrent builds on the host in GB (default is no limit)")
+        subparser.add_argument("--group", metavar="<name>", help="restrict access to the daemon to members of a group (default is all users)")
+    subparsers.add_parser("status", help="show state of daemon and build jobs")
+    cancel = subparsers.add_parser("cancel", help="cancel queued or running build job")
+    cancel.add_argument("name", help="name of build job")
+    subparsers.add_parser("stop", help="stop daemon (admitted builds continue)")
+    run = subparsers.add_parser("run", help="run build command as soon as the daemon admits it")
+    run.add_argument("--name", metavar="<name>", required=True, help="name of build job")
+    run.add_argument("--log", metavar="<file>", required=True, type=os.path.abspath, help="log file of build job")
+    run.add_argument("--mem", metavar="<gb>", type=float, default=buildqueue.DefaultJobMemory, help="estimated memory of build job in GB (default is %(default)s)")
+    run.add_argument("--priority", metavar="<n>", type=int, default=0, help="priority of build job, higher priorities are admitted first (default is %(default)s)")
+    run.add_argument("build_command", metavar="<command>", help="shell command of build job")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logger.setLevel(logging.INFO)
+    client = Client(socket_path(args.dir))
+    if args.command == "serve":
+        Daemon(args.dir, args.jobs, args.max_mem, args.group).serve()
+    elif args.command == "start":
+        if client.alive():
+            raise RuntimeError(f"build daemon already running on {client.path!r}")
+        process = start_daemon(args.dir, args.jobs, args.max_mem, args.group)
+        logger.info("started build daemon (pid %d), see %s", process.pid, os.path.join(args.dir, LogFile))
+    elif args.command == "status":
+        for line in format_status(client.status()):
+            print(line)
+    elif args.command == "cancel":
+        client.cancel(args.name)
+    elif args.command == "stop":
+        try:
+            os.kill(client.status()["pid"], signal.SIGTERM)
+        except PermissionError:
+            raise RuntimeError("build daemon can only be stopped by its owner")
+    elif args.command == "run":
+        return client.run(buildqueue.Job(args.name, args.build_command, args.log, args.mem, args.priority))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
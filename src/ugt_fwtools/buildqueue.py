@@ -0,0 +1,398 @@
+"""Bounded scheduler of module build jobs with a persistent queue state.
+
+Build jobs (shell commands running synthesis and implementation of a module)
+are recorded in a JSON state file in the build area. A scheduler process
+starts queued jobs as slots free up, limited to a number of concurrent jobs
+and a memory budget, and records the state of every job in the file.
+
+The scheduler is started detached in its own session, so the build survives
+the controlling terminal closing. Every job runs in its own session and writes
+its exit status to a file next to its log, so a restarted scheduler adopts
+jobs which are still running.
+
+>>> queue = BuildQueue("build_queue.json")
+>>> queue.add(Job("module_0", command, "logs/module_0.log", mem=16))
+>>> Scheduler(queue, jobs=2, max_mem=64).run()
+
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import utils
+
+__all__ = ["Job", "BuildQueue", "Scheduler", "start_scheduler", "format_status"]
+
+logger = utils.get_colored_logger(__name__)
+
+QueueFile: str = "build_queue.json"
+"""Name of the queue state file in the build area."""
+
+DefaultJobMemory: float = 16.0
+"""Default memory estimate of a module build job in GB."""
+
+DefaultPollInterval: float = 10.0
+"""Default interval in seconds between checks of running jobs."""
+
+States = ("queued", "running", "done", "failed", "cancelled")
+"""States of a build job."""
+
+
+class Job:
+    """Build job *name* running shell *command*, writing its output to *log*,
+    *mem* is the estimated peak memory in GB, jobs of higher *priority* are
+    started first."""
+
+    def __init__(self, name: str, command: str, log: str, mem: float = DefaultJobMemory, priority: int = 0) -> None:
+        self.name = name
+        self.command = command
+        self.log = log
+        self.mem = mem
+        self.priority = priority
+        self.state = "queued"
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def status_file(self) -> str:
+        """File the exit status of the job is written to."""
+        return f"{self.log}.status"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["name"], data["command"], data["log"], data.get("mem", DefaultJobMemory), data.get("priority", 0))
+        for key in ("state", "pid", "returncode", "submitted", "started", "finished"):
+            if key in data:
+                setattr(job, key, data[key])
+        return job
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        """Returns run time in seconds (0 if not started)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or now or time.time()) - self.started
+
+
+class BuildQueue:
+    """Queue of build jobs persisted in JSON file *filename*. Modifications
+    hold an exclusive lock of the file, so jobs can be added while a
+    scheduler is running."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = os.path.abspath(filename)
+
+    @property
+    def lock_file(self) -> str:
+        return f"{self.filename}.lock"
+
+    @property
+    def scheduler_lock_file(self) -> str:
+        return f"{self.filename}.scheduler"
+
+    def load(self) -> Dict[str, Any]:
+        """Returns queue state, a dictionary of scheduler settings and list of jobs."""
+        if not os.path.isfile(self.filename):
+            return {"jobs": None, "max_mem": None, "queue": []}
+        with open(self.filename, "rt") as fp:
+            state = json.load(fp)
+        state["queue"] = [Job.from_dict(data) for data in state.get("queue", [])]
+        return state
+
+    def save(self, state: Dict[str, Any]) -> None:
+        data = dict(state, queue=[job.to_dict() for job in state["queue"]])
+        temp_filename = f"{self.filename}.tmp-{os.getpid()}"
+        with open(temp_filename, "wt") as fp:
+            json.dump(data, fp, indent=2)
+        os.replace(temp_filename, self.filename)  # readers never see a partially written file
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[Dict[str, Any]]:
+        """Context returning the queue state, saved on exit."""
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self.load()
+                yield state
+                self.save(state)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def add(self, *jobs: Job) -> None:
+        """Adds jobs to the queue at once, replacing finished jobs of the same name."""
+        with self.locked() as state:
+            names = {job.name for job in jobs}
+            for other in state["queue"]:
+                if other.name in names and other.state in ("queued", "running"):
+                    raise RuntimeError(f"build job {other.name!r} already {other.state}")
+            state["queue"] = [other for other in state["queue"] if other.name not in names] + list(jobs)
+        for job in jobs:
+            logger.info("queued build job %s", job.name)
+
+    def configure(self, jobs: Optional[int] = None, max_mem: Optional[float] = None) -> None:
+        """Stores scheduler settings in the queue state."""
+        with self.locked() as state:
+            state["jobs"] = jobs
+            state["max_mem"] = max_mem
+
+    def jobs(self) -> List[Job]:
+        return self.load()["queue"]
+
+    def scheduler_running(self) -> bool:
+        """Returns True if a scheduler is processing the queue."""
+        if not os.path.exists(self.scheduler_lock_file):
+            return False
+        with open(self.scheduler_lock_file, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        return False
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def admissible(job: Job, running: List[Job], jobs: Optional[int] = None, max_mem: Optional[float] = None) -> bool:
+    """Returns True if *job* can be started next to *running* jobs within the
+    limits of *jobs* concurrent jobs and *max_mem* GB (a single job is always
+    admitted)."""
+    if not running:
+        return True
+    if jobs and len(running) >= jobs:
+        return False
+    if max_mem and sum(other.mem for other in running) + job.mem > max_mem:
+        return False
+    return True
+
+
+def read_status(filename: str) -> Optional[int]:
+    """Returns exit status written to file, None if not available."""
+    try:
+        with open(filename, "rt") as fp:
+            return int(fp.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Runs the jobs of *queue*, at most *jobs* at a time (default is no limit)
+    and only while the memory estimates of running jobs do not exceed
+    *max_mem* GB (a single job is always started)."""
+
+    def __init__(self, queue: BuildQueue, jobs: Optional[int] = None, max_mem: Optional[float] = None, interval: float = DefaultPollInterval) -> None:
+        self.queue = queue
+        self.jobs = jobs
+        self.max_mem = max_mem
+        self.interval = interval
+        self.processes: Dict[str, subprocess.Popen] = {}
+
+    def can_start(self, job: Job, running: List[Job]) -> bool:
+        return admissible(job, running, self.jobs, self.max_mem)
+
+    def start(self, job: Job) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(job.log)), exist_ok=True)
+        if os.path.exists(job.status_file):
+            os.remove(job.status_file)
+        with open(job.log, "ab") as logfile:
+            # exit status is written by the job itself, so it is available even if the scheduler terminated meanwhile
+            process = subprocess.Popen(
+                ["bash", "-c", 'bash -c "$1"; echo $? > "$2"', "--", job.command, job.status_file],
+                stdin=subprocess.DEVNULL, stdout=logfile, stderr=subprocess.STDOUT, start_new_session=True,
+            )
+        self.processes[job.name] = process
+        job.state, job.pid, job.started, job.finished, job.returncode = "running", process.pid, time.time(), None, None
+        logger.info("started build job %s (pid %d), see %s", job.name, process.pid, job.log)
+
+    def poll(self, job: Job) -> None:
+        """Updates state of a running job."""
+        process = self.processes.get(job.name)
+        if process is not None:
+            if process.poll() is None:
+                return
+            del self.processes[job.name]
+        elif pid_alive(job.pid):
+            return  # adopted from a previous scheduler
+        returncode = read_status(job.status_file)
+        job.returncode = returncode if returncode is not None else -1
+        job.state = "done" if job.returncode == 0 else "failed"
+        job.finished = os.path.getmtime(job.status_file) if returncode is not None else time.time()
+        if job.state == "done":
+            logger.info("build job %s done after %s", job.name, utils.format_duration(job.elapsed()))
+        else:
+            logger.error("build job %s failed with exit code %d, see %s", job.name, job.returncode, job.log)
+
+    def step(self) -> bool:
+        """Updates running jobs and starts queued jobs, returns False if no
+        jobs are left to run."""
+        with self.queue.locked() as state:
+            jobs = state["queue"]
+            for job in jobs:
+                if job.state == "running":
+                    self.poll(job)
+            running = [job for job in jobs if job.state == "running"]
+            queued = sorted((job for job in jobs if job.state == "queued"), key=lambda job: (-job.priority, job.submitted))
+            for job in queued:
+                if not self.can_start(job, running):
+                    break  # keeps priority order, no smaller job overtakes
+                self.start(job)
+                running.append(job)
+            return bool(running)
+
+    def cancel(self, name: str) -> bool:
+        """Cancels a queued or running job (terminating its process group),
+        returns False if there is no such job to cancel."""
+        with self.queue.locked() as state:
+            for job in state["queue"]:
+                if job.name == name and job.state in ("queued", "running"):
+                    if job.state == "running" and pid_alive(job.pid):
+                        try:
+                            os.killpg(job.pid, signal.SIGTERM)  # job is session leader of its build processes
+                        except ProcessLookupError:
+                            pass
+                        process = self.processes.pop(job.name, None)
+                        if process is not None:
+                            process.wait()
+                    job.state, job.finished = "cancelled", time.time()
+                    logger.warning("cancelled build job %s", job.name)
+                    return True
+        return False
+
+    def run(self, stop: Optional[threading.Event] = None, wakeup: Optional[threading.Event] = None) -> None:
+        """Runs until all jobs are finished, only one scheduler per queue. If
+        event *stop* is given, runs until it is set, serving jobs added
+        meanwhile, event *wakeup* triggers an immediate check of the queue."""
+        with open(self.queue.scheduler_lock_file, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise RuntimeError(f"scheduler already running for queue {self.queue.filename!r}")
+            logger.info("scheduling build jobs of %s (%s)", self.queue.filename, format_limits(self.jobs, self.max_mem))
+            while True:
+                active = self.step()
+                if stop is None and not active:
+                    break
+                if stop is not None and stop.is_set():
+                    break
+                if wakeup is not None:
+                    wakeup.wait(self.interval)
+                    wakeup.clear()
+                else:
+                    time.sleep(self.interval)
+            if stop is None:
+                logger.info("all build jobs finished")
+
+
+def start_scheduler(filename: str, log: str) -> subprocess.Popen:
+    """Starts a detached scheduler process for queue *filename* (using the
+    scheduler settings stored in the queue), writing its output to *log*."""
+    os.makedirs(os.path.dirname(os.path.abspath(log)), exist_ok=True)
+    with open(log, "ab") as logfile:
+        return subprocess.Popen(
+            [sys.executable, "-m", __name__, "run", filename],
+            stdin=subprocess.DEVNULL, stdout=logfile, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+
+
+def format_limits(jobs: Optional[int], max_mem: Optional[float]) -> str:
+    """Returns description of scheduler limits."""
+    return "jobs: {}, max. memory: {}".format(jobs or "unlimited", f"{max_mem:g} GB" if max_mem else "unlimited")
+
+
+def format_jobs(jobs: List[Job], now: Optional[float] = None) -> List[str]:
+    """Returns one line describing the state of every job."""
+    lines = []
+    for job in jobs:
+        if job.state == "queued":
+            info = f"queued, priority {job.priority}" if job.priority else "queued"
+        elif job.state == "running":
+            info = f"running, pid {job.pid}, {utils.format_duration(job.elapsed(now))}"
+        elif job.state == "done":
+            info = f"done, {utils.format_duration(job.elapsed(now))}"
+        elif job.state == "cancelled":
+            info = "cancelled"
+        else:
+            info = f"failed, exit code {job.returncode}, see {job.log}"
+        lines.append(f"\t{job.name}\t({info})")
+    return lines
+
+
+def format_counts(jobs: List[Job]) -> str:
+    """Returns number of jobs in every state."""
+    return ", ".join(f"{sum(1 for job in jobs if job.state == state)} {state}" for state in States)
+
+
+def format_status(queue: BuildQueue, now: Optional[float] = None) -> List[str]:
+    """Returns lines describing the state of all jobs, similar to `screen -ls`."""
+    jobs = queue.jobs()
+    scheduler = "scheduler running" if queue.scheduler_running() else "no scheduler running"
+    lines = [f"There are {len(jobs)} build jobs in {queue.filename} ({format_counts(jobs)}, {scheduler}):"]
+    return lines + format_jobs(jobs, now)
+
+
+def queue_filename(path: str) -> str:
+    """Returns queue file of a build area, path of the queue file itself or a
+    build configuration file in the build area."""
+    if os.path.isdir(path):
+        return os.path.join(path, QueueFile)
+    if path.endswith(".cfg"):
+        return os.path.join(os.path.dirname(os.path.abspath(path)), QueueFile)
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="module build job queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    status = subparsers.add_parser("status", help="show state of build jobs")
+    status.add_argument("queue", metavar="<path>", help="build area, build config file or queue file")
+    run = subparsers.add_parser("run", help="run scheduler in foreground")
+    run.add_argument("queue", metavar="<path>", help="build area, build config file or queue file")
+    run.add_argument("-j", "--jobs", metavar="<n>", type=utils.count_t, help="maximum number of concurrent build jobs (default is setting of the queue)")
+    run.add_argument("--max-mem", metavar="<gb>", type=float, help="memory budget of concurrent build jobs in GB (default is setting of the queue)")
+    run.add_argument("--interval", metavar="<sec>", type=float, default=DefaultPollInterval, help="interval between checks of running jobs (default is %(default)s)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logger.setLevel(logging.INFO)
+    queue = BuildQueue(queue_filename(args.queue))
+    if not os.path.isfile(queue.filename):
+        raise RuntimeError(f"no such build queue: {queue.filename!r}")
+    if args.command == "status":
+        for line in format_status(queue):
+            print(line)
+        return 0
+    state = queue.load()
+    Scheduler(queue, args.jobs or state.get("jobs"), args.max_mem or state.get("max_mem"), args.interval).run()
+    return 1 if any(job.state == "failed" for job in queue.jobs()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Reuse of module builds of a previous menu revision.
+
+Minor menu revisions often change the VHDL snippets of only a few modules.
+Modules with the same snippets, firmware tags and tool versions as in a
+previous build are not synthesized again, their IPBB projects (including
+bitfile and reports) are copied from the previous build area.
+
+Reused bitfiles contain build version and timestamp of the build which
+synthesized them, the build config lists this source build of every reused
+module in section `reuse` (option `module_<n>`).
+
+>>> previous = read_build(".../0x1190/build_0x1190.cfg")
+>>> differing_options(previous, current_options)
+[]
+>>> reusable_modules(previous, ipbb_dir, [0, 1, 2], snippets)
+[0, 2]
+>>> source_build(previous, 0)
+'1190'
+
+"""
+
+import configparser
+import os
+import re
+import shutil
+from typing import Dict, List, NamedTuple, Tuple
+
+from . import buildstages
+from . import utils
+
+__all__ = ["PreviousBuild", "read_build", "source_builds", "source_build", "differing_options", "snippets_digest", "reusable_modules", "reuse_module"]
+
+logger = utils.get_colored_logger(__name__)
+
+CompareOptions: List[Tuple[str, str]] = [
+    ("firmware", "ipburl"),
+    ("firmware", "ipbtag"),
+    ("firmware", "mp7url"),
+    ("firmware", "mp7tag"),
+    ("firmware", "ugturl"),
+    ("firmware", "ugttag"),
+    ("firmware", "type"),
+    ("vivado", "version"),
+    ("device", "name"),
+]
+"""Build config options (section, option) which must not differ for reusing modules."""
+
+ReuseSection: str = "reuse"
+"""Build config section listing reused modules."""
+
+
+class PreviousBuild(NamedTuple):
+    """Previous build *build* located in *buildarea*, *options* maps the
+    compared build config options to their values, *source_builds* maps ids
+    of modules reused by the previous build to their source build."""
+    build: str
+    buildarea: str
+    n_modules: int
+    options: Dict[Tuple[str, str], str]
+    source_builds: Dict[int, str]
+
+
+def module_option(module_id: int) -> str:
+    """Returns option of section `reuse` naming the source build of a module."""
+    return f"module_{module_id}"
+
+
+def source_builds(config: configparser.RawConfigParser) -> Dict[int, str]:
+    """Returns source builds of reused modules of a build config, mapping
+    module id to the build which synthesized its bitfile."""
+    if not config.has_section(ReuseSection):
+        return {}
+    builds = {}
+    for option, value in config.items(ReuseSection):
+        match = re.fullmatch(r"module_(\d+)", option)
+        if match:
+            builds[int(match.group(1))] = value
+    return builds
+
+
+def source_build(previous: PreviousBuild, module_id: int) -> str:
+    """Returns build which synthesized the bitfile of a module of the previous build."""
+    return previous.source_builds.get(module_id, previous.build)
+
+
+def read_build(filename: str) -> PreviousBuild:
+    """Returns previous build read from build config file."""
+    if not os.path.isfile(filename):
+        raise RuntimeError(f"no such build config file: {filename!r}")
+    config = configparser.RawConfigParser()
+    config.read(filename)
+    try:
+        options = {(section, option): config.get(section, option) for section, option in CompareOptions}
+        return PreviousBuild(
+            build=config.get("menu", "build"),
+            buildarea=config.get("firmware", "buildarea"),
+            n_modules=config.getint("menu", "modules"),
+            options=options,
+            source_builds=source_builds(config),
+        )
+    except (configparser.Error, ValueError) as exc:
+        raise RuntimeError(f"invalid build config file {filename!r}: {exc}")
+
+
+def differing_options(previous: PreviousBuild, options: Dict[Tuple[str, str], str]) -> List[str]:
+    """Returns names of options differing from the previous build."""
+    return [f"{section}.{option}" for section, option in CompareOptions if previous.options[(section, option)] != options[(section, option)]]
+
+
+def module_dir(ipbb_dir: str, module_id: int) -> str:
+    return os.path.join(ipbb_dir, "proj", f"module_{module_id}")
+
+
+def bitfile(ipbb_dir: str, module_id: int) -> str:
+    return os.path.join(module_dir(ipbb_dir, module_id), "products", f"module_{module_id}.bit")
+
+
+def snippets_digest(ipbb_dir: str, module_id: int, snippets: List[str]) -> str:
+    """Returns hex digest of the VHDL snippets of a module in a build area."""
+    snippets_dir = os.path.join(ipbb_dir, "src", f"module_{module_id}", "vhdl_snippets")
+    return utils.hash_files(os.path.join(snippets_dir, name) for name in snippets)
+
+
+def reusable_modules(previous: PreviousBuild, ipbb_dir: str, module_ids: List[int], snippets: List[str]) -> List[int]:
+    """Returns ids of modules with the same VHDL snippets as in the previous
+    build and a bitfile in the previous build area."""
+    module_ids = [module_id for module_id in module_ids if module_id < previous.n_modules]
+    reusable = []
+    for module_id in module_ids:
+        if not os.path.isfile(bitfile(previous.buildarea, module_id)):
+            logger.info("module %s: no bitfile in previous build %s", module_id, previous.build)
+        elif snippets_digest(previous.buildarea, module_id, snippets) != snippets_digest(ipbb_dir, module_id, snippets):
+            logger.info("module %s: VHDL snippets changed since build %s", module_id, previous.build)
+        else:
+            logger.info("module %s: unchanged since build %s", module_id, previous.build)
+            reusable.append(module_id)
+    return reusable
+
+
+def reuse_module(previous: PreviousBuild, ipbb_dir: str, module_id: int) -> None:
+    """Copies IPBB project of a module from the previous build area."""
+    source = module_dir(previous.buildarea, module_id)
+    destination = module_dir(ipbb_dir, module_id)
+    logger.info("copying module %s from %s ...", module_id, source)
+    shutil.copytree(source, destination, symlinks=True)
+    # The copied project refers to sources of the previous build area, a
+    # resumed build has to start over.
+    buildstages.invalidate(os.path.join(destination, buildstages.StagesDir), list(buildstages.Stages))
@@ -0,0 +1,115 @@
+"""Concurrent setup of build areas.
+
+Setup tasks (adding repositories, downloading snippets, preparing module
+projects) are added to a graph together with the tasks they depend on. A task
+is started in a thread pool as soon as all its dependencies completed, the
+wall clock time of every task is recorded and summed up per setup step.
+
+>>> graph = SetupGraph(jobs=8)
+>>> ugt = graph.add("add mp7_ugt_legacy", "add repository", add_repo, ugturl, ugttag, args)
+>>> graph.add("module_0", "replace templates", replace_vhdl_templates, ..., requires=[ugt])
+>>> graph.run()
+>>> for line in graph.report():
+...     logger.info(line)
+
+"""
+
+import concurrent.futures
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import utils
+
+__all__ = ["DefaultSetupJobs", "SetupTask", "SetupGraph"]
+
+logger = utils.get_colored_logger(__name__)
+
+DefaultSetupJobs: int = 8
+"""Default number of concurrent setup tasks."""
+
+
+class SetupTask:
+    """Setup task *name* of setup step *step* calling *func* with *args*
+    after all tasks named in *requires* completed."""
+
+    def __init__(self, name: str, step: str, func: Callable[..., Any], args: Sequence[Any], requires: Sequence[str]) -> None:
+        self.name = name
+        self.step = step
+        self.func = func
+        self.args = args
+        self.requires = list(requires)
+        self.duration: Optional[float] = None
+
+    @property
+    def completed(self) -> bool:
+        return self.duration is not None
+
+    def __call__(self) -> None:
+        t_start = time.monotonic()
+        try:
+            self.func(*self.args)
+        except Exception as exc:
+            logger.error("setup task %s (%s) failed: %s", self.name, self.step, exc)
+            raise
+        self.duration = time.monotonic() - t_start
+        logger.debug("setup task %s (%s): %.3f s", self.name, self.step, self.duration)
+
+
+class SetupGraph:
+    """Runs setup tasks concurrently in dependency order, at most *jobs*
+    tasks at a time."""
+
+    def __init__(self, jobs: int = DefaultSetupJobs) -> None:
+        self.jobs = jobs
+        self.tasks: Dict[str, SetupTask] = {}
+        self.wall_time: float = 0.0
+
+    def add(self, name: str, step: str, func: Callable[..., Any], *args: Any, requires: Sequence[str] = ()) -> str:
+        """Adds task calling *func* with *args* after tasks *requires*, returns name of the task."""
+        if name in self.tasks:
+            raise RuntimeError(f"setup task already exists: {name!r}")
+        for required in requires:
+            if required not in self.tasks:
+                raise RuntimeError(f"setup task {name!r} requires unknown task {required!r}")
+        self.tasks[name] = SetupTask(name, step, func, args, requires)
+        return name
+
+    def ready(self, task: SetupTask) -> bool:
+        return all(self.tasks[name].completed for name in task.requires)
+
+    def run(self) -> None:
+        """Runs all tasks not completed yet, raises the error of the first
+        failed task (after running tasks finished)."""
+        t_start = time.monotonic()
+        pending = [task for task in self.tasks.values() if not task.completed]
+        running: Dict[concurrent.futures.Future, SetupTask] = {}
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                try:
+                    while pending or running:
+                        for task in [task for task in pending if self.ready(task)]:
+                            pending.remove(task)
+                            running[executor.submit(task)] = task
+                        done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                        for future in done:
+                            del running[future]
+                            future.result()  # raises error of failed task
+                except BaseException:
+                    for future in running:
+                        future.cancel()  # tasks not started yet
+                    raise
+        finally:
+            self.wall_time += time.monotonic() - t_start
+
+    def report(self) -> List[str]:
+        """Returns lines listing the time spent per setup step."""
+        steps: Dict[str, List[float]] = {}
+        for task in self.tasks.values():
+            if task.duration is not None:
+                steps.setdefault(task.step, []).append(task.duration)
+        lines = []
+        for step, durations in steps.items():
+            lines.append(f"{step:<20} {len(durations):>3} tasks {sum(durations):>8.1f} s (longest {max(durations):.1f} s)")
+        total = sum(sum(durations) for durations in steps.values())
+        lines.append(f"setup took {self.wall_time:.1f} s ({total:.1f} s in all tasks)")
+        return lines
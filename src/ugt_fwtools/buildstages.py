@@ -0,0 +1,106 @@
+"""Completion markers of module build stages.
+
+The implementation of a module runs the stages project generation, synthesis,
+cell fixing and implementation one after another. After a stage completed a
+marker recording a hash of its inputs is written to the module project. The
+hash of a stage includes the hash of the preceding stage, so changed inputs
+invalidate all following stages. A resumed build restarts at the first stage
+without a valid marker, e.g. only implementation is run again from the
+existing synthesized design after implementation failed.
+
+>>> keys = stage_keys([("project", ["v1.32.1"], snippet_files), ("synth", [], [])])
+>>> first_stale("proj/module_0/build_stages", keys)
+'synth'
+
+"""
+
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import utils
+
+__all__ = ["Stages", "stage_keys", "mark", "read_marker", "first_stale", "invalidate", "mark_command"]
+
+logger = utils.get_colored_logger(__name__)
+
+Stages: Tuple[str, ...] = ("project", "synth", "fix_cells", "impl")
+"""Stages of a module implementation in order of execution."""
+
+StagesDir: str = "build_stages"
+"""Directory of stage markers in the module project."""
+
+
+def stage_keys(stages: List[Tuple[str, List[str], List[str]]]) -> Dict[str, str]:
+    """Returns mapping of stage name to input hash from a list of tuples of
+    stage name, input values and input files, in order of execution."""
+    keys: Dict[str, str] = {}
+    key = ""
+    for name, values, files in stages:
+        key = utils.make_key(key, name, *values, utils.hash_files(files))
+        keys[name] = key
+    return keys
+
+
+def marker_file(directory: str, stage: str) -> str:
+    return os.path.join(directory, f"{stage}.json")
+
+
+def mark(directory: str, stage: str, key: str) -> None:
+    """Writes completion marker of a stage."""
+    os.makedirs(directory, exist_ok=True)
+    with open(marker_file(directory, stage), "wt") as fp:
+        json.dump({"stage": stage, "key": key, "completed": time.time()}, fp)
+
+
+def read_marker(directory: str, stage: str) -> Optional[Dict[str, str]]:
+    """Returns completion marker of a stage, None if not completed."""
+    try:
+        with open(marker_file(directory, stage), "rt") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def first_stale(directory: str, keys: Dict[str, str]) -> Optional[str]:
+    """Returns first stage (of *keys* mapping stage to input hash) which was
+    not completed with the same inputs, None if all stages are up to date."""
+    for stage, key in keys.items():
+        marker = read_marker(directory, stage)
+        if not marker or marker.get("key") != key:
+            return stage
+    return None
+
+
+def invalidate(directory: str, stages: List[str]) -> None:
+    """Removes completion markers of stages."""
+    for stage in stages:
+        if os.path.exists(marker_file(directory, stage)):
+            os.remove(marker_file(directory, stage))
+
+
+def mark_command(directory: str, stage: str, key: str) -> str:
+    """Returns shell command writing completion marker of a stage."""
+    return " ".join(shlex.quote(arg) for arg in (sys.executable, "-m", __name__, directory, stage, key))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="write completion marker of a module build stage")
+    parser.add_argument("directory", help="directory of stage markers")
+    parser.add_argument("stage", choices=Stages, help="completed stage")
+    parser.add_argument("key", help="hash of stage inputs")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    mark(args.directory, args.stage, args.key)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Executors running simulation processes on local or remote slots.
+
+Every simulation occupies a slot of a host while its process is running. The
+local executor starts processes on this machine, the SSH executor starts them
+on a list of hosts with per host slot limits. Hosts must share the file
+system (same paths for simulator, sources and output directories), results
+written by remote processes are therefore directly available in the output
+directory.
+
+>>> executor = SshExecutor({"simhost1": 4, "simhost2": 2})
+>>> with executor.slot() as host:
+...     process = host.popen(["vsim", "-c", "-do", "run.do"], stdout=logfile)
+
+"""
+
+import contextlib
+import os
+import shlex
+import subprocess
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+from . import utils
+
+__all__ = ["ProcessGroup", "RemoteProcess", "Host", "LocalExecutor", "SshExecutor", "parse_hosts"]
+
+logger = utils.get_colored_logger(__name__)
+
+DefaultSshCommand: List[str] = ["ssh", "-o", "BatchMode=yes"]
+"""Command used to run commands on remote hosts."""
+
+RemoteSignalTimeout: float = 30.0
+"""Timeout in seconds of signalling a remote process over SSH."""
+
+
+def parse_hosts(specs: List[str]) -> Dict[str, int]:
+    """Returns mapping of host name to number of slots from a list of
+    `host[:slots]` specifications (default is one slot per host).
+
+    >>> parse_hosts(["simhost1:4", "simhost2"])
+    {'simhost1': 4, 'simhost2': 1}
+    """
+    hosts: Dict[str, int] = {}
+    for spec in specs:
+        name, _, slots = spec.partition(":")
+        if not name:
+            raise ValueError(f"not a valid host: '{spec}'")
+        hosts[name] = hosts.get(name, 0) + (utils.count_t(slots) if slots else 1)
+    return hosts
+
+
+class ProcessGroup(subprocess.Popen):
+    """Process started in a new session, signals (e.g. of `terminate()` and
+    `kill()`) are sent to its process group, so child processes like the
+    vsimk kernel of vsim are not left running."""
+
+    def __init__(self, args, **kwargs) -> None:
+        super().__init__(args, start_new_session=True, **kwargs)
+
+    def send_signal(self, sig: int) -> None:
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            pass  # all processes of the group finished
+
+
+def remote_shell(script: str) -> str:
+    """Returns remote command running *script* by sh in place of the login
+    shell (any login shell), keeping the process id of the login shell."""
+    return f"exec sh -c {shlex.quote(script)}"
+
+
+class RemoteProcess(ProcessGroup):
+    """SSH client running *cmd* in directory *cwd* on remote host *name*.
+
+    Without a terminal the remote command keeps running when the SSH client
+    is terminated. The remote shell therefore records its process id (which
+    is the id of the remote process group started by sshd) in a temporary
+    file, signals are sent to the remote process group over SSH before the
+    local SSH client is signalled.
+    """
+
+    def __init__(self, ssh: List[str], name: str, cmd: List[str], cwd: str, **kwargs) -> None:
+        self.ssh = ssh
+        self.name = name
+        self.pid_file = f'"${{TMPDIR:-/tmp}}/ugt-fwtools-{uuid.uuid4().hex}.pid"'
+        command = " ".join(shlex.quote(str(arg)) for arg in cmd)
+        script = f"trap 'rm -f {self.pid_file}' EXIT; trap 'exit 143' TERM; cd {shlex.quote(cwd)} && echo $$ > {self.pid_file} && {command}"
+        super().__init__(ssh + [name, remote_shell(script)], **kwargs)
+
+    def send_signal(self, sig: int) -> None:
+        script = f"test -f {self.pid_file} && kill -{int(sig)} -$(cat {self.pid_file})"
+        try:
+            subprocess.run(self.ssh + [self.name, remote_shell(script)], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=RemoteSignalTimeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("timeout signalling process on host %s", self.name)
+        super().send_signal(sig)
+
+
+class Host:
+    """Host running processes, on the local machine unless *ssh* (command
+    prefix running a command on a remote host) is given."""
+
+    def __init__(self, name: str, ssh: Optional[List[str]] = None) -> None:
+        self.name = name
+        self.ssh = ssh
+
+    def popen(self, cmd: List[str], cwd: Optional[str] = None, **kwargs) -> subprocess.Popen:
+        """Starts command in a new process group, returns process handle (of
+        the SSH client for remote hosts, signalling the remote processes)."""
+        if self.ssh is None:
+            return ProcessGroup(cmd, cwd=cwd, **kwargs)
+        return RemoteProcess(self.ssh, self.name, cmd, cwd or os.getcwd(), **kwargs)
+
+
+class LocalExecutor:
+    """Runs processes on the local machine, limited to *slots* concurrent
+    processes if given."""
+
+    def __init__(self, slots: Optional[int] = None) -> None:
+        self.slots = slots
+        self.host = Host("localhost")
+        self._semaphore = threading.BoundedSemaphore(slots) if slots else None
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[Host]:
+        """Context occupying a slot, returns the host to run a process on."""
+        if self._semaphore is None:
+            yield self.host
+            return
+        with self._semaphore:
+            yield self.host
+
+
+class SshExecutor:
+    """Runs processes on remote *hosts* (mapping host name to number of slots)
+    using command *ssh*, hosts with most free slots are used first."""
+
+    def __init__(self, hosts: Dict[str, int], ssh: Optional[List[str]] = None) -> None:
+        if not hosts:
+            raise RuntimeError("no hosts given for remote execution")
+        ssh = list(ssh or DefaultSshCommand)
+        self.hosts = {name: Host(name, ssh) for name in hosts}
+        self.free = dict(hosts)
+        self.slots = sum(hosts.values())
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[Host]:
+        """Context occupying a slot, waits until a slot of any host is free
+        and returns the host to run a process on."""
+        with self._condition:
+            self._condition.wait_for(lambda: any(self.free.values()))
+            name = max(self.free, key=lambda name: self.free[name])
+            self.free[name] -= 1
+        logger.debug("occupied slot of host %s", name)
+        try:
+            yield self.hosts[name]
+        finally:
+            with self._condition:
+                self.free[name] += 1
+                self._condition.notify()
@@ -0,0 +1,116 @@
+"""Wait for creation of files without busy polling.
+
+On Linux the kernel inotify interface (accessed using ctypes) wakes up the
+waiting thread the moment a file is created in the watched directory. On
+other platforms, or if inotify is not available, it falls back to polling
+with increasing intervals.
+
+>>> wait_for_file("running.lock", timeout=60.0)
+True
+>>> wait_for_file("results.json", timeout=60.0, abort=lambda: process.poll() is not None)
+False
+
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from typing import Any, Callable, Optional
+
+__all__ = ["wait_for_file", "inotify_available"]
+
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+
+AbortInterval: float = 0.250
+"""Interval in seconds to check the abort condition while waiting for events."""
+
+PollInterval: float = 0.010
+"""Initial polling interval in seconds, doubled up to *AbortInterval*."""
+
+_libc: Any = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc
+
+
+def inotify_available() -> bool:
+    """Returns True if inotify can be used on this platform."""
+    return bool(_load_libc())
+
+
+def _remaining(t0: float, timeout: Optional[float]) -> float:
+    if timeout is None:
+        return AbortInterval
+    return min(AbortInterval, max(0.0, timeout - (time.monotonic() - t0)))
+
+
+def _timeout_exceeded(t0: float, timeout: Optional[float]) -> bool:
+    return timeout is not None and time.monotonic() - t0 > timeout
+
+
+def _wait_inotify(filename: str, timeout: Optional[float], abort: Optional[Callable[[], bool]]) -> Optional[bool]:
+    libc = _load_libc()
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None  # fall back to polling
+    try:
+        dirname = os.path.dirname(os.path.abspath(filename))
+        wd = libc.inotify_add_watch(fd, os.fsencode(dirname), IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE)
+        if wd < 0:
+            return None  # fall back to polling
+        t0 = time.monotonic()
+        # Watch is set up before first check, no creation event can be missed
+        while not os.path.exists(filename):
+            if abort is not None and abort():
+                return False
+            if _timeout_exceeded(t0, timeout):
+                raise RuntimeError(f"Timeout waiting for creation of file: {filename!r}")
+            readable, _, _ = select.select([fd], [], [], _remaining(t0, timeout))
+            if readable:
+                try:
+                    os.read(fd, 4096)  # drain events, content is not of interest
+                except BlockingIOError:
+                    pass
+        return True
+    finally:
+        os.close(fd)
+
+
+def _wait_polling(filename: str, timeout: Optional[float], abort: Optional[Callable[[], bool]]) -> bool:
+    t0 = time.monotonic()
+    interval = PollInterval
+    while not os.path.exists(filename):
+        if abort is not None and abort():
+            return False
+        if _timeout_exceeded(t0, timeout):
+            raise RuntimeError(f"Timeout waiting for creation of file: {filename!r}")
+        time.sleep(min(interval, _remaining(t0, timeout)))
+        interval = min(interval * 2, AbortInterval)
+    return True
+
+
+def wait_for_file(filename: str, timeout: Optional[float] = None, abort: Optional[Callable[[], bool]] = None, use_inotify: bool = True) -> bool:
+    """Wait until *filename* exists. Returns True if the file exists or False
+    if waiting was stopped because callable *abort* returned True. Raises a
+    RuntimeError if the file was not created within *timeout* seconds.
+    """
+    if use_inotify and inotify_available():
+        result = _wait_inotify(filename, timeout, abort)
+        if result is not None:
+            return result
+    return _wait_polling(filename, timeout, abort)
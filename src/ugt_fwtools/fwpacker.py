@@ -5,6 +5,7 @@ import shutil
 import tempfile
 import tarfile
 
+from . import buildreuse
 from . import utils
 
 logger = utils.get_colored_logger(__name__)
@@ -39,6 +40,7 @@ def main():
     board = config.get("device", "alias")
     buildarea = os.path.dirname(args.config)  # relative to build config
     menu_modules = int(config.get("menu", "modules"))
+    source_builds = buildreuse.source_builds(config)  # modules reused from previous builds
     timestamp = utils.timestamp()
 
     # Definitions for name of IPBB "proj" directory
@@ -59,6 +61,8 @@ def main():
     # Check modules
     for i in range(menu_modules):
         logger.info("collecting data from module %s", i)
+        if i in source_builds:
+            logger.warning("module %s reused, bitfile contains build version and timestamp of build %s", i, source_builds[i])
         module_dir = f"module_{i}"
 
         proj_dir = os.path.join("proj", module_dir)
@@ -0,0 +1,143 @@
+"""Local cache of bare git mirrors for firmware repositories.
+
+Repositories are mirrored once (`git clone --mirror`) into a cache directory
+and updated by `git fetch` only if a requested branch is older than the fetch
+interval or a requested tag is not mirrored yet. Working copies are cloned
+from the local mirror, so a known tag needs no network transfer and works
+fully offline.
+
+>>> mirrors = MirrorCache("~/.cache/ugt-fwtools/git")
+>>> mirrors.clone("https://github.com/ipbus/ipbus-firmware.git", "v1.4", "ipbus-firmware")
+>>> mirrors.update("https://github.com/ipbus/ipbus-firmware.git", "v1.4")
+'/home/user/.cache/ugt-fwtools/git/2f1c.../ipbus-firmware.git'
+
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import subprocess
+import time
+from typing import Iterator, List, Optional
+
+from . import utils
+
+__all__ = ["MirrorCache", "DefaultMirrorDir", "clone"]
+
+logger = utils.get_colored_logger(__name__)
+
+DefaultMirrorDir: str = os.getenv("UGT_GIT_MIRROR_DIR") or os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "ugt-fwtools", "git")
+"""Default location of the git mirror cache."""
+
+DefaultFetchInterval: float = 600.0
+"""Minimum interval in seconds between fetches of branches."""
+
+FetchStampFile: str = "ugt-fwtools-fetch"
+
+
+def git(args: List[str], cwd: Optional[str] = None, check: bool = True) -> subprocess.CompletedProcess:
+    """Run git command, raises CalledProcessError on failure if *check* is set."""
+    logger.debug("executing: git %s", " ".join(args))
+    result = subprocess.run(["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if check and result.returncode:
+        logger.error(result.stderr.decode().strip())
+        result.check_returncode()
+    return result
+
+
+def repo_name(url: str) -> str:
+    """Returns repository name of URL without `.git` suffix."""
+    name = os.path.basename(url.rstrip("/"))
+    return name[:-len(".git")] if name.endswith(".git") else name
+
+
+class MirrorCache:
+    """Bare git mirrors located in directory *path*."""
+
+    def __init__(self, path: str = DefaultMirrorDir, fetch_interval: float = DefaultFetchInterval) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.fetch_interval = fetch_interval
+
+    def mirror_path(self, url: str) -> str:
+        """Returns path of mirror for URL, the directory name keeps the
+        repository name (tools like IPBB derive project names from it)."""
+        digest = hashlib.sha1(url.encode()).hexdigest()[:16]
+        return os.path.join(self.path, digest, f"{repo_name(url)}.git")
+
+    @contextlib.contextmanager
+    def locked(self, url: str) -> Iterator[None]:
+        """Context holding an exclusive lock on the mirror of URL."""
+        lock_file = os.path.join(os.path.dirname(self.mirror_path(url)), "lock")
+        os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+        with open(lock_file, "w") as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def has_ref(self, mirror: str, ref: str) -> bool:
+        """Returns True if *ref* resolves to a commit in the mirror."""
+        return git(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"], cwd=mirror, check=False).returncode == 0
+
+    def is_tag(self, mirror: str, ref: str) -> bool:
+        """Returns True if *ref* is a tag in the mirror."""
+        return git(["show-ref", "--verify", "--quiet", f"refs/tags/{ref}"], cwd=mirror, check=False).returncode == 0
+
+    def last_fetch(self, mirror: str) -> float:
+        stamp = os.path.join(mirror, FetchStampFile)
+        return os.path.getmtime(stamp) if os.path.exists(stamp) else 0.0
+
+    def fetch(self, mirror: str) -> None:
+        git(["fetch", "--prune", "--tags", "origin"], cwd=mirror)
+        with open(os.path.join(mirror, FetchStampFile), "w"):
+            pass
+
+    def update(self, url: str, ref: Optional[str] = None) -> str:
+        """Creates or updates mirror of URL and returns its path. A mirror is
+        fetched if *ref* is missing or is a branch older than the fetch
+        interval. If fetching fails but *ref* is already mirrored the mirror
+        is used as is (offline mode)."""
+        mirror = self.mirror_path(url)
+        with self.locked(url):
+            if not os.path.isdir(mirror):
+                logger.info("creating mirror of %s in %s ...", url, mirror)
+                git(["clone", "--mirror", url, mirror])
+                with open(os.path.join(mirror, FetchStampFile), "w"):
+                    pass
+                return mirror
+            if ref and self.has_ref(mirror, ref):
+                if self.is_tag(mirror, ref):
+                    return mirror  # tags do not move
+                if time.time() - self.last_fetch(mirror) < self.fetch_interval:
+                    return mirror
+            logger.info("fetching %s into mirror %s ...", url, mirror)
+            try:
+                self.fetch(mirror)
+            except subprocess.CalledProcessError:
+                if ref and self.has_ref(mirror, ref):
+                    logger.warning("failed to fetch %s, using mirrored %r (offline)", url, ref)
+                else:
+                    raise
+        return mirror
+
+    def clone(self, url: str, ref: str, dest: str) -> None:
+        """Clones *ref* of URL from its local mirror into *dest*, the clone
+        borrows objects from the mirror and its origin is set to URL."""
+        mirror = self.update(url, ref)
+        logger.info("cloning %s (%s) from mirror %s ...", url, ref, mirror)
+        git(["clone", "--shared", "-b", ref, mirror, dest])
+        self.set_origin(dest, url)
+
+    def set_origin(self, repo: str, url: str) -> None:
+        """Points origin of a repository cloned from a mirror to URL."""
+        git(["remote", "set-url", "origin", url], cwd=repo)
+
+
+def clone(url: str, ref: str, dest: str, mirrors: Optional[MirrorCache] = None) -> None:
+    """Clones *ref* of URL into *dest*, from local mirror cache *mirrors* if given."""
+    if mirrors:
+        mirrors.clone(url, ref, dest)
+    else:
+        subprocess.run(["git", "clone", url, "-b", ref, dest]).check_returncode()
@@ -0,0 +1,181 @@
+"""Live progress monitor for running module simulations.
+
+The simulator output of every module is written to a log file. The monitor
+tails these logs incrementally (reading only content appended since the last
+poll), extracts the current phase (compile, load, run) and the last reported
+BX or simulation time, and periodically logs one aggregated progress line with
+per-module throughput (BX/s) and ETA.
+
+>>> with ProgressMonitor([ModuleProgress("module_0", "module_0/results_module_0.log", 3564)]):
+...     run_simulations()
+
+"""
+
+import re
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from . import utils
+
+__all__ = ["LogTail", "ModuleProgress", "ProgressMonitor", "count_lines"]
+
+logger = utils.get_colored_logger(__name__)
+
+BxPeriodNs: float = 25.0
+"""LHC bunch crossing period in ns, converts simulation time to BX."""
+
+DefaultInterval: float = 10.0
+"""Default interval in seconds between progress lines."""
+
+CompilePattern = re.compile(r"^#?\s*(?:-- Compiling|-- Loading (?:package|entity|architecture)|vcom|vlog)\b")
+LoadPattern = re.compile(r"^#?\s*(?:vsim\b|Loading\s)")
+BxPattern = re.compile(r"\bbx(?:[-_ ]?nr)?\s*[=:]\s*(\d+)", re.IGNORECASE)
+TimePattern = re.compile(r"\bTime:\s*(\d+(?:\.\d+)?)\s*(fs|ps|ns|us|ms|sec|s)\b")
+
+TimeUnits = {"fs": 1e-6, "ps": 1e-3, "ns": 1.0, "us": 1e3, "ms": 1e6, "s": 1e9, "sec": 1e9}
+"""Conversion factors of simulation time units to ns."""
+
+
+def count_lines(filename: str) -> int:
+    """Returns number of lines of a file."""
+    count = 0
+    with open(filename, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+    return count
+
+
+class LogTail:
+    """Incremental reader of a growing log file, every call of `read` returns
+    only complete lines appended since the previous call."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.offset = 0
+        self.partial = ""
+
+    def read(self) -> List[str]:
+        try:
+            with open(self.filename, "rt", errors="replace") as fp:
+                fp.seek(0, 2)
+                if fp.tell() < self.offset:  # truncated, start over
+                    self.offset = 0
+                    self.partial = ""
+                fp.seek(self.offset)
+                data = fp.read()
+                self.offset = fp.tell()
+        except FileNotFoundError:
+            return []
+        lines = (self.partial + data).split("\n")
+        self.partial = lines.pop()
+        return lines
+
+
+class ModuleProgress:
+    """Progress of a single module simulation of *total_bx* bunch crossings
+    writing its output to *log_file*."""
+
+    def __init__(self, name: str, log_file: str, total_bx: int = 0) -> None:
+        self.name = name
+        self.tail = LogTail(log_file)
+        self.total_bx = total_bx
+        self.phase = "queued"
+        self.bx = 0
+        self.t_run: Optional[float] = None  # time of first BX report
+        self.bx_run = 0  # BX at first BX report
+
+    def update(self, now: Optional[float] = None) -> None:
+        """Reads lines appended to the log and updates phase and BX."""
+        now = time.monotonic() if now is None else now
+        bx = None
+        for line in self.tail.read():
+            match = BxPattern.search(line)
+            if match:
+                bx = int(match.group(1))
+                continue
+            match = TimePattern.search(line)
+            if match:
+                bx = int(float(match.group(1)) * TimeUnits[match.group(2)] / BxPeriodNs)
+                continue
+            if self.phase in ("queued", "compile") and CompilePattern.match(line):
+                self.phase = "compile"
+            elif self.phase != "run" and LoadPattern.match(line):
+                self.phase = "load"
+        if bx is not None and bx >= self.bx:
+            if self.t_run is None:
+                self.t_run, self.bx_run = now, bx
+            self.phase = "run"
+            self.bx = bx
+
+    def finish(self, phase: str = "done") -> None:
+        self.phase = phase
+        if phase == "done" and self.total_bx:
+            self.bx = self.total_bx
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Returns throughput in BX/s since the first BX report."""
+        now = time.monotonic() if now is None else now
+        if self.t_run is None or now <= self.t_run:
+            return 0.0
+        return (self.bx - self.bx_run) / (now - self.t_run)
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """Returns estimated remaining run time in seconds, None if unknown."""
+        rate = self.rate(now)
+        if not rate or not self.total_bx:
+            return None
+        return max(0, self.total_bx - self.bx) / rate
+
+    def format(self, now: Optional[float] = None) -> str:
+        if self.phase != "run":
+            return f"{self.name} {self.phase}"
+        text = f"{self.name} {self.bx}"
+        if self.total_bx:
+            text += "/{} ({:.0f}%)".format(self.total_bx, 100.0 * min(self.bx, self.total_bx) / self.total_bx)
+        text += " {:.0f} BX/s".format(self.rate(now))
+        eta = self.eta(now)
+        if eta is not None:
+            text += " ETA " + utils.format_duration(eta)
+        return text
+
+
+class ProgressMonitor:
+    """Background thread logging the aggregated progress of *modules* every
+    *interval* seconds."""
+
+    def __init__(self, modules: Iterable[ModuleProgress], interval: float = DefaultInterval) -> None:
+        self.modules = list(modules)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ProgressMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def progress_line(self, now: Optional[float] = None) -> str:
+        """Updates all modules and returns the aggregated progress line."""
+        now = time.monotonic() if now is None else now
+        for module in self.modules:
+            if module.phase not in ("done", "failed"):
+                module.update(now)
+        return "progress: " + " | ".join(module.format(now) for module in self.modules)
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            logger.info(self.progress_line())
+
+    def start(self) -> None:
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="progress", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
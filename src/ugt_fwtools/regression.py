@@ -0,0 +1,118 @@
+"""Consolidated report of multi-menu regression sweeps.
+
+A regression sweep simulates several menus (each with one or more test vector
+files) against the same firmware. Every simulated pair of menu and test vector
+file yields one result, all results are written to a single text report and
+a JSON file for further processing.
+
+>>> entries = read_sweep_list("regression.txt")
+>>> write_report(results, "regression.txt", "regression.json")
+
+"""
+
+import json
+import shlex
+from typing import Dict, IO, List, NamedTuple, Tuple
+
+__all__ = ["SweepResult", "parse_sweep_list", "read_sweep_list", "make_result", "make_error_result", "write_report"]
+
+StatusPassed: str = "PASS"
+"""Status of a simulation without mismatching trigger counts."""
+
+StatusFailed: str = "FAIL"
+"""Status of a simulation with mismatching trigger counts."""
+
+StatusError: str = "ERROR"
+"""Status of a simulation which did not complete."""
+
+
+class SweepResult(NamedTuple):
+    """Result of the simulation of *menu* with test vector file *testvector*."""
+    menu: str
+    testvector: str
+    status: str
+    n_ok: int
+    n_ignored: int
+    n_errors: int
+    failed_algorithms: List[str]
+    results_dir: str
+
+
+def parse_sweep_list(fp: IO[str]) -> List[Tuple[str, List[str]]]:
+    """Returns list of tuples of menu XML path and test vector paths from a
+    sweep list, every line lists a menu XML followed by its test vector
+    files. Empty lines and comments starting with `#` are ignored.
+
+    >>> parse_sweep_list(io.StringIO("L1Menu_A.xml tv_1.txt tv_2.txt\\n"))
+    [('L1Menu_A.xml', ['tv_1.txt', 'tv_2.txt'])]
+    """
+    entries = []
+    for lineno, line in enumerate(fp, start=1):
+        tokens = shlex.split(line, comments=True)
+        if not tokens:
+            continue
+        if len(tokens) < 2:
+            raise RuntimeError(f"missing test vector file for menu in line {lineno}: {line.strip()!r}")
+        entries.append((tokens[0], tokens[1:]))
+    return entries
+
+
+def read_sweep_list(filename: str) -> List[Tuple[str, List[str]]]:
+    """Returns entries of sweep list file, see `parse_sweep_list`."""
+    with open(filename, "rt") as fp:
+        return parse_sweep_list(fp)
+
+
+def make_result(menu: str, testvector: str, rows: Dict[int, Tuple[int, int, str]], names: Dict[int, str], success: bool, results_dir: str) -> SweepResult:
+    """Returns result of a simulation from summary *rows* (mapping algorithm
+    index to test vector count, simulation count and status), *names* maps
+    algorithm indices to names."""
+    statuses = [status for _, _, status in rows.values()]
+    failed = [names.get(index, str(index)) for index, (_, _, status) in sorted(rows.items()) if status == "ERROR"]
+    return SweepResult(
+        menu=menu,
+        testvector=testvector,
+        status=StatusPassed if success else StatusFailed,
+        n_ok=statuses.count("OK"),
+        n_ignored=statuses.count("IGNORE"),
+        n_errors=statuses.count("ERROR"),
+        failed_algorithms=failed,
+        results_dir=results_dir,
+    )
+
+
+def make_error_result(menu: str, testvector: str, results_dir: str) -> SweepResult:
+    """Returns result of a simulation which did not complete."""
+    return SweepResult(menu, testvector, StatusError, 0, 0, 0, [], results_dir)
+
+
+def format_report(results: List[SweepResult]) -> List[str]:
+    """Returns lines of the text report."""
+    width_menu = max([len("Menu")] + [len(result.menu) for result in results])
+    width_tv = max([len("Test vectors")] + [len(result.testvector) for result in results])
+    row = "{:<%d}  {:<%d}  {:<6} {:>6} {:>6} {:>6}" % (width_menu, width_tv)
+    lines = [row.format("Menu", "Test vectors", "Status", "OK", "IGNORE", "ERROR")]
+    lines.append("-" * len(lines[0]))
+    for result in results:
+        lines.append(row.format(result.menu, result.testvector, result.status, result.n_ok, result.n_ignored, result.n_errors))
+    lines.append("-" * len(lines[0]))
+    n_passed = sum(1 for result in results if result.status == StatusPassed)
+    lines.append(f"{n_passed} of {len(results)} simulations passed")
+    for result in results:
+        if result.status == StatusFailed:
+            lines.append("")
+            lines.append(f"{result.menu} ({result.testvector}) failed algorithms:")
+            lines.extend(f"  {name}" for name in result.failed_algorithms)
+        elif result.status == StatusError:
+            lines.append("")
+            lines.append(f"{result.menu} ({result.testvector}) simulation did not complete, see {result.results_dir}")
+    return lines
+
+
+def write_report(results: List[SweepResult], report_txt: str, report_json: str) -> None:
+    """Writes text report and JSON report of all results."""
+    with open(report_txt, "wt") as fp:
+        for line in format_report(results):
+            fp.write(line + "\n")
+    with open(report_json, "wt") as fp:
+        json.dump({"results": [result._asdict() for result in results]}, fp, indent=2)
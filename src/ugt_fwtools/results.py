@@ -0,0 +1,170 @@
+"""Evaluation of module simulation results.
+
+The testbench writes a JSON file listing every BX with mismatching algorithm
+or FinOR results. The error records are streamed from the file (not loaded as
+a whole) and only the set bits of `algos_sim ^ algos_tv` are decoded, so the
+processing time is proportional to the number of mismatching bits.
+
+>>> names = {algorithm.index: algorithm.name for algorithm in menu.algorithms}
+>>> write_results("results_module_0.json", "results_module_0.txt", names)
+3
+
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, IO, Iterator, Optional, Tuple
+
+from .testvector import MaxAlgorithms
+
+__all__ = ["iter_records", "mismatched_bits", "write_results", "ErrorWatch"]
+
+ChunkSize: int = 1 << 16
+"""Size of chunks read from results files."""
+
+Separator: str = "#" * 80
+
+ErrorRecordPattern = re.compile(r'"bx-nr"\s*:\s*"?(\d+)')
+"""Matches an error record of a results JSON file, group 1 is the BX number."""
+
+LogErrorPattern = re.compile(r"^#? ?\*\* (?:Error|Fatal)\b", re.MULTILINE)
+"""Matches an error reported by the simulator (e.g. a failed assertion)."""
+
+_whitespace = re.compile(r"[\s,]*")
+
+
+def iter_records(fp: IO[str], key: str = "errors", chunk_size: int = ChunkSize) -> Iterator[Any]:
+    """Yields the elements of the JSON array assigned to *key* one by one,
+    reading the file in chunks. The key is expected to be used only for the
+    array of interest."""
+    decoder = json.JSONDecoder()
+    start = re.compile(r'"{}"\s*:\s*\['.format(re.escape(key)))
+    buffer = ""
+    while True:
+        match = start.search(buffer)
+        if match:
+            break
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            return  # key not present
+        buffer = buffer[-256:] + chunk  # keeps tail, key might span chunks
+    buffer = buffer[match.end():]
+    pos = 0
+    while True:
+        pos = _whitespace.match(buffer, pos).end()  # type: ignore[union-attr]
+        if pos < len(buffer):
+            if buffer[pos] == "]":
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass  # incomplete record, read next chunk
+            else:
+                yield record
+                continue
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            raise RuntimeError(f"unexpected end of JSON array {key!r} in file: {getattr(fp, 'name', fp)!r}")
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def mismatched_bits(algos_sim: int, algos_tv: int, n: int = MaxAlgorithms) -> Iterator[Tuple[int, int, int]]:
+    """Yields tuples of bit index, test vector bit and simulated bit for every
+    mismatching bit of the lower *n* bits, in ascending order.
+
+    >>> list(mismatched_bits(0b0110, 0b1100))
+    [(1, 0, 1), (3, 1, 0)]
+    """
+    diff = (algos_sim ^ algos_tv) & ((1 << n) - 1)
+    while diff:
+        lowest = diff & -diff
+        yield lowest.bit_length() - 1, int(bool(algos_tv & lowest)), int(bool(algos_sim & lowest))
+        diff ^= lowest
+
+
+def format_record(error: Dict[str, Any], names: Dict[int, str]) -> str:
+    """Returns text block describing an error record, *names* maps algorithm
+    indices to names."""
+    lines = [
+        Separator,
+        "bx-nr      = {}".format(error["bx-nr"]),
+        "algo_sim   = {}".format(error["algos_sim"]),
+        "algo_tv    = {}".format(error["algos_tv"]),
+        "fin_or_sim = {}".format(error["finor_sim"]),
+        "fin_or_tv  = {}".format(error["finor_tv"]),
+        Separator,
+    ]
+    for bit, tv, sim in mismatched_bits(int(error["algos_sim"], 16), int(error["algos_tv"], 16)):
+        lines.append("")
+        if bit in names:
+            lines.append("algo {} ({})".format(bit, names[bit]))
+            lines.append("     tv = {} sim = {}".format(tv, sim))
+        else:
+            lines.append(f"algo with index: {bit} not found in menu")
+        lines.append("")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_results(results_json: str, results_txt: str, names: Dict[int, str]) -> int:
+    """Writes the mismatching algorithms of every error record of a results
+    JSON file to a text file, returns the number of error records."""
+    count = 0
+    with open(results_json, "rt") as src, open(results_txt, "wt", buffering=1 << 20) as dest:
+        for error in iter_records(src, "errors"):
+            dest.write(format_record(error, names))
+            count += 1
+    return count
+
+
+class MatchCounter:
+    """Counts matches of *pattern* in a growing file, reading only content
+    appended since the previous call of `poll`. Content is scanned up to the
+    last *delimiter*, so matches are never split between reads. If given,
+    only matches accepted by callable *accept* are counted."""
+
+    def __init__(self, filename: str, pattern: "re.Pattern[str]", delimiter: str = "\n", accept: Optional[Callable[["re.Match[str]"], bool]] = None) -> None:
+        self.filename = filename
+        self.pattern = pattern
+        self.delimiter = delimiter
+        self.accept = accept
+        self.offset = 0
+        self.pending = ""
+        self.count = 0
+
+    def poll(self) -> int:
+        """Returns number of matches found so far."""
+        try:
+            with open(self.filename, "rt", errors="replace") as fp:
+                fp.seek(self.offset)
+                data = fp.read()
+                self.offset = fp.tell()
+        except FileNotFoundError:
+            return self.count
+        text = self.pending + data
+        end = text.rfind(self.delimiter) + 1
+        matches = self.pattern.finditer(text, 0, end)
+        self.count += sum(1 for match in matches if self.accept is None or self.accept(match))
+        self.pending = text[end:]
+        return self.count
+
+
+class ErrorWatch:
+    """Watches results JSON file and log of a running module simulation,
+    `poll` returns the number of mismatches reported so far (error records
+    written to the results file or errors reported in the log, whichever
+    is greater).
+
+    Mismatches of the first *warmup* BXs (of a shard) are expected and not
+    counted: error records with a lower `bx-nr` are skipped, log errors
+    carry no BX number and up to *warmup* of them are ignored.
+    """
+
+    def __init__(self, results_json: str, log_file: str, warmup: int = 0) -> None:
+        self.warmup = warmup
+        self.records = MatchCounter(results_json, ErrorRecordPattern, "}", lambda match: int(match.group(1)) >= warmup)
+        self.log_errors = MatchCounter(log_file, LogErrorPattern, "\n")
+
+    def poll(self) -> int:
+        return max(self.records.poll(), self.log_errors.poll() - self.warmup, 0)
@@ -5,8 +5,9 @@ import os
 import subprocess
 import shutil
 import sys
+from . import buildstages
 from . import utils
-from .synthesis import create_module, implement_module, show_screen_sessions
+from .synthesis import add_build_job_arguments, create_module, implement_module, implement_stage_keys, show_screen_sessions, stages_dir, submit_modules
 
 logger = utils.get_colored_logger(__name__)
 
@@ -15,6 +16,8 @@ def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("module_id", type=int, help="module ID (eg. 1)")
     parser.add_argument("filename", type=os.path.abspath, help=f"build config file (*.cfg)")
+    parser.add_argument("--resume", action="store_true", help="restart from the first stale or failed stage, keeping results of completed stages")
+    add_build_job_arguments(parser)
     return parser.parse_args()
 
 
@@ -43,6 +46,9 @@ def main() -> None:
     args.ipbb_dir = config.get("firmware", "buildarea")
     args.project_type = config.get("firmware", "type")
     args.vivado = config.get("vivado", "version")
+    args.ipbtag = config.get("firmware", "ipbtag")
+    args.mp7tag = config.get("firmware", "mp7tag")
+    args.ugttag = config.get("firmware", "ugttag")
 
     module_id = args.module_id
     module_name = f"module_{module_id}"
@@ -55,21 +61,38 @@ def main() -> None:
         logger.error("  check if Xilinx Vivado %r is installed on this machine.", args.vivado)
         raise RuntimeError("missing settings file")
 
-    if os.path.exists(module_path):
-        shutil.rmtree(module_path)
+    # Stages with inputs not changed since their completion are skipped in resume mode
+    first_stage = buildstages.Stages[0]
+    if args.resume and os.path.exists(module_path):
+        keys = implement_stage_keys(module_id, module_name, args)
+        stale_stage = buildstages.first_stale(stages_dir(module_name, args), keys)
+        if stale_stage is None:
+            logger.info("all stages of module %s are up to date, nothing to do", module_id)
+            return
+        first_stage = stale_stage
+        logger.info("resuming module %s from stage %r", module_id, first_stage)
+        buildstages.invalidate(stages_dir(module_name, args), list(keys)[list(keys).index(first_stage):])
 
-    logger.info("===========================================================================")
-    logger.info("creating IPBB project for module %s ...", module_id)
+    if first_stage == buildstages.Stages[0]:
+        if os.path.exists(module_path):
+            shutil.rmtree(module_path)
+
+        logger.info("===========================================================================")
+        logger.info("creating IPBB project for module %s ...", module_id)
 
-    create_module(module_id, module_name, args)
+        create_module(module_id, module_name, args)
 
     logger.info("===========================================================================")
-    logger.info("running IPBB project, synthesis and implementation, creating bitfile for module %s ...", module_id)
+    if args.daemon:
+        logger.info("submitting IPBB project, synthesis and implementation, creating bitfile for module %s ...", module_id)
+        submit_modules([(module_id, module_name)], args, first_stage)
+    else:
+        logger.info("running IPBB project, synthesis and implementation, creating bitfile for module %s ...", module_id)
 
-    implement_module(module_id, module_name, args)
+        implement_module(module_id, module_name, args, first_stage)
 
-    logger.info("===========================================================================")
-    show_screen_sessions()
+        logger.info("===========================================================================")
+        show_screen_sessions()
 
 
 if __name__ == "__main__":
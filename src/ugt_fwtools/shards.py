@@ -0,0 +1,129 @@
+"""Split module test vectors into BX shards simulated in parallel.
+
+The masked test vector file of a module is split into contiguous BX ranges,
+every shard file is prepended with the preceding *overlap* BX lines to warm
+up the algorithm pipeline. The results of the shard simulations are merged
+into a single results file, results of warm-up BXs are discarded.
+
+Error records are attributed to BX lines by their `bx-nr`, the test bench
+counts the BX lines of its test vector file starting from 0. Trigger counts
+of the warm-up BXs are reconstructed from the warm-up lines and the error
+records reported for them, so merged counts are exact.
+
+>>> shards = split("tv_module_0.txt", 4, 32, lambda i: f"shard_{i}/tv.txt")
+>>> merge(shards, [f"shard_{i}/results.json" for i in range(len(shards))], "results.json")
+
+"""
+
+import contextlib
+import json
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from . import results
+from . import testvector
+
+__all__ = ["Shard", "plan", "split", "merge"]
+
+DefaultOverlap: int = 32
+"""Default number of warm-up BX lines prepended to every shard."""
+
+
+class Shard(NamedTuple):
+    """BX lines *start* to *stop* (exclusive) of a test vector file written to
+    *filename*, preceded by *warmup* lines simulated for warm-up only."""
+    id: int
+    start: int
+    stop: int
+    warmup: int
+    filename: str
+
+
+def plan(n_lines: int, n_shards: int, overlap: int) -> List[Tuple[int, int, int]]:
+    """Returns list of tuples of start, stop and warm-up lines of at most
+    *n_shards* contiguous shards of almost equal size.
+
+    >>> plan(10, 3, 2)
+    [(0, 3, 0), (3, 6, 2), (6, 10, 2)]
+    """
+    if overlap < 0:
+        raise ValueError(f"not a valid shard overlap: {overlap}")
+    n_shards = max(1, min(n_shards, n_lines))
+    ranges = []
+    for i in range(n_shards):
+        start = n_lines * i // n_shards
+        stop = n_lines * (i + 1) // n_shards
+        ranges.append((start, stop, min(overlap, start)))
+    return ranges
+
+
+def split(filename: str, n_shards: int, overlap: int, make_filename: Callable[[int], str]) -> List[Shard]:
+    """Splits test vector file into *n_shards* shard files named by callable
+    *make_filename* (called with the shard id) in a single pass, returns
+    list of shards."""
+    n_lines = 0
+    with open(filename, "rt") as fp:
+        for _ in fp:
+            n_lines += 1
+    shards = [Shard(i, start, stop, warmup, make_filename(i)) for i, (start, stop, warmup) in enumerate(plan(n_lines, n_shards, overlap))]
+    with contextlib.ExitStack() as stack:
+        outputs = []
+        for shard in shards:
+            os.makedirs(os.path.dirname(os.path.abspath(shard.filename)), exist_ok=True)
+            outputs.append((shard.start - shard.warmup, shard.stop, stack.enter_context(open(shard.filename, "wt"))))
+        first = 0  # first shard not completely written
+        with open(filename, "rt") as fp:
+            for i, line in enumerate(fp):
+                while outputs[first][1] <= i:
+                    first += 1
+                for begin, end, output in outputs[first:]:
+                    if begin > i:
+                        break
+                    output.write(line)
+    return shards
+
+
+def warmup_counts(shard: Shard, errors: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+    """Returns trigger counts of the warm-up lines of a shard as simulated
+    and as expected by the test vectors, *errors* are the error records of
+    the warm-up lines."""
+    values = []
+    with open(shard.filename, "rt") as fp:
+        for _, line in zip(range(shard.warmup), fp):
+            values.append(testvector.parse_line(line)[1])
+    tv_counts = testvector.count_bits(values)
+    sim_counts = list(tv_counts)
+    for error in errors:
+        for bit, tv, sim in results.mismatched_bits(int(error["algos_sim"], 16), int(error["algos_tv"], 16)):
+            sim_counts[bit] += sim - tv
+    return sim_counts, tv_counts
+
+
+def merge(shards: List[Shard], results_files: List[str], filename: str) -> None:
+    """Merges results files of shard simulations into results file *filename*,
+    error records of warm-up lines are discarded and `bx-nr` of remaining
+    records refer to lines of the unsplit test vector file."""
+    merged: Dict[str, Any] = {}
+    counts: Dict[int, Dict[str, Any]] = {}
+    errors: List[Dict[str, Any]] = []
+    for shard, results_file in zip(shards, results_files):
+        with open(results_file, "rt") as fp:
+            data = json.load(fp)
+        if not merged:
+            merged.update(data)
+        shard_errors = data.get("errors", [])
+        warmup_errors = [error for error in shard_errors if int(error["bx-nr"]) < shard.warmup]
+        sim_warmup, tv_warmup = warmup_counts(shard, warmup_errors)
+        for entry in data.get("counts", []):
+            index = entry["algo_index"]
+            count = counts.setdefault(index, dict(entry, algo_sim=0, algo_tv=0))
+            count["algo_sim"] += entry["algo_sim"] - sim_warmup[index]
+            count["algo_tv"] += entry["algo_tv"] - tv_warmup[index]
+        for error in shard_errors:
+            bx = int(error["bx-nr"])
+            if bx >= shard.warmup:
+                errors.append(dict(error, **{"bx-nr": bx - shard.warmup + shard.start}))
+    merged["errors"] = errors
+    merged["counts"] = list(counts.values())
+    with open(filename, "wt") as fp:
+        json.dump(merged, fp, indent=2)
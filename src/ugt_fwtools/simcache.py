@@ -0,0 +1,119 @@
+"""Persistent content-addressed cache of compiled simulation libraries.
+
+Cache entries are directories named by a hash of everything the compiled
+libraries depend on (firmware tags, simulator version, modelsim.ini, compile
+commands and source contents). Least recently used entries are evicted when
+the cache exceeds its size limit.
+
+>>> cache = LibraryCache("~/.cache/ugt-fwtools/simlib", max_size=10 * 1024**3)
+>>> key = utils.make_key("v1.32.1", "v3.2.2", "v1.4", vsim_version, ini_content)
+>>> if not cache.restore(key, {"work": "work"}):
+...     compile_libraries()
+...     cache.store(key, {"work": "work"})
+
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Tuple
+
+from . import utils
+
+__all__ = ["LibraryCache"]
+
+logger = utils.get_colored_logger(__name__)
+
+DefaultCacheDir: str = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "ugt-fwtools", "simlib")
+"""Default location of the compiled library cache."""
+
+DefaultCacheSize: int = 10 * 1024 ** 3
+"""Default size limit of the compiled library cache in bytes."""
+
+EntryFile: str = "entry.json"
+
+
+def directory_size(path: str) -> int:
+    """Returns total size of files in directory tree in bytes."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            filename = os.path.join(root, name)
+            if not os.path.islink(filename):
+                size += os.path.getsize(filename)
+    return size
+
+
+class LibraryCache:
+    """Cache of compiled simulation libraries located in directory *path*,
+    limited to *max_size* bytes."""
+
+    def __init__(self, path: str = DefaultCacheDir, max_size: int = DefaultCacheSize) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_size = max_size
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def restore(self, key: str, libraries: Dict[str, str]) -> bool:
+        """Copies cached *libraries* (mapping name to destination directory)
+        to their destinations, returns False on a cache miss."""
+        entry = self.entry_path(key)
+        if not os.path.isfile(os.path.join(entry, EntryFile)):
+            return False
+        if not all(os.path.isdir(os.path.join(entry, name)) for name in libraries):
+            return False
+        for name, dest in libraries.items():
+            if os.path.isdir(dest):
+                shutil.rmtree(dest)
+            shutil.copytree(os.path.join(entry, name), dest, symlinks=True)
+        os.utime(entry)  # mark as recently used
+        logger.info("restored compiled libraries from cache entry %s", entry)
+        return True
+
+    def store(self, key: str, libraries: Dict[str, str]) -> None:
+        """Stores compiled *libraries* (mapping name to directory) in the
+        cache and evicts least recently used entries exceeding the size limit."""
+        entry = self.entry_path(key)
+        if os.path.isdir(entry):
+            os.utime(entry)
+            return
+        os.makedirs(self.path, exist_ok=True)
+        temp_entry = f"{entry}.tmp-{os.getpid()}"
+        try:
+            for name, src in libraries.items():
+                shutil.copytree(src, os.path.join(temp_entry, name), symlinks=True)
+            with open(os.path.join(temp_entry, EntryFile), "wt") as fp:
+                json.dump({"created": time.time(), "libraries": sorted(libraries)}, fp)
+            os.rename(temp_entry, entry)
+            logger.info("stored compiled libraries in cache entry %s", entry)
+        except OSError as exc:
+            logger.warning("failed to store compiled libraries in cache: %s", exc)
+        finally:
+            if os.path.isdir(temp_entry):
+                shutil.rmtree(temp_entry)
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Returns list of tuples of last access time, size and path of cache
+        entries, least recently used first."""
+        entries = []
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                entry = os.path.join(self.path, name)
+                if os.path.isfile(os.path.join(entry, EntryFile)):
+                    entries.append((os.path.getmtime(entry), directory_size(entry), entry))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache size does not
+        exceed the size limit."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            logger.info("evicting cache entry %s", entry)
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,254 @@
+"""Shared precompiled simulation library for module simulations.
+
+The rendered do-files of all modules compile the same MP7, IPbus and uGT
+sources, only a few files (VHDL snippets of the menu, testbench) differ per
+module. This module splits a rendered do-file into a shared part compiled
+only once and a module specific part.
+
+Compile commands preceding the first module specific compile command are
+module independent: VHDL compile order guarantees that they do not depend on
+any module specific design unit. These commands are moved to the shared
+do-file, library setup commands (`vlib`, `vmap`, `set`) are kept in both.
+
+The shared library is compiled once and only read by the module simulations,
+it is mapped in the `modelsim.ini` of every module. Every module compiles its
+module specific sources into its own `work` library in its own directory.
+
+>>> lines = read_do_file("module_0/gtl_fdl_wrapper.do")
+>>> shared, module = split_do_file(lines, "module_0")
+>>> map_libraries("module_0/modelsim.ini", shared_mappings(library_dirs(shared, "base_dir")))
+
+"""
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+__all__ = [
+    "read_do_file",
+    "write_do_file",
+    "split_do_file",
+    "simulation_only",
+    "is_compile_command",
+    "compile_commands",
+    "library_dirs",
+    "shared_mappings",
+    "map_libraries",
+    "search_libraries",
+    "source_files",
+]
+
+CompileCommands: Tuple[str, ...] = ("vcom", "vlog")
+"""Questa commands compiling sources into a library."""
+
+LibraryCommands: Tuple[str, ...] = ("vlib", "vmap", "vdel")
+"""Questa commands creating or mapping libraries."""
+
+ModuleSources: Tuple[str, ...] = (
+    "algo_index.vhd",
+    "algo_mapping_rop.vhd",
+    "fdl_pkg.vhd",
+    "gtl_module",
+    "ugt_constants.vhd",
+)
+"""Sources which differ per module (matched by file name prefix)."""
+
+SourceSuffixes: Tuple[str, ...] = (".vhd", ".vhdl", ".v", ".sv")
+"""File name suffixes of compiled sources."""
+
+PrecompiledComment: str = "# precompiled in shared library: "
+
+CompiledComment: str = "# compiled by previous run: "
+
+SharedLibrary: str = "ugt_shared"
+"""Logical name of the shared `work` library in the modelsim.ini of the modules."""
+
+
+def comment_out(line: str, comment: str = PrecompiledComment) -> str:
+    """Returns logical line commented out (every physical line)."""
+    return "".join(comment + physical.lstrip() for physical in line.splitlines(True))
+
+
+def command_name(line: str) -> str:
+    """Returns name of do-file command, empty string for comments or empty lines."""
+    tokens = line.split()
+    if not tokens or tokens[0].startswith("#"):
+        return ""
+    return tokens[0]
+
+
+def is_compile_command(line: str) -> bool:
+    """Returns True if line is a compile command."""
+    return command_name(line) in CompileCommands
+
+
+def compile_commands(lines: List[str]) -> List[str]:
+    """Returns compile commands of logical lines."""
+    return [line for line in lines if is_compile_command(line)]
+
+
+def read_do_file(filename: str) -> List[str]:
+    """Returns logical lines of a do-file, lines continued by a trailing
+    backslash are joined (keeping the line breaks)."""
+    lines: List[str] = []
+    with open(filename, "rt") as fp:
+        continued = ""
+        for line in fp:
+            if line.rstrip("\n").endswith("\\"):
+                continued += line
+                continue
+            lines.append(continued + line)
+            continued = ""
+        if continued:
+            lines.append(continued)
+    return lines
+
+
+def write_do_file(filename: str, lines: List[str]) -> None:
+    """Writes logical lines to do-file."""
+    with open(filename, "wt") as fp:
+        fp.writelines(lines)
+
+
+def read_variables(lines: List[str]) -> Dict[str, str]:
+    """Returns Tcl variables assigned by `set <name> <value>` commands."""
+    variables: Dict[str, str] = {}
+    for line in lines:
+        tokens = line.split()
+        if command_name(line) == "set" and len(tokens) >= 3:
+            variables[tokens[1]] = tokens[2].strip("{}\"")
+    return variables
+
+
+def expand_variables(text: str, variables: Dict[str, str]) -> str:
+    """Returns text with Tcl variables `$name` and `${name}` substituted."""
+    def substitute(match):
+        name = match.group(1) or match.group(2)
+        return variables.get(name, match.group(0))
+    return re.sub(r"\$\{(\w+)\}|\$(\w+)", substitute, text)
+
+
+def library_dirs(lines: List[str], directory: str) -> Dict[str, str]:
+    """Returns libraries created by `vlib` commands of a do-file run in
+    *directory*, mapping library directory name to its absolute path."""
+    variables = read_variables(lines)
+    libraries: Dict[str, str] = {}
+    for line in lines:
+        tokens = expand_variables(line, variables).split()
+        if command_name(line) == "vlib" and len(tokens) >= 2:
+            path = os.path.abspath(os.path.join(directory, tokens[-1].strip("{}\"")))
+            libraries[os.path.basename(path)] = path
+    return libraries
+
+
+def shared_mappings(libraries: Dict[str, str]) -> Dict[str, str]:
+    """Returns logical names of shared libraries (mapping library directory
+    name to absolute path) as mapped for the modules, the shared `work`
+    library is mapped as `SharedLibrary` as every module has its own `work`."""
+    return {SharedLibrary if name == "work" else name: path for name, path in libraries.items()}
+
+
+def search_libraries(lines: List[str], names: List[str]) -> List[str]:
+    """Returns logical lines of a do-file with libraries *names* searched by
+    its `vsim` commands (option `-L`) for design units not found in `work`."""
+    options = "".join(f" -L {name}" for name in names)
+    return [re.sub(r"^(\s*vsim)\b", lambda match: match.group(1) + options, line) if command_name(line) == "vsim" else line for line in lines]
+
+
+def map_libraries(ini_file: str, mappings: Dict[str, str]) -> None:
+    """Maps logical library names to library directories in section
+    `[Library]` of a modelsim.ini, replacing existing mappings of these names."""
+    with open(ini_file, "rt") as fp:
+        lines = fp.readlines()
+    names = {name.lower() for name in mappings}
+    entries = [f"{name} = {path}\n" for name, path in mappings.items()]
+    result: List[str] = []
+    section = ""
+    for line in lines:
+        text = line.strip()
+        if text.startswith("["):
+            section = text.lower()
+            result.append(line)
+            if section == "[library]":
+                result.extend(entries)
+                entries = []
+            continue
+        if section == "[library]" and text.split("=", 1)[0].strip().lower() in names:
+            continue  # replaced mapping
+        result.append(line)
+    if entries:
+        if result and not result[-1].endswith("\n"):
+            result[-1] += "\n"
+        if result and result[-1].strip():
+            result.append("\n")
+        result.append("[Library]\n")
+        result.extend(entries)
+    with open(ini_file, "wt") as fp:
+        fp.writelines(result)
+
+
+def source_files(lines: List[str]) -> List[str]:
+    """Returns absolute paths of VHDL and Verilog sources of compile commands."""
+    variables = read_variables(lines)
+    sources: List[str] = []
+    for line in compile_commands(lines):
+        for token in expand_variables(line, variables).split():
+            token = token.strip("{}\"")
+            if token.endswith(SourceSuffixes):
+                sources.append(os.path.abspath(token))
+    return sources
+
+
+def is_module_specific(line: str, module_dir: str, variables: Dict[str, str]) -> bool:
+    """Returns True if a command refers to module specific paths or sources."""
+    module_dir = os.path.abspath(module_dir)
+    if module_dir in line:
+        return True
+    for name, value in variables.items():
+        path = os.path.abspath(value)
+        if (path == module_dir or path.startswith(module_dir + os.sep)) and re.search(r"\$\{?" + re.escape(name) + r"\b", line):
+            return True
+    for token in line.split():
+        basename = os.path.basename(token.strip("{}\""))
+        if basename.startswith(ModuleSources):
+            return True
+    return False
+
+
+def simulation_only(lines: List[str]) -> List[str]:
+    """Returns logical lines of a do-file with compile and library deletion
+    commands commented out, running it again only simulates the already
+    compiled design."""
+    return [comment_out(line, CompiledComment) if is_compile_command(line) or command_name(line) == "vdel" else line for line in lines]
+
+
+def split_do_file(lines: List[str], module_dir: str) -> Tuple[List[str], List[str]]:
+    """Split logical lines of a module do-file into a shared do-file compiling
+    all module independent sources and the module do-file with these compile
+    commands commented out. Returns tuple of empty shared do-file and
+    unmodified lines if no command can be shared or the library setup refers
+    to module specific paths.
+    """
+    variables = read_variables(lines)
+    shared: List[str] = []
+    module: List[str] = []
+    n_shared = 0
+    for i, line in enumerate(lines):
+        if is_compile_command(line):
+            if is_module_specific(line, module_dir, variables):
+                module.extend(lines[i:])
+                break
+            shared.append(line)
+            module.append(comment_out(line))
+            n_shared += 1
+        else:
+            if command_name(line) in LibraryCommands and is_module_specific(line, module_dir, variables):
+                return [], list(lines)  # module specific libraries, nothing to share
+            shared.append(line)
+            module.append(line)
+    if not n_shared:
+        return [], list(lines)
+    # Setup commands following the last shared compile command are not required
+    while shared and not is_compile_command(shared[-1]):
+        shared.pop()
+    return shared, module
@@ -1,23 +1,31 @@
 import argparse
+import concurrent.futures
 import datetime
 import json
 import logging
 import os
 import re
+import shlex
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-import urllib.request
-import urllib.parse
-import urllib.error
 
-from threading import Thread
-from typing import List
 
+from . import executors
+from . import filewatch
+from . import gitcache
+from . import progress
+from . import simcache
+from . import results
+from . import shards
+from . import simlib
+from . import summary
+from . import testvector
 from . import utils
-from .xmlmenu import XmlMenu
+from .xmlmenu import XmlMenu, DefaultCacheDir as MenuCacheDir
 
 logger = utils.get_colored_logger(__name__)
 
@@ -29,6 +37,8 @@ IGNORED_ALGOS = [
 ]
 
 TIMEOUT_SEC: float = 60.0
+WATCH_INTERVAL_SEC: float = 1.0  # interval checking results of running simulations
+TERMINATE_TIMEOUT_SEC: float = 10.0
 
 # terminal size, default for non-tty
 if sys.stdout.isatty():
@@ -49,6 +59,9 @@ DefaultQuestaSimLibsPath = os.getenv("UGT_QUESTASIM_LIBS_PATH")
 if not DefaultQuestaSimLibsPath:
     raise RuntimeError("UGT_QUESTASIM_LIBS_PATH is not defined.")
 
+DefaultSimCacheDir: str = os.getenv("UGT_SIM_CACHE_DIR", simcache.DefaultCacheDir)
+"""Default directory of compiled library cache."""
+
 DefaultIpbusUrl: str = "https://github.com/ipbus/ipbus-firmware.git"
 """Default URL IPB FW repo."""
 
@@ -79,7 +92,14 @@ DO_FILE = "gtl_fdl_wrapper.do"
 TB_FILE_TPL = os.path.join("testbench", "templates", "gtl_fdl_wrapper_tb_tpl.vhd")
 TB_FILE = os.path.join("testbench", "gtl_fdl_wrapper_tb.vhd")
 
+SHARED_DO_FILE = "shared_lib.do"
+SHARED_LOG_FILE = "shared_lib.log"
+
 INI_FILE = "modelsim.ini"
+
+SUMMARY_JSON_FILE = "summary.json"
+SUMMARY_CSV_FILE = "summary.csv"
+TIMINGS_CSV_FILE = "timings.csv"
 DO_FILE_TPL = os.path.join("scripts", "templates", "gtl_fdl_wrapper_tpl_questa.do")
 
 max_algorithms: int = 512  # numbers of bits
@@ -99,87 +119,230 @@ def render_template(src, dst, args):
         dst.write(content)
 
 
-def write_testvector(mask, testvectorfile, new_testvector):
-    """uses mask of the module, testvector file and the path of the new
-    testvector file where the masked testvectors are stored"""
-    with open(testvectorfile, "rt") as tvf, open(new_testvector, "wt") as opf:
-        for line in tvf:
-            colums = line.strip().split()
-            mask_trigger = int(colums[-2], 16) & mask
-            colums[-2] = format(mask_trigger, "0128x")
-            colums[-1] = "1" if mask_trigger else "0"
-            opf.write(" ".join(colums))
-            opf.write("\n")
-
-
-def trigger_list(testvectorfile):
-    """makes a list of all triggers in testvectorfile eg. [1,0,0,1,0,1,0,0,1,1,1]"""
-    out_list = [0] * max_algorithms
-    with open(testvectorfile) as tvf:
-        for line in tvf:
-            colums = line.strip().split()
-            trigger_list = bitfield(int(colums[-2], 16), max_algorithms)
-            out_list = [x + y for x, y in zip(out_list, trigger_list)]
-    return out_list
-
-
-def bitfield(i: int, n: int) -> List[int]:
-    """converts intager to a list of 'n' bits
-    >>> bitfield(10, 4)
-    [0, 1, 0, 1]
-    """
-    return [int(digit) for digit in "{0:0{1}b}".format(i, n)][::-1]
-
-
-def run_vsim(vsim, module, msgmode, ini_file):
-    """uses class module, arg msgmode and ini file path to start the simulation"""
+def terminate_process(process, timeout=TERMINATE_TIMEOUT_SEC):
+    """terminates process group of *process* (started by executors.Host.popen), kills it
+    if not finished within *timeout* seconds"""
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def wait_vsim(process, module, max_errors=None, abort=None):
+    """waits for vsim process to finish and returns its return code, the process is
+    terminated as soon as *max_errors* mismatches are reported (setting event *abort*)
+    or event *abort* is set by another simulation"""
+    if not max_errors and abort is None:
+        return process.wait()
+    # mismatches of warm-up BXs of a shard are discarded when merging results
+    warmup = module.shard.warmup if isinstance(module, ModuleShard) else 0
+    watch = results.ErrorWatch(module.results_json, module.results_log, warmup) if max_errors else None
+    while True:
+        try:
+            return process.wait(WATCH_INTERVAL_SEC)
+        except subprocess.TimeoutExpired:
+            pass
+        if abort is not None and abort.is_set():
+            terminate_process(process)
+            raise RuntimeError(f"simulation of {module.name} aborted")
+        if watch is not None:
+            errors = watch.poll()
+            if errors >= max_errors:
+                terminate_process(process)
+                if abort is not None:
+                    abort.set()
+                raise RuntimeError(f"simulation of {module.name} aborted after {errors} mismatches (limit is {max_errors})")
+
+
+def run_vsim(vsim, module, msgmode, startup_lock, t_queued=None, max_errors=None, abort=None, host=None):
+    """uses class module and arg msgmode to start the simulation in the module directory
+    (compiling into the work library of the module), *startup_lock* serializes the startup phase of concurrent simulations, the
+    simulation is terminated after *max_errors* mismatches or if event *abort* is set,
+    it runs on *host* (see module executors) or on the local machine"""
+    if abort is not None and abort.is_set():
+        raise RuntimeError(f"simulation of {module.name} not started, aborted")
     vsim_bin = os.path.join(vsim, "bin", "vsim")
     with open(module.results_log, "wt") as logfile:
-        cmd = [vsim_bin, "-lic_noqueue", "-c", "-msgmode", msgmode, "-modelsimini", ini_file, "-do", "do {filename}; quit -f".format(filename=os.path.join(module.path, DO_FILE))]
-        logger.info("starting simulation for module_%d...", module.id)
-        logger.info("executing: %s", " ".join(['"{0}"'.format(arg) if " " in str(arg) else str(arg) for arg in cmd]))
-        subprocess.run(cmd, stdout=logfile).check_returncode()
+        cmd = [vsim_bin, "-lic_noqueue", "-c", "-msgmode", msgmode, "-modelsimini", module.ini_file, "-do", "do {filename}; quit -f".format(filename=os.path.join(module.path, DO_FILE))]
+        with startup_lock:  # stops starting of other simulations while .do file is still in use
+            logger.info("starting simulation for %s on %s...", module.name, host.name if host else "localhost")
+            logger.info("executing: %s", " ".join(['"{0}"'.format(arg) if " " in str(arg) else str(arg) for arg in cmd]))
+            t_start = time.monotonic()
+            # vsim runs in its own process group, terminating it also terminates vsimk
+            process = (host or executors.Host("localhost")).popen(cmd, cwd=module.path, stdout=logfile)
+            if t_queued is not None:
+                logger.info("%s start latency: %.3f s", module.name, t_start - t_queued)
+            lock_file = os.path.join(module.path, "running.lock")
+            try:
+                # returns as soon as the lock file is created or vsim terminated without creating it
+                if filewatch.wait_for_file(lock_file, TIMEOUT_SEC, abort=lambda: process.poll() is not None):
+                    logger.info("%s ready latency: %.3f s", module.name, time.monotonic() - t_start)
+                    os.remove(lock_file)
+            except RuntimeError:
+                process.kill()
+                raise
+        returncode = wait_vsim(process, module, max_errors, abort)
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
         logger.info(f"simulation done.")
 
     # checks for the json file
-    t0 = time.monotonic()
-    while not os.path.exists(module.results_json):
-        dt = time.monotonic() - t0
-        if dt > TIMEOUT_SEC:
-            raise RuntimeError(f"Timeout waiting for creation of file: {module.results_json!r}")
-        time.sleep(0.100)
+    t_done = time.monotonic()
+    filewatch.wait_for_file(module.results_json, TIMEOUT_SEC)
+    logger.debug("%s results latency: %.3f s", module.name, time.monotonic() - t_done)
 
     # writes to results.txt what bx number triggert which algorithm and how often
-    with open(module.results_txt, "wt") as results_txt:
-        jsonf = json.load(open(module.results_json))
-        errors = jsonf["errors"]
-        for error in errors:
-            results_txt.write("#" * 80 + "\n")
-            results_txt.write("bx-nr      = {}\n".format(error["bx-nr"]))
-            results_txt.write("algo_sim   = {}\n".format(error["algos_sim"]))
-            results_txt.write("algo_tv    = {}\n".format(error["algos_tv"]))
-            results_txt.write("fin_or_sim = {}\n".format(error["finor_sim"]))
-            results_txt.write("fin_or_tv  = {}\n".format(error["finor_tv"]))
-            results_txt.write("#" * 80 + "\n")
-
-            algos_sim_bin = bitfield(int(error["algos_sim"], 16), max_algorithms)
-            algos_tv_bin = bitfield(int(error["algos_tv"], 16), max_algorithms)
-            logger.debug("-" * ts)
-
-            for bit in range(max_algorithms):
-                if algos_tv_bin[bit] != algos_sim_bin[bit]:
-                    # checks if index has a algorithm name else wirtes not found
-                    if module.menu.algorithms.byIndex(bit):
-                        results_txt.write("\n")
-                        results_txt.write("algo {} ({})\n".format(bit, module.menu.algorithms.byIndex(bit).name))
-                        results_txt.write("     tv = {} sim = {}\n".format(algos_tv_bin[bit], algos_sim_bin[bit]))
-                        results_txt.write("\n")
-                    else:
-                        results_txt.write("\n")
-                        results_txt.write(f"algo with index: {bit} not found in menu\n")
-                        results_txt.write("\n")
-
-        logger.info("finished simulating module_{}".format(module.id))
+    names = {algorithm.index: algorithm.name for algorithm in module.menu.algorithms}
+    error_count = results.write_results(module.results_json, module.results_txt, names)
+    logger.debug("%s: %d error records evaluated", module.name, error_count)
+    logger.info("finished simulating {}".format(module.name))
+    return error_count
+
+
+def prepare_shared_library(modules, base_dir):
+    """moves compile commands of module independent sources from the do-files of all modules
+    to a shared do-file compiled in *base_dir*, maps the shared library in the modelsim.ini of
+    every module and searches it on elaboration, returns its path or None if no sources can be shared"""
+    shared_lines = None
+    module_lines = {}
+    for module in modules:
+        do_file = os.path.join(module.path, DO_FILE)
+        shared, lines = simlib.split_do_file(simlib.read_do_file(do_file), module.path)
+        if not shared:
+            logger.warning("no shared library for %s, compiling all sources for every module", module.name)
+            return None
+        if shared_lines is None:
+            shared_lines = shared
+        elif simlib.compile_commands(shared) != simlib.compile_commands(shared_lines):
+            logger.warning("%s compiles different sources, compiling all sources for every module", module.name)
+            return None
+        module_lines[do_file] = lines
+    mappings = simlib.shared_mappings(simlib.library_dirs(shared_lines, base_dir))
+    for module in modules:
+        do_file = os.path.join(module.path, DO_FILE)
+        simlib.write_do_file(do_file, simlib.search_libraries(module_lines[do_file], list(mappings)))
+        simlib.map_libraries(module.ini_file, mappings)
+    shared_do_file = os.path.join(base_dir, SHARED_DO_FILE)
+    simlib.write_do_file(shared_do_file, shared_lines)
+    logger.info("%d sources precompiled in shared library for all modules", len(simlib.compile_commands(shared_lines)))
+    return shared_do_file
+
+
+def prepare_simulation_only(modules):
+    """comments out all compile commands in the do-files of already compiled modules,
+    running them again only simulates the compiled design"""
+    for module in modules:
+        do_file = os.path.join(module.path, DO_FILE)
+        simlib.write_do_file(do_file, simlib.simulation_only(simlib.read_do_file(do_file)))
+    logger.info("reusing compiled design of %d simulations", len(modules))
+
+
+def compile_shared_library(vsim, do_file, msgmode, ini_file):
+    """compiles module independent sources once for all modules into the directory of *do_file*"""
+    vsim_bin = os.path.join(vsim, "bin", "vsim")
+    log_file = os.path.join(os.path.dirname(do_file), SHARED_LOG_FILE)
+    with open(log_file, "wt") as logfile:
+        cmd = [vsim_bin, "-lic_noqueue", "-c", "-msgmode", msgmode, "-modelsimini", ini_file, "-do", "do {filename}; quit -f".format(filename=do_file)]
+        logger.info("compiling shared library...")
+        logger.info("executing: %s", " ".join(['"{0}"'.format(arg) if " " in str(arg) else str(arg) for arg in cmd]))
+        subprocess.run(cmd, cwd=os.path.dirname(do_file), stdout=logfile).check_returncode()
+        logger.info("compiled shared library, see %s", log_file)
+
+
+def get_vsim_version(vsim):
+    """returns version string of the simulator"""
+    vsim_bin = os.path.join(vsim, "bin", "vsim")
+    result = subprocess.run([vsim_bin, "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return result.stdout.decode().strip()
+
+
+def shared_library_key(vsim, do_file, ini_file, sim_area, tags):
+    """returns cache key of the shared library, depending on firmware tags, simulator version,
+    modelsim.ini, compile commands and contents of the compiled sources"""
+    lines = simlib.read_do_file(do_file)
+    commands = "".join(simlib.compile_commands(lines)).replace(sim_area, "")  # independent of temporary directory
+    return utils.make_key(
+        *tags,
+        get_vsim_version(vsim),
+        utils.read_file(ini_file),
+        commands,
+        utils.hash_files(simlib.source_files(lines)),
+    )
+
+
+def build_shared_library(vsim, do_file, msgmode, ini_file, cache, key):
+    """restores shared library from *cache* or compiles it and stores it in the cache,
+    returns the compiled libraries"""
+    libraries = simlib.library_dirs(simlib.read_do_file(do_file), os.path.dirname(do_file))
+    if cache and libraries:
+        if cache.restore(key, libraries):
+            logger.info("shared library restored from cache, skipped compilation")
+            return libraries
+    compile_shared_library(vsim, do_file, msgmode, ini_file)
+    if cache and libraries:
+        cache.store(key, libraries)
+    return libraries
+
+
+def module_progress(module):
+    """returns progress tracker of a module simulation"""
+    total_bx = progress.count_lines(module.testvector_filepath) if os.path.isfile(module.testvector_filepath) else 0
+    return progress.ModuleProgress(module.name, module.results_log, total_bx)
+
+
+def run_vsim_on_slot(executor, vsim, module, *args):
+    """runs simulation of a module as soon as a slot of *executor* is free"""
+    with executor.slot() as host:
+        t_start = time.monotonic()
+        try:
+            module.mismatches = run_vsim(vsim, module, *args, host=host)
+        finally:
+            module.duration = time.monotonic() - t_start
+
+
+def run_simulations(vsim, modules, msgmode, jobs=None, progress_interval=progress.DefaultInterval, max_errors=None, fail_fast=False, executor=None, check=True):
+    """runs simulations of all modules with at most *jobs* concurrent vsim processes
+    (default is all modules at once), most expensive modules are started first and
+    queued modules are started as soon as a running simulation finishes, progress
+    is reported every *progress_interval* seconds (0 disables reporting).
+    A simulation is terminated after *max_errors* mismatches, with *fail_fast*
+    all simulations are terminated (after the first mismatch by default).
+    Simulations run on slots of *executor* (default is the local machine).
+    Raises a RuntimeError if a simulation failed, returns names of failed modules
+    instead if *check* is False"""
+    executor = executor or executors.LocalExecutor()
+    jobs = min(jobs or len(modules), executor.slots or len(modules))
+    if fail_fast and not max_errors:
+        max_errors = 1
+    abort = threading.Event() if fail_fast else None
+    startup_lock = threading.Lock()
+    queue = sorted(modules, key=lambda module: module.count_algorithms(), reverse=True)  # number of algorithms as cost estimate
+    logger.info("running %d simulations, at most %d at a time", len(queue), jobs)
+    trackers = {module.name: module_progress(module) for module in queue}
+    for module in queue:
+        module.status, module.duration, module.mismatches = "queued", None, None
+    t_queued = time.monotonic()
+    with progress.ProgressMonitor(trackers.values(), progress_interval), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_vsim_on_slot, executor, vsim, module, msgmode, startup_lock, t_queued, max_errors, abort): module for module in queue}
+        failed = []
+        for future in concurrent.futures.as_completed(futures):
+            module = futures[future]
+            try:
+                future.result()
+            except Exception as exc:
+                logger.error("simulation of %s failed: %s", module.name, exc)
+                failed.append(module.name)
+                module.status = "failed"
+                trackers[module.name].finish("failed")
+            else:
+                module.status = "done"
+                trackers[module.name].finish()
+    if failed and check:
+        raise RuntimeError("simulation failed for modules: {}".format(", ".join(sorted(failed))))
+    return sorted(failed)
 
 
 def check_algocount(liste):
@@ -200,10 +363,17 @@ def check_multiple(liste):
     return True if len(liste) > 1 else False
 
 
+def testvector_name(path):
+    """returns file name of test vector file path or URL, '.txt' is appended if it has no suffix"""
+    name = path.rstrip("/").split("/")[-1]
+    return name if os.path.splitext(name)[1] else f"{name}.txt"
+
+
 class Module(object):
 
     def __init__(self, menu, id, base_path):
         self.id = id
+        self.name = f"module_{self.id:d}"
         self.testvector = ""
         self.menu = menu
         self.testvector_filepath = ""
@@ -214,6 +384,10 @@ class Module(object):
         self.results_json = os.path.join(self.path, f"results_module_{self.id:d}.json")
         self.results_log = os.path.join(self.path, f"results_module_{self.id:d}.log")
         self.results_txt = os.path.join(self.path, f"results_module_{self.id:d}.txt")
+        self.ini_file = os.path.join(self.path, INI_FILE)  # vmap of the do-file maps the work library of the module
+        self.status = "queued"  # status, wall clock time and number of error records of the last simulation
+        self.duration = None
+        self.mismatches = None
 
     def get_mask(self):  # makes mask and saves it
         mask = 0
@@ -221,7 +395,11 @@ class Module(object):
             mask = mask | (1 << algo.index)
         return mask
 
+    def count_algorithms(self):  # number of algorithms assigned to module
+        return len(list(self.menu.algorithms.byModuleId(self.id)))
+
     def make_files(self, sim_dir, view_wave, mp7_tag, menu_path, ipb_fw_dir):  # makes files for simulation
+        shutil.copyfile(os.path.join(sim_dir, INI_FILE), self.ini_file)
         render_template(
             os.path.join(sim_dir, DO_FILE_TPL),
             os.path.join(self.path, DO_FILE_TMP),
@@ -308,149 +486,56 @@ class Module(object):
         )
 
 
-def download_file_from_url(url, filename):
-    """Download files from URL."""
-    # Remove existing file.
-    utils.remove(filename)
-    # Download file
-    logger.info("retrieving %s", url)
-    urllib.request.urlretrieve(url, filename)
-
-
-def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a_url_menu, a_ipb_fw_url, a_ipb_fw_tag, a_questasimlibs, a_output, a_view_wave, a_wlf, a_tv, a_ignored, a_ugt_tag):
-
-    sim_dir = os.path.join(project_dir, "firmware", "sim")
-
-    # Copy modelsim.ini from questasimlib dir to sim dir (to get questasim libs corresponding to Vivado version)
-    source_filename = os.path.join(a_questasimlibs, "modelsim.ini")
-    dest_filename = os.path.join(sim_dir, "modelsim.ini")
-    shutil.copyfile(source_filename, dest_filename)
-
-    # Using SIM_ROOT dir as default output path
-    output_set = False
-    if not a_output:
-        a_output = sim_dir
-    else:
-        output_set = True
-
-    # Set message mode:
-    # wlf => no output to console for transcript info, warning and error messages (transccd -ript output to vsim.wlf).
-    # tran => output to console.
-    msgmode = "wlf" if a_wlf else "tran"
-
-    logger.info("===========================================================================")
-    logger.info("clone repos of MP7 and IPB-firmware to %r ...", sim_area)
-
-    # Clone repos of MP7 and IPB-firmware to sim_area
-    subprocess.run(["git", "clone", a_mp7_url, "-b", a_mp7_tag, "mp7"], cwd=sim_area).check_returncode()
-    subprocess.run(["git", "clone", a_ipb_fw_url, "-b", a_ipb_fw_tag, "ipbus-firmware"], cwd=sim_area).check_returncode()
-
-    logger.info("===========================================================================")
-    logger.info("download XML and testvector file from L1Menu repository ...")
-    # Get l1menus_path for URL
-    xml_name = "{}{}".format(a_menu, ".xml")
-    menu_filepath = os.path.join(sim_area, xml_name)
-    url = os.path.join(a_url_menu, "xml", xml_name)
-
-    url_menu_split_0 = a_url_menu.split("/")[0]
-    if url_menu_split_0 == "https:":
-        download_file_from_url(url, menu_filepath) # retrieve xml file from repo
-    else:
-        shutil.copyfile(url, menu_filepath) # copy xml file from local path
-
-    tv_name = a_tv.split("/")[-1]
-    if not tv_name.split(".")[1]:
-        tv_name = "{}{}".format(tv_name, ".txt")
-
-    testvector_filepath = os.path.join(sim_area, tv_name)
-
-    tv_split_0 = a_tv.split("/")[0]
-    if tv_split_0 == "https:":
-        download_file_from_url(a_tv, testvector_filepath) # retrieve xml file from repo
-    else:
-        shutil.copyfile(a_tv, testvector_filepath) # copy xml file from local path
-
-    timestamp = time.time()  # creates timestamp
-    _time = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%dT%H-%M-%S")  # changes time apperance
-
-    base_dir = os.path.join(a_output, "sim_results", f"{_time}_{a_menu}")  # creates base directory for later use
-
-    modules = []
-    menu = XmlMenu(menu_filepath)
-    for module_id in range(menu.n_modules):  # makes list for each module
-        modules.append(Module(menu, module_id, base_dir))
-
-    # Get VHDL snippets from menu URL
-    for module in modules:
-        vhdl_src_path = os.path.join("vhdl", f"module_{module.id:d}", "src")
-        temp_dir_module = os.path.join(sim_area, vhdl_src_path)
-        if not os.path.exists(temp_dir_module):
-            os.makedirs(temp_dir_module)  # makes folders
-            for vhdl_name in vhdl_snippets_names:
-                vhdl_file_local_path = os.path.join(temp_dir_module, vhdl_name)
-                vhdl_file_path = os.path.join(vhdl_src_path, vhdl_name)
-                url = os.path.join(a_url_menu, vhdl_file_path)
-                if url_menu_split_0 == "https:":
-                    download_file_from_url(url, vhdl_file_local_path) # retrieve xml file from repo
-                else:
-                    shutil.copyfile(url, vhdl_file_local_path) # copy xml file from local path
-
-    if not os.path.exists(menu_filepath):
-        raise RuntimeError("Missing %s File" % menu_filepath)
-    if not os.path.exists(testvector_filepath):
-        raise RuntimeError("Missing %s" % testvector_filepath)
-    if os.path.exists(base_dir):
-        raise RuntimeError("Directory already exists!")
-
-    os.makedirs(base_dir)
-
-    ini_file = os.path.join(sim_dir, INI_FILE)
+class ModuleShard(Module):
+    """simulation of a BX shard of a module's test vectors in a subdirectory of the module"""
 
-    logger.info("creating Modules and Masks...")
+    def __init__(self, module, shard):
+        super().__init__(module.menu, module.id, module.base_path)
+        self.shard = shard
+        self.name = f"module_{self.id:d}_shard_{shard.id:d}"
+        self.path = os.path.join(module.path, f"shard_{shard.id:d}")
+        self.vhdl_path = os.path.join(self.path, "vhdl")
+        self.testbench_path = os.path.join(self.path, "testbench")
+        self.results_json = os.path.join(self.path, f"results_module_{self.id:d}.json")
+        self.results_log = os.path.join(self.path, f"results_module_{self.id:d}.log")
+        self.results_txt = os.path.join(self.path, f"results_module_{self.id:d}.txt")
+        self.ini_file = os.path.join(self.path, INI_FILE)
+        self.testvector_filepath = shard.filename
 
-    for module in modules:  # gives each module the information
-        module_id = f"module_{module.id:d}"
-        testvector_base_name = os.path.splitext(os.path.basename(testvector_filepath))[0]
-        module.testvector_filepath = os.path.join(module.path, f"{testvector_base_name}_{module_id}.txt")
 
-        os.makedirs(os.path.join(module.path, "testbench"))
-        os.makedirs(os.path.join(module.path, "vhdl"))
-        logger.debug("Module_%d: %0128x", module.id, module.get_mask())
+def split_shards(module, n_shards, overlap):
+    """splits test vectors of a module into *n_shards* BX shards with *overlap* warm-up BXs"""
+    filename = os.path.basename(module.testvector_filepath)
+    return shards.split(module.testvector_filepath, n_shards, overlap, lambda index: os.path.join(module.path, f"shard_{index:d}", filename))
 
-        write_testvector(module.get_mask(), testvector_filepath, module.testvector_filepath)  # mask, testvectorfile, out_dir
 
-        logger.debug("Module_%d created at %s", module.id, base_dir)
+def make_shards(module, n_shards, overlap):
+    """splits test vectors of a module into BX shards, returns list of shard simulations"""
+    return [ModuleShard(module, shard) for shard in split_shards(module, n_shards, overlap)]
 
-        mp7 = os.path.join(sim_area, "mp7")
-        ipb_fw = os.path.join(sim_area, "ipbus-firmware")
 
-        module.make_files(sim_dir, a_view_wave, mp7, sim_area, ipb_fw)  # sim_dir, view_wave, mp7_tag, temp_dir
+def reshard(module, module_shards, n_shards, overlap):
+    """splits the current test vectors of a module into the existing shard simulations"""
+    new_shards = split_shards(module, n_shards, overlap)
+    if len(new_shards) != len(module_shards):
+        raise RuntimeError(f"test vectors of {module.name} too short for {len(module_shards)} shards")
+    for unit, shard in zip(module_shards, new_shards):
+        unit.shard = shard
 
-    questasim_path = os.path.join(QuestaSimPath, "questasim")
 
-    logger.info("finished creating Modules and Masks")
-    logger.info("===========================================================================")
-    logger.info("starting simulations with Questa Simulator from directory %s", questasim_path)
+def merge_shards(module, module_shards):
+    """merges results of shard simulations into the results of the module"""
+    shards.merge([unit.shard for unit in module_shards], [unit.results_json for unit in module_shards], module.results_json)
+    names = {algorithm.index: algorithm.name for algorithm in module.menu.algorithms}
+    results.write_results(module.results_json, module.results_txt, names)
+    logger.info("merged results of %d shards of %s", len(module_shards), module.name)
 
-    threads = []
-    for module in modules:  # makes for all simulations a thread
-        thread = Thread(target=run_vsim, args=(questasim_path, module, msgmode, ini_file))
-        threads.append(thread)
-        thread.start()
-        lock_file = os.path.join(module.path, "running.lock")
-        t0 = time.monotonic()
-        while not os.path.exists(lock_file):  # stops starting of new threads if .do file is still in use
-            dt = time.monotonic() - t0
-            if dt > TIMEOUT_SEC:
-                raise RuntimeError(f"Timeout waiting for creation of file: {lock_file!r}")
-            time.sleep(0.100)
-        os.remove(lock_file)
-
-    for thread in threads:  # waits for all threads to finish
-        thread.join()
-    logger.info("finished all simulations")
-    print()
 
+def evaluate_results(menu, modules, trigger_liste, tv_name, results_dir, a_ignored, output_set):
+    """compares trigger counts of simulation and test vectors of all modules (results read from
+    module directories in *results_dir*), logs summary table and writes it to summary.txt in
+    *results_dir*, returns tuple of success and dictionary mapping algorithm index to tuple of
+    test vector count, simulation count and result"""
     algos_sim = {}
     algos_tv = {}
     error_jsonf = {}
@@ -458,7 +543,7 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
         error_jsonf[i] = {}
 
     for module in modules:  # steps through all modules and makes a list with trigger count and module
-        jsonf = json.load(open(module.results_json))
+        jsonf = json.load(open(os.path.join(results_dir, f"module_{module.id:d}", os.path.basename(module.results_json))))
         errors_jsonf = jsonf["errors"]
         for err in errors_jsonf:
             if err != "":
@@ -479,7 +564,7 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
     for index in range(len(algos_tv)):
         algos_tv[index] = check_algocount(algos_tv[index])
 
-    sum_file = os.path.join(base_dir, "summary.txt")
+    sum_file = os.path.join(results_dir, "summary.txt")
     handler = logging.FileHandler(sum_file, mode="w")
     handler.setFormatter(logging.Formatter(fmt="%(message)s"))
     handler.setLevel(logging.DEBUG)
@@ -496,6 +581,7 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
     err_cnt = 0
     ign_cnt = 0
     ignored_algos = []
+    rows = {}
     for algo in algorithms:
         result = ok_green
         ign_stat = False
@@ -512,6 +598,8 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
             result = error_red
             success = False
 
+        rows[algo.index] = (algos_tv[algo.index][0][1], algos_sim[algo.index][0][1], "ERROR" if err_stat else "IGNORE" if ign_stat else "OK")
+
         line_pr = ("|{:>5}|{:>5}|{:<66}|{:>8}|{:>8}|{:>8}|".format(   # prints line with information about each algo present in the menu
             algo.module_id,
             algo.index,
@@ -558,10 +646,9 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
                     logger.error(f"{error_count} mismatch of algo or finor in module_{i}!")
                 if output_set:
                     logger.error(f"@ certain bx-nr in:")
-                    json_file = os.path.join(base_dir, "module_{}", "results_module_{}.json").format(i, i)
+                    json_file = os.path.join(results_dir, "module_{}", "results_module_{}.json").format(i, i)
                     logger.error(f"{json_file}")
                 json_err_msg = False
-    trigger_liste = trigger_list(testvector_filepath)  # gets a list: index is algorithm index and content is the trigger count in the testvector file
 
     # prints bits which are present in the testvector but have no corresponding algo in the menu
     errors = []
@@ -608,28 +695,349 @@ def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a
     else:
         logger.info("success!")
 
+    return success and json_err_msg, rows
+
+
+def archive_results(modules, results_dir):
+    """moves results of module simulations to module directories in *results_dir*"""
+    for module in modules:
+        module_dir = os.path.join(results_dir, f"module_{module.id:d}")
+        os.makedirs(module_dir, exist_ok=True)
+        for filename in (module.results_json, module.results_txt, module.results_log):
+            if os.path.exists(filename):
+                shutil.move(filename, os.path.join(module_dir, os.path.basename(filename)))
+
+
+def remove_results(modules):
+    """removes results of previous simulations"""
+    for module in modules:
+        for filename in (module.results_json, module.results_txt, module.results_log):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+
+def write_batch_summary(menu, batch_results, sum_file):
+    """logs combined summary table of trigger counts of all test vector files and writes it to *sum_file*"""
+    handler = logging.FileHandler(sum_file, mode="w")
+    handler.setFormatter(logging.Formatter(fmt="%(message)s"))
+    handler.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    separator = "   |-----|-----|------------------------------------------------------------------|" + "-----------------|" * len(batch_results) + "--------|"
+    logger.info("   Batch summary of %d test vector files (columns are l1a.tv/l1a.hw):", len(batch_results))
+    for i, (tv_name, success, _) in enumerate(batch_results):
+        logger.info("   [%d] %s: %s", i, tv_name, "success" if success else "failed")
+    logger.info(separator)
+    logger.info("   | Mod | Idx | Name of algorithm                                                |" + "".join("{:^17}|".format(f"[{i}]") for i in range(len(batch_results))) + " Result |")
+    logger.info(separator)
+    for algo in sorted(menu.algorithms, key=lambda algorithm: algorithm.index):
+        results = [rows[algo.index] for _, _, rows in batch_results]
+        statuses = {status for _, _, status in results}
+        status = "ERROR" if "ERROR" in statuses else "IGNORE" if "IGNORE" in statuses else "OK"
+        line_pr = "|{:>5}|{:>5}|{:<66}|".format(algo.module_id, algo.index, algo.name)
+        line_pr += "".join("{:>17}|".format(f"{tv}/{hw}") for tv, hw, _ in results)
+        line_pr += {"OK": ok_green, "IGNORE": ignore_yellow, "ERROR": error_red}[status] + "|"
+        if status == "ERROR":
+            logger.error("  " + line_pr)
+        elif status == "IGNORE":
+            logger.warning(line_pr)
+        else:
+            logger.info("   " + line_pr)
+    logger.info(separator)
+
+    logger.removeHandler(handler)
+
+    if all(success for _, success, _ in batch_results):
+        logger.info("success for all test vector files!")
+    else:
+        logger.error("simulation failed for test vector files: {}".format(", ".join(tv_name for tv_name, success, _ in batch_results if not success)))
+
+
+def setup_shared_library(units, base_dir, vsim, msgmode, ini_file, sim_area, cache, tags):
+    """moves module independent sources of all simulation units to a shared library and builds it
+    in *base_dir*, restoring it from *cache* if given, the units only read the shared library and
+    compile their module specific sources into their own work library"""
+    shared_do_file = prepare_shared_library(units, base_dir)
+    if shared_do_file:
+        logger.info("===========================================================================")
+        key = shared_library_key(vsim, shared_do_file, ini_file, sim_area, tags) if cache else None
+        shared_ini_file = os.path.join(base_dir, INI_FILE)
+        shutil.copyfile(ini_file, shared_ini_file)
+        build_shared_library(vsim, shared_do_file, msgmode, shared_ini_file, cache, key)
+        logger.info("shared library mapped in %d simulation directories", len(units))
+
+
+class MenuSimulation(object):
+    """module simulations of menu *menu_name* located at *url_menu* with one or more
+    test vector files, menu files are downloaded to *menu_area*, phase timings are
+    accumulated by *timer*"""
+
+    def __init__(self, menu_name, url_menu, testvectors, menu_area, timer=None):
+        self.menu_name = menu_name
+        self.url_menu = url_menu
+        self.menu_area = menu_area
+        # several test vector files are simulated in batch mode, compiling the design only once
+        self.testvectors = [testvectors] if isinstance(testvectors, str) else list(testvectors)
+        self.tv_names = [testvector_name(tv) for tv in self.testvectors]
+        if len(set(self.tv_names)) != len(self.tv_names):
+            raise RuntimeError("test vector file names are not unique: {}".format(", ".join(self.testvectors)))
+        self.testvector_filepaths = [os.path.join(menu_area, name) for name in self.tv_names]
+        self.menu_filepath = os.path.join(menu_area, f"{menu_name}.xml")
+        self.menu = None
+        self.base_dir = None
+        self.modules = []
+        self.units = []  # simulation units are either the modules or BX shards of the modules
+        self.module_shards = {}
+        self.trigger_liste = []
+        self.results = []  # tuples of test vector name, success and summary rows
+        self.timer = timer or summary.PhaseTimer()
+        self.testvector_summaries = []
+
+    @property
+    def batch(self):
+        return len(self.testvectors) > 1
+
+    def fetch(self, fetcher, base_dir):
+        """retrieves XML, test vector files and VHDL snippets from repo or local path,
+        creates modules located in *base_dir*"""
+        os.makedirs(self.menu_area, exist_ok=True)
+        url = os.path.join(self.url_menu, "xml", os.path.basename(self.menu_filepath))
+        with self.timer.phase("fetch"):
+            fetcher.fetch_all([(url, self.menu_filepath)] + list(zip(self.testvectors, self.testvector_filepaths)))
+
+        self.base_dir = base_dir
+        self.menu = XmlMenu(self.menu_filepath, cache_dir=MenuCacheDir)
+        self.modules = [Module(self.menu, module_id, base_dir) for module_id in range(self.menu.n_modules)]
+
+        # Get VHDL snippets from menu URL (all modules at once)
+        snippets = []
+        for module in self.modules:
+            vhdl_src_path = os.path.join("vhdl", f"module_{module.id:d}", "src")
+            temp_dir_module = os.path.join(self.menu_area, vhdl_src_path)
+            if not os.path.exists(temp_dir_module):
+                os.makedirs(temp_dir_module)  # makes folders
+                for vhdl_name in vhdl_snippets_names:
+                    vhdl_file_local_path = os.path.join(temp_dir_module, vhdl_name)
+                    vhdl_file_path = os.path.join(vhdl_src_path, vhdl_name)
+                    snippets.append((os.path.join(self.url_menu, vhdl_file_path), vhdl_file_local_path))
+        with self.timer.phase("fetch"):
+            fetcher.fetch_all(snippets)
+
+        if not os.path.exists(self.menu_filepath):
+            raise RuntimeError("Missing %s File" % self.menu_filepath)
+        for filepath in self.testvector_filepaths:
+            if not os.path.exists(filepath):
+                raise RuntimeError("Missing %s" % filepath)
+        if os.path.exists(base_dir):
+            raise RuntimeError("Directory already exists!")
+
+    def setup(self, sim_dir, view_wave, mp7, ipb_fw, n_shards=1, overlap=shards.DefaultOverlap):
+        """creates module directories, masked test vectors of the first test vector file and
+        simulation files of all units"""
+        os.makedirs(self.base_dir)
+
+        logger.info("creating Modules and Masks...")
+
+        testvector_filepath = self.testvector_filepaths[0]
+        for module in self.modules:  # gives each module the information
+            module_id = f"module_{module.id:d}"
+            testvector_base_name = "testvectors" if self.batch else os.path.splitext(os.path.basename(testvector_filepath))[0]
+            module.testvector_filepath = os.path.join(module.path, f"{testvector_base_name}_{module_id}.txt")
+
+            os.makedirs(os.path.join(module.path, "testbench"))
+            os.makedirs(os.path.join(module.path, "vhdl"))
+            logger.debug("Module_%d: %0128x", module.id, module.get_mask())
+
+        with self.timer.phase("tv_split"):
+            # reads the testvector file once, writes masked testvectors of all modules and counts triggers in the same pass
+            self.trigger_liste = testvector.split(testvector_filepath, [(module.get_mask(), module.testvector_filepath) for module in self.modules])
+
+            self.units = self.modules
+            if n_shards > 1:
+                for module in self.modules:
+                    self.module_shards[module.id] = make_shards(module, n_shards, overlap)
+                    for unit in self.module_shards[module.id]:
+                        os.makedirs(unit.testbench_path)
+                        os.makedirs(unit.vhdl_path)
+                self.units = [unit for module in self.modules for unit in self.module_shards[module.id]]
+                logger.info("split test vectors into %d shards per module (%d warm-up BX)", n_shards, overlap)
+
+        with self.timer.phase("render"):
+            for unit in self.units:
+                logger.debug("%s created at %s", unit.name, unit.path)
+                unit.make_files(sim_dir, view_wave, mp7, self.menu_area, ipb_fw)  # sim_dir, view_wave, mp7_tag, temp_dir
+
+        logger.info("finished creating Modules and Masks")
+
+    def next_testvectors(self, k, n_shards=1, overlap=shards.DefaultOverlap):
+        """prepares simulation of test vector file *k* reusing the compiled design"""
+        tv_name = self.tv_names[k]
+        logger.info("===========================================================================")
+        logger.info("simulating test vector file %s (%d of %d)", tv_name, k + 1, len(self.tv_names))
+        with self.timer.phase("tv_split"):
+            self.trigger_liste = testvector.split(self.testvector_filepaths[k], [(module.get_mask(), module.testvector_filepath) for module in self.modules])
+            for module in self.modules:
+                if module.id in self.module_shards:
+                    reshard(module, self.module_shards[module.id], n_shards, overlap)
+        with self.timer.phase("render"):
+            if k == 1:
+                prepare_simulation_only(self.units)
+            remove_results(self.units)
+
+    def results_dir(self, k):
+        """returns directory of results of test vector file *k*"""
+        return os.path.join(self.base_dir, os.path.splitext(self.tv_names[k])[0]) if self.batch else self.base_dir
+
+    def module_statuses(self):
+        return [summary.ModuleStatus(unit.name, unit.status, unit.duration, unit.mismatches) for unit in self.units]
+
+    def evaluate(self, k, a_ignored, output_set):
+        """merges shard results and evaluates results of test vector file *k*, returns success"""
+        with self.timer.phase("evaluation"):
+            for module in self.modules:
+                if module.id in self.module_shards:
+                    merge_shards(module, self.module_shards[module.id])
+            tv_name = self.tv_names[k]
+            results_dir = self.results_dir(k)
+            if self.batch:
+                archive_results(self.modules, results_dir)
+            success, rows = evaluate_results(self.menu, self.modules, self.trigger_liste, tv_name, results_dir, a_ignored, output_set)
+        self.results.append((tv_name, success, rows))
+        algorithms = [(algo.module_id, algo.index, algo.name) + rows[algo.index] for algo in sorted(self.menu.algorithms, key=lambda algorithm: algorithm.index)]
+        self.testvector_summaries.append(summary.make_testvector_summary(tv_name, success, algorithms, self.module_statuses()))
+        return success
+
+    def record_failure(self, k):
+        """records test vector file *k* as not evaluated as simulations did not complete"""
+        self.testvector_summaries.append(summary.make_testvector_summary(self.tv_names[k], None, [], self.module_statuses()))
+
+    def write_summary(self, tags, write_csv=False):
+        """writes summary.json (and summary.csv and timings.csv if *write_csv* is set) to the
+        base directory, *tags* maps repository names to firmware tags"""
+        data = summary.make_summary(self.menu_name, tags, self.testvector_summaries, self.timer.ordered())
+        summary.write_json(os.path.join(self.base_dir, SUMMARY_JSON_FILE), data)
+        if write_csv:
+            summary.write_csv(os.path.join(self.base_dir, SUMMARY_CSV_FILE), os.path.join(self.base_dir, TIMINGS_CSV_FILE), data)
+        logger.info("summary written to %s", os.path.join(self.base_dir, SUMMARY_JSON_FILE))
+
+
+def prepare_sim_area(project_dir, a_questasimlibs, sim_area, a_mp7_url, a_mp7_tag, a_ipb_fw_url, a_ipb_fw_tag, a_git_mirror=None):
+    """copies modelsim.ini to the simulation directory and clones MP7 and IPBus firmware into
+    *sim_area*, returns simulation directory"""
+    sim_dir = os.path.join(project_dir, "firmware", "sim")
+
+    # Copy modelsim.ini from questasimlib dir to sim dir (to get questasim libs corresponding to Vivado version)
+    source_filename = os.path.join(a_questasimlibs, "modelsim.ini")
+    dest_filename = os.path.join(sim_dir, "modelsim.ini")
+    shutil.copyfile(source_filename, dest_filename)
+
+    logger.info("===========================================================================")
+    logger.info("clone repos of MP7 and IPB-firmware to %r ...", sim_area)
+
+    # Clone repos of MP7 and IPB-firmware to sim_area
+    mirrors = gitcache.MirrorCache(a_git_mirror) if a_git_mirror else None
+    gitcache.clone(a_mp7_url, a_mp7_tag, os.path.join(sim_area, "mp7"), mirrors)
+    gitcache.clone(a_ipb_fw_url, a_ipb_fw_tag, os.path.join(sim_area, "ipbus-firmware"), mirrors)
+    return sim_dir
+
+
+def timestamp_dirname(name):
+    """returns directory name of current time and *name*"""
+    _time = datetime.datetime.fromtimestamp(time.time()).strftime("%Y-%m-%dT%H-%M-%S")  # changes time apperance
+    return f"{_time}_{name}"
+
+
+def cleanup_firmware_cfg():
+    """removes 'axol1tl_trigger.txt'"""
+    cfg_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware", "cfg")
+    axol1tl_txt = os.path.join(cfg_dir, "axol1tl_trigger.txt")
+    if os.path.exists(axol1tl_txt):
+        utils.remove(axol1tl_txt)
+
+
+def run_simulation_questa(sim_area, project_dir, a_mp7_url, a_mp7_tag, a_menu, a_url_menu, a_ipb_fw_url, a_ipb_fw_tag, a_questasimlibs, a_output, a_view_wave, a_wlf, a_tv, a_ignored, a_ugt_tag, a_jobs=None, a_shared_lib=True, a_sim_cache=None, a_sim_cache_size=simcache.DefaultCacheSize, a_git_mirror=None, a_fetch_cache=None, a_progress=progress.DefaultInterval, a_max_errors=None, a_fail_fast=False, a_shards=1, a_shard_overlap=shards.DefaultOverlap, a_hosts=None, a_ssh=None, a_summary_csv=False, a_timer=None):
+
+    timer = a_timer or summary.PhaseTimer()
+    with timer.phase("clone"):
+        sim_dir = prepare_sim_area(project_dir, a_questasimlibs, sim_area, a_mp7_url, a_mp7_tag, a_ipb_fw_url, a_ipb_fw_tag, a_git_mirror)
+
+    # Using SIM_ROOT dir as default output path
+    output_set = False
+    if not a_output:
+        a_output = sim_dir
+    else:
+        output_set = True
+
+    # Set message mode:
+    # wlf => no output to console for transcript info, warning and error messages (transccd -ript output to vsim.wlf).
+    # tran => output to console.
+    msgmode = "wlf" if a_wlf else "tran"
+
+    logger.info("===========================================================================")
+    logger.info("download XML and testvector file from L1Menu repository ...")
+
+    simulation = MenuSimulation(a_menu, a_url_menu, a_tv, sim_area, timer)
+    base_dir = os.path.join(a_output, "sim_results", timestamp_dirname(a_menu))  # creates base directory for later use
+    simulation.fetch(utils.Fetcher(a_fetch_cache), base_dir)
+
+    ini_file = os.path.join(sim_dir, INI_FILE)
+
+    mp7 = os.path.join(sim_area, "mp7")
+    ipb_fw = os.path.join(sim_area, "ipbus-firmware")
+    simulation.setup(sim_dir, a_view_wave, mp7, ipb_fw, a_shards, a_shard_overlap)
+
+    questasim_path = os.path.join(QuestaSimPath, "questasim")
+
+    if a_shared_lib:
+        cache = simcache.LibraryCache(a_sim_cache, a_sim_cache_size) if a_sim_cache else None
+        with timer.phase("compile"):
+            setup_shared_library(simulation.units, base_dir, questasim_path, msgmode, ini_file, sim_area, cache, (a_ugt_tag, a_mp7_tag, a_ipb_fw_tag))
+
+    logger.info("===========================================================================")
+    logger.info("starting simulations with Questa Simulator from directory %s", questasim_path)
+
+    executor = executors.SshExecutor(a_hosts, a_ssh) if a_hosts else executors.LocalExecutor()
+    tags = {"ugt": a_ugt_tag, "mp7": a_mp7_tag, "ipbus": a_ipb_fw_tag}
+
+    for k in range(len(simulation.testvectors)):
+        if k:
+            # design is already compiled, only the simulations are run again with the next test vectors
+            simulation.next_testvectors(k, a_shards, a_shard_overlap)
+
+        with timer.phase("simulation"):
+            failed = run_simulations(questasim_path, simulation.units, msgmode, a_jobs, a_progress, a_max_errors, a_fail_fast, executor, check=False)
+        if failed:
+            simulation.record_failure(k)
+            simulation.write_summary(tags, a_summary_csv)
+            raise RuntimeError("simulation failed for modules: {}".format(", ".join(failed)))
+
+        logger.info("finished all simulations")
+        print()
+
+        simulation.evaluate(k, a_ignored, output_set)
+
+    if simulation.batch:
+        print()
+        write_batch_summary(simulation.menu, simulation.results, os.path.join(base_dir, "summary.txt"))
+
+    simulation.write_summary(tags, a_summary_csv)
+
     print()
     logger.info("=================================")
     logger.info("Simulation was running with:")
     logger.info("L1Menu URL: {}".format(a_url_menu))
     logger.info("L1Menu: {}".format(a_menu))
-    logger.info("TV file: {}".format(a_tv))
+    logger.info("TV file: {}".format(", ".join(simulation.testvectors)))
     logger.info("ugt FW tag: {}".format(a_ugt_tag))
     logger.info("mp7 FW tag: {}".format(a_mp7_tag))
     logger.info("=================================")
 
-    # remove 'axol1tl_trigger.txt'
-    cfg_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware", "cfg")
-    axol1tl_txt = os.path.join(cfg_dir, "axol1tl_trigger.txt")
-    if os.path.exists(axol1tl_txt):
-        utils.remove(axol1tl_txt)
+    cleanup_firmware_cfg()
 
 
-def parse_args():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("menu_xml", help="path to menu xml file (in repository or local")
+def add_simulation_arguments(parser):
+    """adds options common to simulation commands to *parser*"""
     parser.add_argument("--project")
-    parser.add_argument("--tv", required=True, help="Test vector path")
     parser.add_argument("--ignored", action="store_true", default=False, help="using IGNORED_ALGOS for error checks")
     parser.add_argument("--ugturl", default=DefaultUgtUrl)
     parser.add_argument("--ugttag", default=DefaultUgtTag)
@@ -641,7 +1049,31 @@ def parse_args():
     parser.add_argument("-o", "--output", metavar="path", type=os.path.abspath, help="path to output directory")
     parser.add_argument("--view_wave", action="store_true", help="shows the waveform")
     parser.add_argument("--wlf", action="store_true", help="no console transcript info, warning and error messages (transcript output to vsim.wlf)")
+    parser.add_argument("-j", "--jobs", metavar="<n>", type=utils.count_t, help="maximum number of concurrent simulations (default is all modules)")
+    parser.add_argument("--progress", metavar="<sec>", default=progress.DefaultInterval, type=float, help="interval of progress reports of running simulations in seconds, 0 disables reports (default is %(default)s)")
+    parser.add_argument("--max-errors", metavar="<n>", type=utils.count_t, help="terminate simulation of a module after <n> mismatches")
+    parser.add_argument("--fail-fast", action="store_true", help="terminate all simulations as soon as a module reaches the mismatch limit (default limit is 1)")
+    parser.add_argument("--shards", metavar="<k>", type=utils.count_t, default=1, help="split test vectors of every module into <k> BX shards simulated in parallel (default is %(default)s)")
+    parser.add_argument("--shard-overlap", metavar="<n>", type=utils.nonnegative_t, default=shards.DefaultOverlap, help="number of warm-up BXs preceding every shard (default is %(default)s)")
+    parser.add_argument("--hosts", metavar="<host[:slots]>", nargs="+", help="run simulations on remote hosts sharing the file system (via SSH), each running at most <slots> simulations (default is 1)")
+    parser.add_argument("--ssh", metavar="<command>", default=" ".join(executors.DefaultSshCommand), help="command running commands on remote hosts (default is %(default)r)")
+    parser.add_argument("--no-shared-lib", dest="shared_lib", action="store_false", help="compile all sources for every module (no shared precompiled library)")
+    parser.add_argument("--sim-cache", metavar="<path>", default=DefaultSimCacheDir, type=os.path.abspath, help="directory caching compiled shared libraries (default is {!r})".format(DefaultSimCacheDir))
+    parser.add_argument("--sim-cache-size", metavar="<gb>", default=simcache.DefaultCacheSize / 1024 ** 3, type=float, help="size limit of compiled library cache in GB (default is %(default)s)")
+    parser.add_argument("--no-sim-cache", dest="sim_cache", action="store_const", const=None, help="do not cache compiled shared libraries")
+    parser.add_argument("--git-mirror", metavar="<path>", default=gitcache.DefaultMirrorDir, type=os.path.abspath, help="directory of local git mirrors used for cloning (default is {!r})".format(gitcache.DefaultMirrorDir))
+    parser.add_argument("--no-git-mirror", dest="git_mirror", action="store_const", const=None, help="clone directly from remote repositories")
+    parser.add_argument("--fetch-cache", metavar="<path>", default=utils.DefaultFetchCacheDir, type=os.path.abspath, help="directory caching downloaded menu files and test vectors (default is {!r})".format(utils.DefaultFetchCacheDir))
+    parser.add_argument("--no-fetch-cache", dest="fetch_cache", action="store_const", const=None, help="do not cache downloaded files")
+    parser.add_argument("--summary-csv", action="store_true", help="write summary.csv and timings.csv in addition to summary.json")
     parser.add_argument("-v", "--verbose", action="store_true", default=False, help="enables debug prints to console")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("menu_xml", help="path to menu xml file (in repository or local")
+    parser.add_argument("--tv", required=True, nargs="+", help="Test vector path, several test vector files are simulated in batch mode compiling the design only once")
+    add_simulation_arguments(parser)
     return parser.parse_args()
 
 
@@ -660,6 +1092,8 @@ def main():
     utils.menuname_t(menu)
     menu_url = "/".join(args.menu_xml.split("/")[:-2])
 
+    args.sim_cache_size = int(args.sim_cache_size * 1024 ** 3)
+
     if args.ugturl and not args.ugttag:
         raise RuntimeError("Using --ugturl requires also --ugttag")
     if args.ugturl and args.project:
@@ -668,13 +1102,16 @@ def main():
         args.project = os.getcwd()
 
     sim_area = tempfile.mkdtemp()
+    timer = summary.PhaseTimer()
 
     try:
       # Use non local project path
       if args.ugturl:
-          subprocess.run(["git", "clone", args.ugturl, "-b", args.ugttag], cwd=sim_area).check_returncode()
           project_name = os.path.splitext(os.path.basename(args.ugturl))[0]
           args.project = os.path.join(sim_area, project_name)
+          mirrors = gitcache.MirrorCache(args.git_mirror) if args.git_mirror else None
+          with timer.phase("clone"):
+              gitcache.clone(args.ugturl, args.ugttag, args.project, mirrors)
 
       run_simulation_questa(
         sim_area,
@@ -692,6 +1129,21 @@ def main():
         args.tv,
         args.ignored,
         args.ugttag,
+        args.jobs,
+        args.shared_lib,
+        args.sim_cache,
+        args.sim_cache_size,
+        args.git_mirror,
+        args.fetch_cache,
+        args.progress,
+        args.max_errors,
+        args.fail_fast,
+        args.shards,
+        args.shard_overlap,
+        executors.parse_hosts(args.hosts) if args.hosts else None,
+        shlex.split(args.ssh),
+        args.summary_csv,
+        timer,
       )
     finally:
         shutil.rmtree(sim_area)
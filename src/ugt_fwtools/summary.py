@@ -0,0 +1,125 @@
+"""Machine-readable summary of module simulations.
+
+Collects per-phase wall clock timings of a simulation run and writes trigger
+counts of all algorithms, status of all module simulations and the timings to
+`summary.json` (and optionally CSV files) for aggregation in dashboards.
+
+>>> timer = PhaseTimer()
+>>> with timer.phase("fetch"):
+...     fetch_files()
+>>> write_json("summary.json", make_summary(menu_name, tags, testvectors, timer.phases))
+
+"""
+
+import contextlib
+import csv
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import utils
+
+__all__ = ["Phases", "PhaseTimer", "ModuleStatus", "make_testvector_summary", "make_summary", "write_json", "write_csv"]
+
+logger = utils.get_colored_logger(__name__)
+
+SummaryVersion: int = 1
+"""Version of the summary format."""
+
+Phases: Tuple[str, ...] = ("clone", "fetch", "tv_split", "render", "compile", "simulation", "evaluation")
+"""Phases of a simulation run in order of execution."""
+
+
+class PhaseTimer:
+    """Accumulates wall clock time of named phases, a phase entered several
+    times (e.g. for every test vector file) sums up all durations."""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - t_start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        logger.debug("phase %s: %.3f s", name, seconds)
+
+    def ordered(self) -> Dict[str, float]:
+        """Returns timings of known phases in order of execution followed by
+        any other phases."""
+        names = [name for name in Phases if name in self.phases]
+        names += [name for name in self.phases if name not in Phases]
+        return {name: round(self.phases[name], 3) for name in names}
+
+
+class ModuleStatus:
+    """Status of a module simulation, *duration* is the wall clock time in
+    seconds and *mismatches* the number of error records."""
+
+    def __init__(self, name: str, status: str = "queued", duration: Optional[float] = None, mismatches: Optional[int] = None) -> None:
+        self.name = name
+        self.status = status
+        self.duration = duration
+        self.mismatches = mismatches
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "duration": None if self.duration is None else round(self.duration, 3),
+            "mismatches": self.mismatches,
+        }
+
+
+def make_testvector_summary(name: str, success: Optional[bool], algorithms: List[Tuple[int, int, str, int, int, str]], modules: List[ModuleStatus]) -> Dict[str, Any]:
+    """Returns summary of the simulation of a test vector file, *algorithms*
+    is a list of tuples of module id, index, name, test vector count,
+    simulation count and result; *success* is None if not evaluated."""
+    return {
+        "name": name,
+        "success": success,
+        "algorithms": [
+            {"module_id": module_id, "index": index, "name": algo_name, "tv": tv, "hw": hw, "result": result}
+            for module_id, index, algo_name, tv, hw, result in algorithms
+        ],
+        "modules": [module.to_dict() for module in modules],
+    }
+
+
+def make_summary(menu: str, tags: Dict[str, str], testvectors: List[Dict[str, Any]], timings: Dict[str, float]) -> Dict[str, Any]:
+    """Returns summary of a simulation run of *menu*."""
+    return {
+        "version": SummaryVersion,
+        "menu": menu,
+        "tags": dict(tags),
+        "success": bool(testvectors) and all(testvector["success"] for testvector in testvectors),
+        "testvectors": testvectors,
+        "timings": dict(timings),
+    }
+
+
+def write_json(filename: str, summary: Dict[str, Any]) -> None:
+    """Writes summary to JSON file."""
+    with open(filename, "wt") as fp:
+        json.dump(summary, fp, indent=2)
+
+
+def write_csv(algorithms_csv: str, timings_csv: str, summary: Dict[str, Any]) -> None:
+    """Writes algorithm results of all test vector files and phase timings
+    of a summary to CSV files."""
+    with open(algorithms_csv, "wt", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["menu", "testvector", "module_id", "index", "name", "tv", "hw", "result"])
+        for testvector in summary["testvectors"]:
+            for algo in testvector["algorithms"]:
+                writer.writerow([summary["menu"], testvector["name"], algo["module_id"], algo["index"], algo["name"], algo["tv"], algo["hw"], algo["result"]])
+    with open(timings_csv, "wt", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["menu", "phase", "seconds"])
+        for name, seconds in summary["timings"].items():
+            writer.writerow([summary["menu"], name, seconds])
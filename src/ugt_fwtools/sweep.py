@@ -0,0 +1,207 @@
+"""Multi-menu regression sweep of module simulations.
+
+Simulates several menus (each with one or more test vector files) against
+one firmware tag. The firmware checkout and the compiled shared library are
+reused by all menus, the simulations of all menu modules are scheduled on a
+single bounded pool and one consolidated regression report is written.
+
+"""
+
+import argparse
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+
+from . import executors
+from . import gitcache
+from . import regression
+from . import simcache
+from . import summary
+from . import utils
+from .simulation import (
+    MenuSimulation,
+    QuestaSimPath,
+    INI_FILE,
+    add_simulation_arguments,
+    cleanup_firmware_cfg,
+    prepare_sim_area,
+    run_simulations,
+    setup_shared_library,
+    timestamp_dirname,
+    write_batch_summary,
+)
+
+logger = utils.get_colored_logger(__name__)
+
+
+def parse_menu_xml(menu_xml):
+    """returns tuple of menu name and menu URL from path or URL of a menu XML file"""
+    xml_name = menu_xml.split("/")[-1]
+    menu = xml_name.split(".")[0]
+    utils.menuname_t(menu)
+    return menu, "/".join(menu_xml.split("/")[:-2])
+
+
+def run_sweep(sim_area, args, entries, timer=None):
+    """simulates all *entries* (tuples of menu XML and test vector paths), returns list of results,
+    *timer* accumulates timings of phases shared by all menus"""
+    timer = timer or summary.PhaseTimer()
+    with timer.phase("clone"):
+        sim_dir = prepare_sim_area(args.project, args.questasimlibs, sim_area, args.mp7_url, args.mp7_repo_tag, args.ipb_fw_url, args.ipb_fw_tag, args.git_mirror)
+
+    # Using SIM_ROOT dir as default output path
+    output_set = bool(args.output)
+    output = args.output or sim_dir
+    msgmode = "wlf" if args.wlf else "tran"
+    sweep_dir = os.path.join(output, "sim_results", timestamp_dirname("regression"))
+
+    logger.info("===========================================================================")
+    logger.info("download XML and testvector files of %d menus ...", len(entries))
+
+    fetcher = utils.Fetcher(args.fetch_cache)
+    simulations = []
+    for menu_xml, testvectors in entries:
+        menu_name, url_menu = parse_menu_xml(menu_xml)
+        if menu_name in [simulation.menu_name for simulation in simulations]:
+            raise RuntimeError(f"menu listed more than once: {menu_name}")
+        simulation = MenuSimulation(menu_name, url_menu, testvectors, os.path.join(sim_area, "menus", menu_name))
+        simulation.fetch(fetcher, os.path.join(sweep_dir, menu_name))
+        simulations.append(simulation)
+
+    ini_file = os.path.join(sim_dir, INI_FILE)
+    mp7 = os.path.join(sim_area, "mp7")
+    ipb_fw = os.path.join(sim_area, "ipbus-firmware")
+    for simulation in simulations:
+        logger.info("===========================================================================")
+        logger.info("setting up simulation of %s", simulation.menu_name)
+        simulation.setup(sim_dir, args.view_wave, mp7, ipb_fw, args.shards, args.shard_overlap)
+        for unit in simulation.units:
+            unit.name = f"{simulation.menu_name}.{unit.name}"  # unique in the global pool
+
+    questasim_path = os.path.join(QuestaSimPath, "questasim")
+
+    if args.shared_lib:
+        # module independent sources are the same for all menus, compiled only once
+        cache = simcache.LibraryCache(args.sim_cache, args.sim_cache_size) if args.sim_cache else None
+        units = [unit for simulation in simulations for unit in simulation.units]
+        with timer.phase("compile"):
+            setup_shared_library(units, sweep_dir, questasim_path, msgmode, ini_file, sim_area, cache, (args.ugttag, args.mp7_repo_tag, args.ipb_fw_tag))
+
+    executor = executors.SshExecutor(executors.parse_hosts(args.hosts), shlex.split(args.ssh)) if args.hosts else executors.LocalExecutor()
+
+    sweep_results = []
+    for k in range(max(len(simulation.testvectors) for simulation in simulations)):
+        active = [simulation for simulation in simulations if k < len(simulation.testvectors)]
+        for simulation in active:
+            if k:
+                simulation.next_testvectors(k, args.shards, args.shard_overlap)
+
+        logger.info("===========================================================================")
+        logger.info("starting simulations of %d menus with Questa Simulator from directory %s", len(active), questasim_path)
+        units = [unit for simulation in active for unit in simulation.units]
+        with timer.phase("simulation"):
+            failed = run_simulations(questasim_path, units, msgmode, args.jobs, args.progress, args.max_errors, args.fail_fast, executor, check=False)
+        logger.info("finished all simulations")
+
+        for simulation in active:
+            tv_name = simulation.tv_names[k]
+            results_dir = simulation.results_dir(k)
+            if any(unit.name in failed for unit in simulation.units):
+                logger.error("simulation of %s with %s did not complete", simulation.menu_name, tv_name)
+                simulation.record_failure(k)
+                sweep_results.append(regression.make_error_result(simulation.menu_name, tv_name, results_dir))
+                continue
+            print()
+            logger.info("evaluating %s with %s", simulation.menu_name, tv_name)
+            success = simulation.evaluate(k, args.ignored, output_set)
+            _, _, rows = simulation.results[-1]
+            names = {algorithm.index: algorithm.name for algorithm in simulation.menu.algorithms}
+            sweep_results.append(regression.make_result(simulation.menu_name, tv_name, rows, names, success, results_dir))
+
+    tags = {"ugt": args.ugttag, "mp7": args.mp7_repo_tag, "ipbus": args.ipb_fw_tag}
+    for simulation in simulations:
+        if simulation.batch and simulation.results:
+            print()
+            write_batch_summary(simulation.menu, simulation.results, os.path.join(simulation.base_dir, "summary.txt"))
+        # phases shared by all menus are accounted to every menu
+        for name, seconds in timer.phases.items():
+            simulation.timer.add(name, seconds)
+        simulation.write_summary(tags, args.summary_csv)
+
+    report_txt = os.path.join(sweep_dir, "regression.txt")
+    report_json = os.path.join(sweep_dir, "regression.json")
+    regression.write_report(sweep_results, report_txt, report_json)
+
+    print()
+    for line in regression.format_report(sweep_results):
+        logger.info(line)
+    logger.info("=================================")
+    logger.info("Regression sweep was running with:")
+    logger.info("ugt FW tag: {}".format(args.ugttag))
+    logger.info("mp7 FW tag: {}".format(args.mp7_repo_tag))
+    logger.info("report: {}".format(report_txt))
+    logger.info("=================================")
+
+    cleanup_firmware_cfg()
+
+    return sweep_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="simulate several menus with the same firmware and write a consolidated regression report")
+    parser.add_argument("menu_xml", nargs="*", help="paths to menu xml files (in repository or local), simulated with test vectors of --tv")
+    parser.add_argument("--tv", nargs="+", default=[], help="test vector paths simulated with every menu given as argument")
+    parser.add_argument("--list", metavar="<file>", help="sweep list file, every line lists a menu xml followed by its test vector paths")
+    add_simulation_arguments(parser)
+    args = parser.parse_args()
+    if args.menu_xml and not args.tv:
+        parser.error("menus given as arguments require --tv")
+    if not args.menu_xml and not args.list:
+        parser.error("no menus given, use arguments or --list")
+    return args
+
+
+def main():
+    args = parse_args()
+
+    # Setup console logger
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    entries = [(menu_xml, args.tv) for menu_xml in args.menu_xml]
+    if args.list:
+        entries.extend(regression.read_sweep_list(args.list))
+
+    args.sim_cache_size = int(args.sim_cache_size * 1024 ** 3)
+
+    if args.ugturl and not args.ugttag:
+        raise RuntimeError("Using --ugturl requires also --ugttag")
+    if args.ugturl and args.project:
+        raise RuntimeError("Options --project and --ugturl are mutual exclusive")
+    if not args.ugturl and not args.project:
+        args.project = os.getcwd()
+
+    sim_area = tempfile.mkdtemp()
+    timer = summary.PhaseTimer()
+
+    try:
+        # Firmware is checked out only once for all menus
+        if args.ugturl:
+            project_name = os.path.splitext(os.path.basename(args.ugturl))[0]
+            args.project = os.path.join(sim_area, project_name)
+            mirrors = gitcache.MirrorCache(args.git_mirror) if args.git_mirror else None
+            with timer.phase("clone"):
+                gitcache.clone(args.ugturl, args.ugttag, args.project, mirrors)
+
+        sweep_results = run_sweep(sim_area, args, entries, timer)
+    finally:
+        shutil.rmtree(sim_area)
+
+    if any(result.status != regression.StatusPassed for result in sweep_results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
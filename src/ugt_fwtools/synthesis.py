@@ -7,10 +7,16 @@ import subprocess
 import urllib.request
 import urllib.parse
 import urllib.error
-from typing import Dict, List
-
+from typing import Dict, List, Optional, Tuple
+
+from . import builddaemon
+from . import buildreuse
+from . import buildsetup
+from . import buildqueue
+from . import buildstages
+from . import gitcache
 from . import utils
-from .xmlmenu import XmlMenu
+from .xmlmenu import XmlMenu, DefaultCacheDir as MenuCacheDir
 from . import __version__
 
 logger = utils.get_colored_logger(__name__)
@@ -91,15 +97,6 @@ def get_ipbb_version() -> str:
     return result.stdout.decode().split()[-1].strip()
 
 
-def download_file_from_url(url: str, filename: str) -> None:
-    """Download file from URL."""
-    # Remove existing file.
-    utils.remove(filename)
-    # Download file
-    logger.info("retrieving from: %r ", url)
-    urllib.request.urlretrieve(url, filename)
-
-
 def get_uri(path: str) -> str:
     """Return URI from path or URI."""
     if urllib.parse.urlparse(path).scheme:
@@ -134,12 +131,59 @@ def replace_vhdl_templates(vhdl_snippets_dir: str, src_fw_dir: str, dest_fw_dir:
     utils.template_replace(os.path.join(gtl_fdl_wrapper_dir, "gtl_module_tpl.vhd"), replace_map, os.path.join(dest_fw_dir, "gtl_module.vhd"))
 
 
-def create_build_area(args):
+def add_repo(url: str, tag: str, args) -> None:
+    """Add repository to IPBB build area, cloned from local git mirror if enabled."""
+    if args.git_mirror:
+        mirrors = gitcache.MirrorCache(args.git_mirror)
+        mirror = mirrors.update(url, tag)
+        subprocess.run(["ipbb", "add", "git", mirror, "-b", tag], cwd=args.ipbb_dir).check_returncode()
+        mirrors.set_origin(os.path.join(args.ipbb_dir, "src", gitcache.repo_name(url)), url)
+    else:
+        subprocess.run(["ipbb", "add", "git", url, "-b", tag], cwd=args.ipbb_dir).check_returncode()
+
+
+def create_build_area(args) -> None:
     """Creating IPBB build area."""
     subprocess.run(["ipbb", "init", args.ipbb_dir]).check_returncode()
-    subprocess.run(["ipbb", "add", "git", args.ipburl, "-b", args.ipbtag], cwd=args.ipbb_dir).check_returncode()
-    subprocess.run(["ipbb", "add", "git", args.mp7url, "-b", args.mp7tag], cwd=args.ipbb_dir).check_returncode()
-    subprocess.run(["ipbb", "add", "git", args.ugturl, "-b", args.ugttag], cwd=args.ipbb_dir).check_returncode()
+
+
+def add_repos(args, graph: buildsetup.SetupGraph) -> List[str]:
+    """Add setup tasks adding the IPBus, MP7 and ugt repositories to the IPBB
+    build area, return names of the tasks."""
+    tasks = []
+    for url, tag in ((args.ipburl, args.ipbtag), (args.mp7url, args.mp7tag), (args.ugturl, args.ugttag)):
+        tasks.append(graph.add(f"add {gitcache.repo_name(url)}", "add repository", add_repo, url, tag, args))
+    return tasks
+
+
+def fetch_snippets(fetcher: utils.Fetcher, module_ids: List[int], args) -> None:
+    """Download generated VHDL snippets of modules from repository."""
+    logger.info("retrieve VHDL snippets for modules %s ...", ", ".join(format(module_id) for module_id in module_ids))
+    snippets = []
+    for module_id in module_ids:
+        module_name = f"module_{module_id}"
+        vhdl_snippets_dir = os.path.join(args.ipbb_dir, "src", module_name, "vhdl_snippets")
+        os.makedirs(vhdl_snippets_dir)
+        for vhdl_snippet in vhdl_snippets:
+            filename = os.path.join(vhdl_snippets_dir, vhdl_snippet)
+            snippet_uri = urllib.parse.urljoin(args.xml_uri, f"../vhdl/{module_name}/src/{vhdl_snippet}")
+            snippets.append((snippet_uri, filename))
+    fetcher.fetch_all(snippets)
+
+
+def patch_top_package(src_fw_dir: str, args) -> None:
+    """Patch the target package with current UNIX timestamp/username/hostname."""
+    logger.info("patch the target package with current UNIX timestamp/username/hostname ...")
+    top_pkg_tpl = os.path.join(src_fw_dir, "hdl", "packages", "gt_mp7_top_pkg_tpl.vhd")
+    top_pkg = os.path.join(src_fw_dir, "hdl", "packages", "gt_mp7_top_pkg.vhd")
+    subprocess.run(["python", os.path.join(src_fw_dir, "..", "scripts", "pkgpatch.py"), "--build", args.build, top_pkg_tpl, top_pkg]).check_returncode()
+
+
+def replace_module_templates(module_id: int, module_name: str, src_fw_dir: str, args) -> None:
+    """Replace VHDL templates of a module with its downloaded VHDL snippets."""
+    logger.info("replace VHDL templates for module %s ...", module_id)
+    dest_fw_dir = os.path.abspath(os.path.join(args.ipbb_dir, "src", module_name))
+    replace_vhdl_templates(os.path.join(dest_fw_dir, "vhdl_snippets"), src_fw_dir, dest_fw_dir)
 
 
 def create_module(module_id: int, module_name: str, args) -> None:
@@ -147,7 +191,14 @@ def create_module(module_id: int, module_name: str, args) -> None:
     subprocess.run(["ipbb", "proj", "create", "vivado", module_name, f"{args.board_type}:../{args.project_type}"], cwd=args.ipbb_dir).check_returncode()
 
 
-def create_implement_command(module_id: int, module_name: str, args) -> str:
+def stages_dir(module_name: str, args) -> str:
+    """Return directory of build stage markers of a module."""
+    return os.path.join(args.ipbb_dir, "proj", module_name, buildstages.StagesDir)
+
+
+def implement_stages(module_id: int, module_name: str, args) -> List[Tuple[str, str, List[str], List[str]]]:
+    """Return list of tuples of stage name, shell command, input values and
+    input files of all stages of the module implementation."""
     # IPBB commands: running IPBB project, synthesis and implementation, creating bitfile
     cmd_ipbb_project = "ipbb vivado generate-project --single"  # workaround to prevent "hang-up" in make-project with IPBB v0.5.2
     cmd_ipbb_synth = "ipbb vivado synth"
@@ -156,8 +207,39 @@ def create_implement_command(module_id: int, module_name: str, args) -> str:
     vivado_fix_cells_path = os.path.join(args.ipbb_dir, "src/mp7_ugt_legacy/scripts/vivado_fix_cells.tcl")
     cmd_vivado_batch = f'vivado -mode batch -source {vivado_fix_cells_path} -tclarg {args.ipbb_dir} {module_id}'
 
+    # Module specific sources: VHDL snippets and VHDL files patched with them
+    ipbb_dest_fw_dir = os.path.join(args.ipbb_dir, "src", module_name)
+    module_files = [os.path.join(ipbb_dest_fw_dir, "vhdl_snippets", name) for name in vhdl_snippets]
+    module_files += [os.path.join(ipbb_dest_fw_dir, name) for name in ("algo_mapping_rop.vhd", "fdl_pkg.vhd", "gtl_module.vhd")]
+    tags = [args.ipbtag, args.mp7tag, args.ugttag, args.vivado, args.board_type, format(module_id)]
+
     # Set variable "module_id" for tcl script (l1menu_files.tcl in uGT_algo.dep)
-    command = f'cd; source {args.settings64}; cd {args.ipbb_dir}/proj/{module_name}; module_id={module_id} {cmd_ipbb_project} && {cmd_ipbb_synth} && {cmd_vivado_batch} && {cmd_ipbb_impl}'
+    return [
+        ("project", f"module_id={module_id} {cmd_ipbb_project}", tags, module_files),
+        ("synth", cmd_ipbb_synth, [], []),
+        ("fix_cells", cmd_vivado_batch, [], [vivado_fix_cells_path]),
+        ("impl", cmd_ipbb_impl, [], []),
+    ]
+
+
+def implement_stage_keys(module_id: int, module_name: str, args) -> Dict[str, str]:
+    """Return mapping of stage name to hash of stage inputs."""
+    return buildstages.stage_keys([(name, values, files) for name, _, values, files in implement_stages(module_id, module_name, args)])
+
+
+def create_implement_command(module_id: int, module_name: str, args, first_stage: Optional[str] = None) -> str:
+    """Return shell command running all stages of the module implementation
+    (starting with *first_stage* if given), writing a completion marker
+    after every stage."""
+    stages = implement_stages(module_id, module_name, args)
+    keys = buildstages.stage_keys([(name, values, files) for name, _, values, files in stages])
+    names = [name for name, _, _, _ in stages]
+    directory = stages_dir(module_name, args)
+    commands = []
+    for name, command, _, _ in stages[names.index(first_stage or names[0]):]:
+        commands.append(command)
+        commands.append(buildstages.mark_command(directory, name, keys[name]))
+    command = f'cd; source {args.settings64}; cd {args.ipbb_dir}/proj/{module_name}; {" && ".join(commands)}'
 
     return command
 
@@ -176,15 +258,84 @@ def create_manual_build_script(module_id: int, module_name: str, args) -> None:
         fp.write("\n")
 
 
-def implement_module(module_id: int, module_name: str, args) -> None:
+def implement_module(module_id: int, module_name: str, args, first_stage: Optional[str] = None) -> None:
     """Run module implementation in screen session."""
-    command = create_implement_command(module_id, module_name, args)
+    command = create_implement_command(module_id, module_name, args, first_stage)
 
     session = f"build_{args.project_type}_{args.build}_{module_id}"
     logger.info("starting screen session %r for module %s ...", session, module_id)
     start_screen_session(session, command)
 
 
+def create_build_job(module_id: int, module_name: str, args, name: Optional[str] = None, first_stage: Optional[str] = None) -> buildqueue.Job:
+    """Return build job of module implementation, named *name* (default is module name)."""
+    command = create_implement_command(module_id, module_name, args, first_stage)
+    log = os.path.join(args.ipbb_dir, "logs", f"{module_name}.log")
+    return buildqueue.Job(name or module_name, command, log, mem=args.job_mem, priority=args.priority)
+
+
+def queue_module(module_id: int, module_name: str, args, queue: buildqueue.BuildQueue) -> None:
+    """Add module implementation to the build queue."""
+    queue.add(create_build_job(module_id, module_name, args))
+
+
+def submit_modules(modules: List[Tuple[int, str]], args, first_stage: Optional[str] = None) -> None:
+    """Submit implementations of modules (list of tuples of module id and name) to the build daemon,
+    every module is implemented by a detached process of the user as soon as the daemon admits it."""
+    client = builddaemon.Client(builddaemon.socket_path(args.daemon_dir))
+    if not client.alive():
+        raise RuntimeError(f"build daemon not running on {client.path!r} (see ugt-builddaemon)")
+    for module_id, module_name in modules:
+        job = create_build_job(module_id, module_name, args, f"build_{args.project_type}_{args.build}_{module_id}", first_stage)
+        process = builddaemon.start_job(job, args.daemon_dir)
+        logger.info("submitted build job %s (priority %d, pid %d) to build daemon, see %s", job.name, job.priority, process.pid, job.log)
+    logger.info("show status with: ugt-builddaemon status")
+
+
+def start_build_queue(queue: buildqueue.BuildQueue, args) -> None:
+    """Start detached scheduler running the queued module implementations."""
+    queue.configure(args.jobs, args.max_mem)
+    log = os.path.join(args.ipbb_dir, "logs", "scheduler.log")
+    process = buildqueue.start_scheduler(queue.filename, log)
+    logger.info("started build scheduler (pid %d), see %s", process.pid, log)
+    logger.info("show status with: ugt-buildqueue status %s", args.ipbb_dir)
+
+
+def show_build_queue(queue: buildqueue.BuildQueue) -> None:
+    for line in buildqueue.format_status(queue):
+        print(line)
+
+
+def reuse_options(args) -> Dict[Tuple[str, str], str]:
+    """Return build config options compared for reusing modules of a previous build."""
+    return {
+        ("firmware", "ipburl"): args.ipburl,
+        ("firmware", "ipbtag"): args.ipbtag,
+        ("firmware", "mp7url"): args.mp7url,
+        ("firmware", "mp7tag"): args.mp7tag,
+        ("firmware", "ugturl"): args.ugturl,
+        ("firmware", "ugttag"): args.ugttag,
+        ("firmware", "type"): args.project_type,
+        ("vivado", "version"): args.vivado,
+        ("device", "name"): args.board_type,
+    }
+
+
+def reused_modules(previous: buildreuse.PreviousBuild, module_ids: List[int], args) -> List[int]:
+    """Return ids of modules which can be copied from a previous build."""
+    logger.info("===========================================================================")
+    logger.info("compare modules with previous build %s in %s ...", previous.build, previous.buildarea)
+    options = buildreuse.differing_options(previous, reuse_options(args))
+    if options:
+        logger.warning("not reusing any module, options differ from previous build: %s", ", ".join(options))
+        return []
+    module_ids = buildreuse.reusable_modules(previous, args.ipbb_dir, module_ids, vhdl_snippets)
+    logger.info("reusing %d of %d modules of build %s", len(module_ids), args.n_modules, previous.build)
+    for module_id in module_ids:
+        logger.warning("bitfile of module %s contains build version and timestamp of build %s", module_id, buildreuse.source_build(previous, module_id))
+    return module_ids
+
+
 def write_build_config(filename: str, args) -> None:
     """Creating build configuration file."""
 
@@ -224,6 +375,15 @@ def write_build_config(filename: str, args) -> None:
     config.set("device", "name", args.board_type)
     config.set("device", "alias", BoardAliases[args.board])
 
+    if args.reused_modules:
+        config.add_section("reuse")
+        config.set("reuse", "build", args.previous_build.build)
+        config.set("reuse", "buildarea", args.previous_build.buildarea)
+        config.set("reuse", "modules", ",".join(format(module_id) for module_id in args.reused_modules))
+        # build version and timestamp contained in the reused bitfiles
+        for module_id in args.reused_modules:
+            config.set("reuse", buildreuse.module_option(module_id), buildreuse.source_build(args.previous_build, module_id))
+
     # Writing configuration file
     with open(filename, "wt") as fp:
         config.write(fp)
@@ -231,6 +391,14 @@ def write_build_config(filename: str, args) -> None:
     logger.info("created configuration file: %r", filename)
 
 
+def add_build_job_arguments(parser) -> None:
+    """Add options of build jobs run by the build daemon to *parser*."""
+    parser.add_argument("--daemon", action="store_true", help="submit module synthesis to the host-wide build daemon (see ugt-builddaemon)")
+    parser.add_argument("--daemon-dir", metavar="<path>", default=builddaemon.DefaultDaemonDir, type=os.path.abspath, help=f"directory of the build daemon (default is {builddaemon.DefaultDaemonDir!r})")
+    parser.add_argument("--priority", metavar="<n>", type=int, default=0, help="priority of build jobs, higher priorities are started first (default is %(default)s)")
+    parser.add_argument("--job-mem", metavar="<gb>", type=float, default=buildqueue.DefaultJobMemory, help="estimated memory of a module synthesis in GB (default is %(default)s)")
+
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser()
@@ -245,7 +413,17 @@ def parse_args():
     parser.add_argument("--build", type=utils.build_str_t, required=True, metavar="<version>", help="menu build version (eg. 0x1001) [required]")
     parser.add_argument("--board", metavar="<type>", default=DefaultBoardType, choices=list(BoardAliases.keys()), help=f"set board type (default is {DefaultBoardType!r})")
     parser.add_argument("-m", "--modules", metavar="<list>", type=modules_t, default=[], help="synthesize only subset of modules (comma separated list)")
+    parser.add_argument("--reuse", metavar="<file>", type=os.path.abspath, help="build config of a previous build (eg. build_0x1190.cfg), modules with unchanged VHDL snippets and firmware tags are copied from its build area instead of synthesized (requires --reuse-accept-stale-version)")
+    parser.add_argument("--reuse-accept-stale-version", action="store_true", help="accept that reused bitfiles contain build version and timestamp of the build which synthesized them")
     parser.add_argument("--manual", action="store_true", help="do not run synthesis in screen sessions (manual mode)")
+    parser.add_argument("-j", "--jobs", metavar="<n>", type=utils.count_t, help="run synthesis by a scheduler in the background, at most <n> modules at a time (instead of screen sessions)")
+    parser.add_argument("--max-mem", metavar="<gb>", type=float, help="run synthesis by a scheduler in the background, limiting the estimated memory of concurrently running modules to <gb> GB")
+    add_build_job_arguments(parser)
+    parser.add_argument("--setup-jobs", metavar="<n>", type=utils.count_t, default=buildsetup.DefaultSetupJobs, help="number of concurrent steps setting up the build area (default is %(default)s)")
+    parser.add_argument("--git-mirror", metavar="<path>", default=gitcache.DefaultMirrorDir, type=os.path.abspath, help=f"directory of local git mirrors used for cloning (default is {gitcache.DefaultMirrorDir!r})")
+    parser.add_argument("--no-git-mirror", dest="git_mirror", action="store_const", const=None, help="clone directly from remote repositories")
+    parser.add_argument("--fetch-cache", metavar="<path>", default=utils.DefaultFetchCacheDir, type=os.path.abspath, help=f"directory caching downloaded menu files (default is {utils.DefaultFetchCacheDir!r})")
+    parser.add_argument("--no-fetch-cache", dest="fetch_cache", action="store_const", const=None, help="do not cache downloaded files")
     parser.add_argument("-p", "--path", metavar="<path>", default=DefaultFirmwareDir, type=os.path.abspath, help=f"fw build path (default is {DefaultFirmwareDir!r})")
     return parser.parse_args()
 
@@ -266,6 +444,11 @@ def main() -> None:
     # check menu name
     utils.menuname_t(args.menu_name)
 
+    if args.reuse and not args.reuse_accept_stale_version:
+        raise RuntimeError("reused bitfiles contain build version and timestamp of the previous build, option --reuse requires --reuse-accept-stale-version")
+
+    args.previous_build = buildreuse.read_build(args.reuse) if args.reuse else None
+
     # Check for UGT_VIVADO_BASE_DIR
     args.vivado_base_dir = os.getenv("UGT_VIVADO_BASE_DIR")
     if not args.vivado_base_dir:
@@ -314,19 +497,16 @@ def main() -> None:
 
     xml_filename = os.path.join(args.ipbb_dir, "src", f"{args.menu_name}.xml")
 
-    logger.info("===========================================================================")
-    logger.info("retrieve %r...", xml_filename)
-    download_file_from_url(args.xml_uri, xml_filename)
-
     html_uri = urllib.parse.urljoin(args.xml_uri, f"../doc/{args.menu_name}.html")
     html_filename = os.path.join(args.ipbb_dir, "src", f"{args.menu_name}.html")
 
     logger.info("===========================================================================")
-    logger.info("retrieve %r...", html_filename)
-    download_file_from_url(html_uri, html_filename)
+    logger.info("retrieve %r and %r...", xml_filename, html_filename)
+    fetcher = utils.Fetcher(args.fetch_cache)
+    fetcher.fetch_all([(args.xml_uri, xml_filename), (html_uri, html_filename)])
 
     # Parse menu content
-    menu = XmlMenu(xml_filename)
+    menu = XmlMenu(xml_filename, cache_dir=MenuCacheDir)
 
     if not menu.name.startswith("L1Menu_"):
         logger.error(f"invalid menu_name: {menu.name!r}")
@@ -336,6 +516,12 @@ def main() -> None:
         logger.error("menu contains no modules")
         raise RuntimeError("menu contains no modules")
 
+    if args.daemon and (args.jobs or args.max_mem):
+        raise RuntimeError("options --jobs and --max-mem are not used with --daemon (limits are set by the build daemon)")
+
+    # Scheduled module implementations are recorded in a queue in the build area
+    queue = buildqueue.BuildQueue(os.path.join(args.ipbb_dir, buildqueue.QueueFile)) if args.jobs or args.max_mem else None
+
     # Fetch number of menu modules.
     args.n_modules = menu.n_modules
     module_ids = list(range(menu.n_modules))
@@ -349,55 +535,69 @@ def main() -> None:
 
     ipbb_src_fw_dir = os.path.abspath(os.path.join(args.ipbb_dir, "src", args.project_type, "firmware"))
 
-    for module_id in module_ids:
-        module_name = f"module_{module_id}"
-        ipbb_module_dir = os.path.join(args.ipbb_dir, module_name)
+    # Independent setup steps run concurrently: repositories are added while
+    # VHDL snippets are downloaded, modules are prepared in parallel.
+    graph = buildsetup.SetupGraph(args.setup_jobs)
 
-        ipbb_dest_fw_dir = os.path.abspath(os.path.join(args.ipbb_dir, "src", module_name))
-        os.makedirs(ipbb_dest_fw_dir)
-
-        # Download generated VHDL snippets from repository and replace VHDL templates
-        logger.info("===========================================================================")
-        logger.info(" *** module %s ***", module_id)
-        logger.info("===========================================================================")
-        logger.info("retrieve VHDL snippets for module %s and replace VHDL templates ...", module_id)
-        vhdl_snippets_dir = os.path.join(ipbb_dest_fw_dir, "vhdl_snippets")
-        os.makedirs(vhdl_snippets_dir)
+    logger.info("===========================================================================")
+    logger.info("adding repositories and retrieving VHDL snippets ...")
+    repos = add_repos(args, graph)
+    ugt_repo = repos[-1]
+    graph.add("patch top package", "patch top package", patch_top_package, ipbb_src_fw_dir, args, requires=[ugt_repo])
+    snippets = graph.add("fetch snippets", "fetch snippets", fetch_snippets, fetcher, module_ids, args)
+    graph.run()
 
-        # TODO
-        for vhdl_snippet in vhdl_snippets:
-            filename = os.path.join(vhdl_snippets_dir, vhdl_snippet)
-            snippet_uri = urllib.parse.urljoin(args.xml_uri, f"../vhdl/{module_name}/src/{vhdl_snippet}")
-            download_file_from_url(snippet_uri, filename)
+    # Modules unchanged since the previous build are not synthesized again
+    args.reused_modules = reused_modules(args.previous_build, module_ids, args) if args.previous_build else []
 
-        replace_vhdl_templates(vhdl_snippets_dir, ipbb_src_fw_dir, ipbb_dest_fw_dir)
+    module_ids = [module_id for module_id in module_ids if module_id not in args.reused_modules]
 
-        logger.info("patch the target package with current UNIX timestamp/username/hostname ...")
-        top_pkg_tpl = os.path.join(ipbb_src_fw_dir, "hdl", "packages", "gt_mp7_top_pkg_tpl.vhd")
-        top_pkg = os.path.join(ipbb_src_fw_dir, "hdl", "packages", "gt_mp7_top_pkg.vhd")
-        subprocess.run(["python", os.path.join(ipbb_src_fw_dir, "..", "scripts", "pkgpatch.py"), "--build", args.build, top_pkg_tpl, top_pkg]).check_returncode()
+    logger.info("===========================================================================")
+    logger.info("preparing modules %s ...", ", ".join(format(module_id) for module_id in module_ids))
+    for module_id in args.reused_modules:
+        graph.add(f"reuse module_{module_id}", "reuse module", buildreuse.reuse_module, args.previous_build, args.ipbb_dir, module_id, requires=[snippets])
+    for module_id in module_ids:
+        module_name = f"module_{module_id}"
+        # Replace VHDL templates with downloaded VHDL snippets
+        templates = graph.add(f"replace {module_name}", "replace templates", replace_module_templates, module_id, module_name, ipbb_src_fw_dir, args, requires=[ugt_repo, snippets])
+        graph.add(f"create {module_name}", "create project", create_module, module_id, module_name, args, requires=repos + [templates])
+    graph.run()
 
-        logger.info("===========================================================================")
-        logger.info("creating IPBB project for module %s ...", module_id)
+    logger.info("===========================================================================")
+    for line in graph.report():
+        logger.info(line)
 
-        create_module(module_id, module_name, args)
+    for module_id in module_ids:
+        module_name = f"module_{module_id}"
 
         if args.manual:
             create_manual_build_script(module_id, module_name, args)
+        elif args.daemon:
+            logger.info("IPBB project, synthesis and implementation of module %s will be submitted to the build daemon", module_id)
+        elif queue:
+            logger.info("queue IPBB project, synthesis and implementation, creating bitfile for module %s ...", module_id)
+            queue_module(module_id, module_name, args, queue)
         else:
             logger.info("===========================================================================")
             logger.info("running IPBB project, synthesis and implementation, creating bitfile for module %s ...", module_id)
             implement_module(module_id, module_name, args)
 
-    # list running screen sessions
-    logger.info("===========================================================================")
-    if not args.manual:
-        show_screen_sessions()
-
     # Write build configuration file
     config_filename = os.path.join(args.ipbb_dir, f"build_{args.build}.cfg")
     write_build_config(config_filename, args)
 
+    # list running screen sessions or queued modules
+    logger.info("===========================================================================")
+    if not module_ids:
+        logger.info("all modules reused from build %s, nothing to synthesize", args.previous_build.build)
+    elif args.daemon and not args.manual:
+        submit_modules([(module_id, f"module_{module_id}") for module_id in module_ids], args)
+    elif queue and not args.manual:
+        start_build_queue(queue, args)
+        show_build_queue(queue)
+    elif not args.manual:
+        show_screen_sessions()
+
     logger.info("done.")
 
 
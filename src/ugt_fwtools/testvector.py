@@ -0,0 +1,90 @@
+"""Test vector engine used by the simulation.
+
+A test vector file contains one bunch crossing (BX) per line, the second last
+column holding the algorithm bits (128 hex digits, 512 bits) and the last
+column holding the final OR. All other columns are passed through unchanged.
+
+Stream a test vector file once into several masked module files, counting
+triggers in the same pass:
+
+>>> counts = split("sample_ttbar.txt", [(mask_0, "tv_module_0.txt"), (mask_1, "tv_module_1.txt")])
+>>> counts[42]
+17
+
+"""
+
+import collections
+import contextlib
+from typing import Counter, Iterable, List, Mapping, Tuple
+
+__all__ = ["MaxAlgorithms", "split"]
+
+MaxAlgorithms: int = 512
+"""Number of algorithm bits in a test vector line."""
+
+AlgorithmDigits: int = MaxAlgorithms // 4
+"""Number of hex digits of the algorithm column."""
+
+
+def parse_line(line: str) -> Tuple[str, int]:
+    """Split a test vector line into its leading columns (including trailing
+    separator) and the integer value of the algorithm column.
+    >>> parse_line("0000 ... 0000000000000005 1")
+    ('0000 ... ', 5)
+    """
+    columns = line.split()
+    prefix = " ".join(columns[:-2])
+    if prefix:
+        prefix += " "
+    return prefix, int(columns[-2], 16)
+
+
+def format_line(prefix: str, algorithms: int) -> str:
+    """Return test vector line for leading columns and algorithm bits, the
+    final OR column is derived from the algorithm bits."""
+    return f"{prefix}{algorithms:0{AlgorithmDigits}x} {1 if algorithms else 0}\n"
+
+
+def count_bits(values: Iterable[int], n: int = MaxAlgorithms) -> List[int]:
+    """Return list of length *n* counting how often each bit is set in
+    *values*.
+    >>> count_bits([5, 4, 5], 4)
+    [2, 0, 3, 0]
+    """
+    return count_histogram(collections.Counter(values), n)
+
+
+def count_histogram(histogram: Mapping[int, int], n: int = MaxAlgorithms) -> List[int]:
+    """Return list of length *n* counting how often each bit is set, where
+    *histogram* maps distinct values to their number of occurrences. Every
+    distinct value is decoded only once and only its set bits are visited.
+    >>> count_histogram({5: 2, 4: 1}, 4)
+    [2, 0, 3, 0]
+    """
+    counts = [0] * n
+    for value, weight in histogram.items():
+        while value:
+            lowest = value & -value
+            counts[lowest.bit_length() - 1] += weight
+            value ^= lowest
+    return counts
+
+
+def split(filename: str, targets: Iterable[Tuple[int, str]]) -> List[int]:
+    """Read test vector file *filename* exactly once and write every line
+    masked to all *targets* (tuples of mask and output filename) in the same
+    pass. Returns list of trigger counts of the unmasked test vectors, list
+    index is the algorithm index. Blank lines are skipped.
+    """
+    histogram: Counter[int] = collections.Counter()
+    with contextlib.ExitStack() as stack:
+        outputs = [(mask, stack.enter_context(open(output, "wt"))) for mask, output in targets]
+        with open(filename, "rt") as fp:
+            for line in fp:
+                if not line.strip():
+                    continue
+                prefix, algorithms = parse_line(line)
+                histogram[algorithms] += 1
+                for mask, output in outputs:
+                    output.write(format_line(prefix, algorithms & mask))
+    return count_histogram(histogram)
@@ -1,5 +1,9 @@
+import concurrent.futures
 import datetime
 import glob
+import hashlib
+import http.client
+import json
 import logging
 import shutil
 import stat
@@ -8,7 +12,11 @@ import socket
 import subprocess
 import os
 import re
-from typing import Dict, List, Optional
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
 def build_t(value: str) -> str:
@@ -71,6 +79,22 @@ def questasim_t(version: str) -> str:
     return version
 
 
+def count_t(value: str) -> int:
+    """Validates positive count."""
+    count = int(value)
+    if count < 1:
+        raise ValueError(f"not a valid count: '{value}'")
+    return count
+
+
+def nonnegative_t(value: str) -> int:
+    """Validates non-negative count."""
+    count = int(value)
+    if count < 0:
+        raise ValueError(f"not a valid count: '{value}'")
+    return count
+
+
 def expand_range(expr: str) -> List[int]:
     """Expand numeric ranges.
     >>> expand_range("3")
@@ -116,6 +140,29 @@ def read_file(filename: str) -> str:
         return fp.read()
 
 
+def make_key(*parts: str) -> str:
+    """Returns hex digest of a sequence of strings (cache keys, input hashes)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def hash_files(filenames: Iterable[str]) -> str:
+    """Returns hex digest of the contents of files, missing files are hashed
+    by name only."""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        digest.update(os.path.basename(filename).encode())
+        if os.path.isfile(filename):
+            with open(filename, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b""):
+                    digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
 def template_replace(template: str, replace_map: dict, result: str) -> None:
     """Load template by replacing keys from dictionary and writing to result
     file. The function ignores VHDL escaped lines.
@@ -149,6 +196,12 @@ def timestamp() -> str:
     return datetime.datetime.now().strftime("%Y-%m-%d-T%H-%M-%S")
 
 
+def format_duration(seconds: float) -> str:
+    """Returns duration formatted as H:MM:SS."""
+    seconds = int(round(seconds))
+    return "{:d}:{:02d}:{:02d}".format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
 def hostname() -> str:
     """Returns UNIX machine hostname."""
     return socket.gethostname()
@@ -229,3 +282,153 @@ def get_colored_logger(name: str, level: int = logging.DEBUG) -> logging.Logger:
         logger.addHandler(ch)
 
     return logger
+
+
+logger = get_colored_logger(__name__)
+
+DefaultFetchCacheDir: str = os.getenv("UGT_FETCH_CACHE_DIR") or os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "ugt-fwtools", "fetch")
+"""Default location of the download cache."""
+
+DefaultFetchWorkers: int = 8
+"""Default number of concurrent downloads."""
+
+
+class Fetcher:
+    """Retrieves files from http[s] URLs, file URIs or local paths.
+
+    Downloads run concurrently in a thread pool, every thread reuses one
+    persistent connection per host. Downloaded content is stored by checksum
+    in *cache_dir* and revalidated using ETag/Last-Modified, so unchanged
+    files are not transferred again. If a server is not reachable a cached
+    copy is used.
+
+    >>> fetcher = Fetcher()
+    >>> fetcher.fetch_all([(xml_uri, "menu.xml"), (html_uri, "menu.html")])
+    """
+
+    MaxRedirects: int = 5
+
+    def __init__(self, cache_dir: Optional[str] = DefaultFetchCacheDir, max_workers: int = DefaultFetchWorkers) -> None:
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir)) if cache_dir else None
+        self.max_workers = max_workers
+        self._local = threading.local()
+
+    def fetch_all(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Retrieve list of tuples of URI and destination filename concurrently."""
+        items = list(items)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.fetch, uri, filename) for uri, filename in items]
+            for future in futures:
+                future.result()  # raises first error
+
+    def fetch(self, uri: str, filename: str) -> None:
+        """Retrieve single file from URI or local path to *filename*."""
+        remove(filename)
+        scheme = urllib.parse.urlsplit(uri).scheme
+        if scheme in ("http", "https"):
+            logger.info("retrieving %s", uri)
+            self._fetch_http(uri, filename)
+        else:
+            path = urllib.request.url2pathname(urllib.parse.urlsplit(uri).path) if scheme == "file" else uri
+            logger.info("copying %s", path)
+            shutil.copyfile(path, filename)
+
+    def _connection(self, scheme: str, host: str, port: Optional[int]) -> http.client.HTTPConnection:
+        connections = self._local.__dict__.setdefault("connections", {})
+        key = (scheme, host, port)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connections[key] = cls(host, port, timeout=60)
+        return connections[key]
+
+    def _drop_connection(self, scheme: str, host: str, port: Optional[int]) -> None:
+        connection = self._local.__dict__.get("connections", {}).pop((scheme, host, port), None)
+        if connection:
+            connection.close()
+
+    def _get(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """Returns status, headers and body of a GET request following redirects."""
+        for _ in range(self.MaxRedirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            if urllib.request.getproxies().get(parts.scheme):
+                return self._get_urllib(url, headers)  # let urllib handle proxies
+            host = parts.hostname or ""
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            for retry in (True, False):
+                connection = self._connection(parts.scheme, host, parts.port)
+                try:
+                    connection.request("GET", target, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()  # read completely to reuse connection
+                    break
+                except (http.client.HTTPException, OSError):
+                    self._drop_connection(parts.scheme, host, parts.port)  # server closed persistent connection
+                    if not retry:
+                        raise
+            response_headers = {key.lower(): value for key, value in response.getheaders()}
+            if response.status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                url = urllib.parse.urljoin(url, response_headers["location"])
+                continue
+            return response.status, response_headers, body
+        raise RuntimeError(f"too many redirects: {url!r}")
+
+    def _get_urllib(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, {key.lower(): value for key, value in response.getheaders()}, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, {key.lower(): value for key, value in exc.headers.items()}, b""
+
+    def _cache_paths(self, url: str) -> Tuple[str, str]:
+        assert self.cache_dir
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, "urls", f"{key}.json"), os.path.join(self.cache_dir, "blobs")
+
+    def _fetch_http(self, url: str, filename: str) -> None:
+        meta: Dict[str, str] = {}
+        if self.cache_dir:
+            meta_file, blobs_dir = self._cache_paths(url)
+            if os.path.isfile(meta_file):
+                with open(meta_file, "rt") as fp:
+                    meta = json.load(fp)
+                if not os.path.isfile(os.path.join(blobs_dir, meta.get("sha256", ""))):
+                    meta = {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            status, response_headers, body = self._get(url, headers)
+        except (http.client.HTTPException, OSError) as exc:
+            if not meta:
+                raise
+            logger.warning("failed to retrieve %s (%s), using cached copy", url, exc)
+            status = 304
+        if status == 304 and meta:
+            shutil.copyfile(os.path.join(blobs_dir, meta["sha256"]), filename)
+            return
+        if status != 200:
+            raise RuntimeError(f"failed to retrieve {url!r}: HTTP status {status}")
+        with open(filename, "wb") as fp:
+            fp.write(body)
+        if self.cache_dir:
+            self._store(url, response_headers, body)
+
+    def _store(self, url: str, headers: Dict[str, str], body: bytes) -> None:
+        meta_file, blobs_dir = self._cache_paths(url)
+        checksum = hashlib.sha256(body).hexdigest()
+        os.makedirs(os.path.dirname(meta_file), exist_ok=True)
+        os.makedirs(blobs_dir, exist_ok=True)
+        blob = os.path.join(blobs_dir, checksum)
+        if not os.path.isfile(blob):
+            temp_blob = f"{blob}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(temp_blob, "wb") as fp:
+                fp.write(body)
+            os.replace(temp_blob, blob)
+        meta = {"url": url, "sha256": checksum, "etag": headers.get("etag", ""), "last_modified": headers.get("last-modified", "")}
+        temp_meta = f"{meta_file}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temp_meta, "wt") as fp:
+            json.dump(meta, fp)
+        os.replace(temp_meta, meta_file)
@@ -19,6 +19,14 @@ Iterate over algorithms:
 >>> for algorithm in menu.algorithms:
 ...     print algorithm.index, algorithm.name
 
+Benchmark parsing of synthetic menus:
+
+$ python -m ugt_fwtools.xmlmenu --benchmark 1000 10000 100000
+
+Stream algorithms of module 0 as newline delimited JSON while parsing:
+
+$ python -m ugt_fwtools.xmlmenu sample.xml --format ndjson --module-id 0
+
 Filter algorithms by attributes:
 
 >>> for module in range(menu.n_modules):
@@ -27,7 +35,10 @@ Filter algorithms by attributes:
 
 """
 
+import hashlib
+import marshal
 import os
+import re
 import sys
 
 try:
@@ -38,37 +49,29 @@ except ImportError:
 __all__ = ['XmlMenu', '__version__']
 __version__ = '1.0.0'
 
+DefaultCacheDir = os.getenv('UGT_MENU_CACHE_DIR') or os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'ugt-fwtools', 'menus')
+"""Default location of binary menu snapshots."""
 
-def filter_first(function, sequence):
-    """Retruns first match of filter() result or None if nothing was found."""
-    return list(list(filter(function, sequence)) or [None])[0]
+SnapshotVersion = 1
+"""Format version of binary menu snapshots."""
 
 
-def get_xpath(elem, path, fmt=str):
-    """Easy access using etree elem xpath method."""
-    try:
-        return fmt(elem.xpath('{path}/text()'.format(path=path))[0])
-    except IndexError:
-        return fmt()  # retrun empty
+def file_digest(filename):
+    """Returns SHA256 hex digest of file content."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-def fast_iter(context, func, *args, **kwargs):
-    """Fast XML iterator for huge XML files.
-    http://lxml.de/parsing.html#modifying-the-tree
-    Based on Liza Daly's fast_iter
-    http://www.ibm.com/developerworks/xml/library/x-hiperfparse/
-    See also http://effbot.org/zone/element-iterparse.htm
-    """
-    for event, elem in context:
-        func(elem, *args, **kwargs)
-        # It's safe to call clear() here because no descendants will be
-        # accessed
-        elem.clear()
-        # Also eliminate now-empty references from the root node to elem
-        for ancestor in elem.xpath('ancestor-or-self::*'):
-            while ancestor.getprevious() is not None:
-                del ancestor.getparent()[0]
-    del context
+def text_value(elem, fmt=str):
+    """Returns text of element converted by *fmt*, or empty value of *fmt*
+    if element has no text."""
+    text = elem.text
+    if text is None:
+        return fmt()  # return empty
+    return fmt(text)
 
 
 class Algorithm(object):
@@ -81,6 +84,8 @@ class Algorithm(object):
     *module_index* is the implementation specific algorithm module index
     *comment* is an optional comment
     """
+    __slots__ = ('index', 'name', 'expression', 'module_id', 'module_index', 'comment')
+
     def __init__(self, index, name, expression, module_id=0, module_index=0, comment=None):
         self.index = index
         self.name = name
@@ -91,7 +96,7 @@ class Algorithm(object):
 
     def asdict(self):
         """Retrun content as dictionary."""
-        return self.__dict__
+        return {key: getattr(self, key) for key in self.__slots__}
 
     def __repr__(self):
         return "Algorithm(index={self.index}, " \
@@ -101,22 +106,98 @@ class Algorithm(object):
 
 
 class AlgorithmContainer(list):
-    """Algorithm list container with extended lookup methods for content."""
+    """Algorithm list container with extended lookup methods for content.
+
+    Lookups use hash indexes built on first access. Appending algorithms
+    updates the indexes, any other modification of the list invalidates them.
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._indexes = None
+
+    def _build_indexes(self):
+        indexes = {'index': {}, 'name': {}, 'module_id': {}, 'module_index': {}}
+        for algorithm in self:
+            self._add_to_indexes(indexes, algorithm)
+        return indexes
+
+    @staticmethod
+    def _add_to_indexes(indexes, algorithm):
+        indexes['index'].setdefault(algorithm.index, algorithm)  # first match wins
+        indexes['name'].setdefault(algorithm.name, algorithm)
+        indexes['module_id'].setdefault(algorithm.module_id, []).append(algorithm)
+        indexes['module_index'].setdefault(algorithm.module_index, []).append(algorithm)
+
+    def _lookup(self, key):
+        if self._indexes is None:
+            self._indexes = self._build_indexes()
+        return self._indexes[key]
+
+    def _invalidate(self):
+        self._indexes = None
+
+    def append(self, algorithm):
+        super().append(algorithm)
+        if self._indexes is not None:
+            self._add_to_indexes(self._indexes, algorithm)
+
+    def extend(self, algorithms):
+        super().extend(algorithms)
+        self._invalidate()
+
+    def insert(self, i, algorithm):
+        super().insert(i, algorithm)
+        self._invalidate()
+
+    def remove(self, algorithm):
+        super().remove(algorithm)
+        self._invalidate()
+
+    def pop(self, *args):
+        algorithm = super().pop(*args)
+        self._invalidate()
+        return algorithm
+
+    def clear(self):
+        super().clear()
+        self._invalidate()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._invalidate()
+
+    def reverse(self):
+        super().reverse()
+        self._invalidate()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._invalidate()
+
+    def __iadd__(self, algorithms):  # type: ignore[misc]
+        result = super().__iadd__(algorithms)
+        self._invalidate()
+        return result
+
     def byIndex(self, index):
         """Retruns algorithm by index or None if not found."""
-        return filter_first(lambda algorithm: algorithm.index == index, self)
+        return self._lookup('index').get(index)
 
     def byModuleId(self, id):
         """Returns list of algorithms assigned to module id or empty list if none found."""
-        return filter(lambda algorithm: algorithm.module_id == id, self)
+        return list(self._lookup('module_id').get(id, []))
 
     def byModuleIndex(self, index):
         """Returns list of algorithms assigned to module index or empty list if none found."""
-        return filter(lambda algorithm: algorithm.module_index == index, self)
+        return list(self._lookup('module_index').get(index, []))
 
     def byName(self, name):
         """Retruns algorithm by name or None if not found."""
-        return filter_first(lambda algorithm: algorithm.name == name, self)
+        return self._lookup('name').get(name)
 
     def asdict(self):
         """Retrun content as dictionary."""
@@ -133,6 +214,10 @@ class XmlMenu(object):
     *algorithms* holds an instance of type AlgorithmContainer permitting a
     convenient access to the loaded algorithms.
 
+    If *cache_dir* is set, a binary snapshot of the menu is stored in this
+    directory and loaded instead of parsing the XML again, as long as the
+    file content (size and SHA256 digest) is unchanged.
+
     Example:
     >>> menu = XmlMenu("sample.xml")
     >>> menu.name
@@ -140,7 +225,30 @@ class XmlMenu(object):
     >>> menu.algorithms.byModule(2)
     [...]
     """
-    def __init__(self, filename=None):
+    HeaderFields = {
+        'name': str,
+        'uuid_menu': str,
+        'uuid_firmware': str,
+        'grammar_version': str,
+        'is_valid': bool,
+        'is_obsolete': bool,
+        'n_modules': int,
+        'comment': str,
+    }
+    """Menu header fields read from top level elements and their types."""
+
+    AlgorithmFields = {
+        'index': int,
+        'name': str,
+        'expression': str,
+        'module_id': int,
+        'module_index': int,
+        'comment': str,
+    }
+    """Algorithm fields read from child elements and their types."""
+
+    def __init__(self, filename=None, cache_dir=None):
+        self.cache_dir = cache_dir
         self.filename = None
         self.name = None
         self.uuid_menu = None
@@ -157,39 +265,192 @@ class XmlMenu(object):
     def asdict(self):
         """Retrun content as dictionary."""
         d = dict(self.__dict__)  # copy
+        del d['cache_dir']
         d['algorithms'] = self.algorithms.asdict()
         return d
 
-    def read(self, filename):
-        """Read XML from file and parse its content."""
+    def read(self, filename, predicate=None):
+        """Read XML from file, loads a binary snapshot from *cache_dir* if
+        present for the same file content, else parses the XML and stores a
+        snapshot. Keeps only algorithms accepted by callable *predicate* if
+        given (snapshots always hold all algorithms)."""
+        if not self.cache_dir:
+            return self.parse(filename, predicate)
+        stat = os.stat(filename)
+        digest = file_digest(filename)
+        snapshot = os.path.join(self.cache_dir, '{}.menu'.format(digest))
+        if self._load_snapshot(snapshot, stat.st_size, digest):
+            self.filename = os.path.abspath(filename)
+        else:
+            self.parse(filename)
+            self._store_snapshot(snapshot, stat.st_size, digest)
+        if predicate is not None:
+            self.algorithms = AlgorithmContainer(filter(predicate, self.algorithms))
+
+    def _load_snapshot(self, snapshot, size, digest):
+        """Load menu from binary snapshot, returns False if not present or not valid."""
+        try:
+            with open(snapshot, 'rb') as fp:
+                version, python, snapshot_size, snapshot_digest, header, algorithms = marshal.load(fp)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        if (version, python, snapshot_size, snapshot_digest) != (SnapshotVersion, sys.version_info[:2], size, digest):
+            return False
+        for field, value in zip(self.HeaderFields, header):
+            setattr(self, field, value)
+        self.algorithms = AlgorithmContainer(Algorithm(*values) for values in algorithms)
+        return True
+
+    def _store_snapshot(self, snapshot, size, digest):
+        """Write binary snapshot of menu, failures are ignored."""
+        header = tuple(getattr(self, field) for field in self.HeaderFields)
+        algorithms = [tuple(getattr(algorithm, field) for field in self.AlgorithmFields) for algorithm in self.algorithms]
+        data = (SnapshotVersion, tuple(sys.version_info[:2]), size, digest, header, algorithms)
+        temp = '{}.tmp-{}'.format(snapshot, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp, 'wb') as fp:
+                marshal.dump(data, fp)
+            os.replace(temp, snapshot)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def parse(self, filename, predicate=None):
+        """Parse XML file content in a single streaming pass, keeps only
+        algorithms accepted by callable *predicate* if given."""
+        self.algorithms = AlgorithmContainer(self.iterparse(filename, predicate))
+
+    def iterparse(self, filename, predicate=None):
+        """Parse XML file content in a single streaming pass, yielding every
+        algorithm (accepted by callable *predicate* if given) as soon as it
+        is read without collecting them. Header fields are assigned as they
+        are encountered."""
         self.filename = os.path.abspath(filename)
-        self.algorithms = AlgorithmContainer()
+        for field, fmt in self.HeaderFields.items():
+            setattr(self, field, fmt())
         with open(self.filename, 'rb') as fp:
-            # Access static elements
-            context = etree.parse(fp)
-            self.name = get_xpath(context, 'name')
-            self.uuid_menu = get_xpath(context, 'uuid_menu')
-            self.uuid_firmware = get_xpath(context, 'uuid_firmware')
-            self.grammar_version = get_xpath(context, 'grammar_version')
-            self.is_valid = get_xpath(context, 'is_valid', bool)
-            self.is_obsolete = get_xpath(context, 'is_obsolete', bool)
-            self.n_modules = get_xpath(context, 'n_modules', int)
-            self.comment = get_xpath(context, 'comment')
-            # Access list of algorithms
-            fp.seek(0)  # Seek begin of file
-            context = etree.iterparse(fp, tag='algorithm')
-            fast_iter(context, self._read_algorithm)
+            depth = 0
+            for event, elem in etree.iterparse(fp, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if elem.tag == 'algorithm':
+                    algorithm = self._read_algorithm(elem)
+                    if predicate is None or predicate(algorithm):
+                        yield algorithm
+                elif depth == 1:
+                    fmt = self.HeaderFields.get(elem.tag)
+                    if fmt is not None:
+                        setattr(self, elem.tag, text_value(elem, fmt))
+                else:
+                    continue  # descendants of an element not processed yet
+                # Processed elements and their preceding siblings are no longer accessed
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
 
     def _read_algorithm(self, elem):
-        """Fetch information from an algorithm tag and appends it to the list of algorithms."""
-        name = get_xpath(elem, 'name')
-        index = get_xpath(elem, 'index', int)
-        expression = get_xpath(elem, 'expression')
-        module_id = get_xpath(elem, 'module_id', int)
-        module_index = get_xpath(elem, 'module_index', int)
-        comment = get_xpath(elem, 'comment')
-        algorithm = Algorithm(index, name, expression, module_id, module_index, comment)
-        self.algorithms.append(algorithm)
+        """Returns algorithm read from an algorithm tag."""
+        values = {}
+        for child in elem:
+            fmt = self.AlgorithmFields.get(child.tag)
+            if fmt is not None and child.tag not in values:  # first match wins
+                values[child.tag] = text_value(child, fmt)
+        for field, fmt in self.AlgorithmFields.items():
+            values.setdefault(field, fmt())
+        return Algorithm(**values)
+
+
+def algorithm_filter(module_ids=None, pattern=None):
+    """Returns predicate accepting algorithms assigned to one of *module_ids*
+    and with names matching regular expression *pattern* (if given)."""
+    module_ids = None if module_ids is None else frozenset(module_ids)
+    regex = None if pattern is None else re.compile(pattern)
+
+    def predicate(algorithm):
+        if module_ids is not None and algorithm.module_id not in module_ids:
+            return False
+        if regex is not None and not regex.search(algorithm.name):
+            return False
+        return True
+    return predicate
+
+
+def write_ndjson(algorithms, fp):
+    """Write algorithms as newline delimited JSON, one object per line."""
+    import json
+    for algorithm in algorithms:
+        fp.write(json.dumps(algorithm.asdict()))
+        fp.write('\n')
+
+
+def write_json_array(algorithms, fp):
+    """Write algorithms as JSON array, emitting each element as soon as it is
+    available."""
+    import json
+    fp.write('[')
+    separator = '\n'
+    for algorithm in algorithms:
+        fp.write(separator)
+        fp.write(json.dumps(algorithm.asdict()))
+        separator = ',\n'
+    fp.write('\n]\n')
+
+
+def make_sample_menu(filename, n_algorithms, n_modules=6):
+    """Write synthetic XML menu with *n_algorithms* algorithms distributed
+    over *n_modules* modules."""
+    with open(filename, 'wt') as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n<menu>\n')
+        fp.write('  <name>L1Menu_Benchmark</name>\n')
+        fp.write('  <uuid_menu>00000000-0000-0000-0000-000000000000</uuid_menu>\n')
+        fp.write('  <grammar_version>0.13</grammar_version>\n')
+        fp.write('  <n_modules>{}</n_modules>\n'.format(n_modules))
+        fp.write('  <comment>synthetic benchmark menu</comment>\n')
+        for index in range(n_algorithms):
+            fp.write('  <algorithm>\n')
+            fp.write('    <name>L1_Benchmark_{}</name>\n'.format(index))
+            fp.write('    <expression>comb{{MU0,EG{}}} AND (SingleJET{} OR SingleTAU{})</expression>\n'.format(index, index, index))
+            fp.write('    <index>{}</index>\n'.format(index))
+            fp.write('    <module_id>{}</module_id>\n'.format(index % n_modules))
+            fp.write('    <module_index>{}</module_index>\n'.format(index // n_modules))
+            fp.write('    <comment>algorithm {}</comment>\n'.format(index))
+            fp.write('  </algorithm>\n')
+        fp.write('</menu>\n')
+
+
+def benchmark(n_algorithms, repeat=3):
+    """Parse synthetic menus and return tuple of best parse time in seconds,
+    best load time from binary snapshot in seconds, peak Python memory in
+    bytes and maximum resident set size in kB."""
+    import resource
+    import tempfile
+    import time
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'L1Menu_Benchmark-d1.xml')
+        make_sample_menu(filename, n_algorithms)
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            XmlMenu(filename)
+            best = min(best, time.perf_counter() - t0)
+        tracemalloc.start()
+        XmlMenu(filename)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cache_dir = os.path.join(tmpdir, 'cache')
+        XmlMenu(filename, cache_dir=cache_dir)  # store snapshot
+        best_cached = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            XmlMenu(filename, cache_dir=cache_dir)
+            best_cached = min(best_cached, time.perf_counter() - t0)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return best, best_cached, peak, maxrss
 
 
 def main():
@@ -197,10 +458,40 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument('filename', help="XML menu to load")
+    parser.add_argument('filename', nargs='?', help="XML menu to load")
+    parser.add_argument('--cache', action='store_true', help="load menu from binary snapshot in {!r} if unchanged".format(DefaultCacheDir))
+    parser.add_argument('--format', choices=['json', 'ndjson', 'array'], default='json', help="output format: complete menu as JSON, algorithms as newline delimited JSON or as JSON array, the latter two are streamed while parsing (default is 'json')")
+    parser.add_argument('--module-id', metavar='<id>', type=int, nargs='+', help="output only algorithms assigned to module IDs")
+    parser.add_argument('--name', metavar='<regex>', help="output only algorithms with names matching regular expression")
+    parser.add_argument('--benchmark', metavar='<n>', type=int, nargs='+', help="parse synthetic menus with <n> algorithms and report parse time and peak memory")
     args = parser.parse_args()
 
-    menu = XmlMenu(args.filename)
+    if args.benchmark:
+        for n_algorithms in args.benchmark:
+            seconds, cached_seconds, peak, maxrss = benchmark(n_algorithms)
+            sys.stdout.write("{:>8} algorithms: {:8.3f} s, from snapshot {:8.3f} s, peak Python memory {:8.1f} MB, max RSS {:8.1f} MB\n".format(
+                n_algorithms, seconds, cached_seconds, peak / 1024 ** 2, maxrss / 1024))
+        return
+
+    if not args.filename:
+        parser.error("missing XML menu filename")
+
+    predicate = None
+    if args.module_id is not None or args.name is not None:
+        try:
+            predicate = algorithm_filter(args.module_id, args.name)
+        except re.error as exc:
+            parser.error("invalid regular expression {!r}: {}".format(args.name, exc))
+
+    if args.format != 'json':
+        # Streamed formats always parse the XML, algorithms are written as they are read
+        write = write_ndjson if args.format == 'ndjson' else write_json_array
+        write(XmlMenu().iterparse(args.filename, predicate), sys.stdout)
+        sys.stdout.flush()
+        return
+
+    menu = XmlMenu(cache_dir=DefaultCacheDir if args.cache else None)
+    menu.read(args.filename, predicate)
 
     dump = json.dumps(menu.asdict(), indent=2)
     sys.stdout.write(dump)
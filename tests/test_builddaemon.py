@@ -0,0 +1,126 @@
+import concurrent.futures
+import grp
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from ugt_fwtools import builddaemon
+from ugt_fwtools import buildqueue
+
+FAKE_VIVADO = """#!/bin/sh
+# fake Vivado: records start order and writes a bitfile
+echo "$2" >> "$1/order.txt"
+sleep 0.2
+test "$2" = broken && exit 1
+touch "$1/$2.bit"
+"""
+
+
+@pytest.fixture
+def serve(tmp_path):
+    daemons = []
+
+    def serve(**kwargs):
+        daemon = builddaemon.Daemon(str(tmp_path / "daemon"), **kwargs)
+        thread = threading.Thread(target=daemon.serve)
+        thread.start()
+        daemons.append((daemon, thread))
+        client = builddaemon.Client(daemon.socket_path)
+        for _ in range(100):
+            if client.alive():
+                break
+            time.sleep(0.01)
+        return client
+
+    yield serve
+    for daemon, thread in daemons:
+        daemon.shutdown()
+        thread.join()
+
+
+@pytest.fixture
+def pool():
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        yield pool
+
+
+def wait_states(client, states, timeout=10.0):
+    t_end = time.monotonic() + timeout
+    while time.monotonic() < t_end:
+        current = {job["name"]: job["state"] for job in client.status()["queue"]}
+        if current == states:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"build jobs not {states}")
+
+
+def test_priorities(tmp_path, serve, pool):
+    vivado = tmp_path / "vivado"
+    vivado.write_text(FAKE_VIVADO)
+    vivado.chmod(vivado.stat().st_mode | stat.S_IEXEC)
+    client = serve(jobs=1)
+
+    def job(name, priority=0):
+        return buildqueue.Job(name, f"{vivado} {tmp_path} {name}", str(tmp_path / "logs" / f"{name}.log"), priority=priority)
+
+    results = {"first": pool.submit(client.run, job("first"))}
+    wait_states(client, {"first": "running"})
+    for name, priority in (("low", 0), ("high", 5), ("broken", 1)):
+        results[name] = pool.submit(client.run, job(name, priority))
+    wait_states(client, {"first": "running", "low": "queued", "high": "queued", "broken": "queued"})
+    with pytest.raises(RuntimeError, match="already queued"):
+        client.run(job("low"))
+    assert {name: result.result(10) for name, result in results.items()} == {"first": 0, "low": 0, "high": 0, "broken": 1}
+    assert (tmp_path / "order.txt").read_text().split() == ["first", "high", "broken", "low"]
+    assert os.path.isfile(tmp_path / "high.bit")
+    lines = builddaemon.format_status(client.status())
+    assert "0 queued, 0 running, 3 done, 1 failed, 0 cancelled" in lines[1]
+    assert lines[2].endswith(builddaemon.user_name(os.getuid()))
+
+
+def test_memory_limit(tmp_path, serve, pool):
+    client = serve(max_mem=32)
+    for name in ("a", "b", "c"):
+        pool.submit(client.run, buildqueue.Job(name, "sleep 10", str(tmp_path / f"{name}.log"), mem=16))
+    wait_states(client, {"a": "running", "b": "running", "c": "queued"})
+    client.cancel("a")
+    wait_states(client, {"a": "cancelled", "b": "running", "c": "running"})
+    client.cancel("b")
+    client.cancel("c")
+
+
+def test_cancel(tmp_path, serve, pool, monkeypatch):
+    client = serve(jobs=1)
+    running = pool.submit(client.run, buildqueue.Job("running", "sleep 10", str(tmp_path / "running.log")))
+    wait_states(client, {"running": "running"})
+    queued = pool.submit(client.run, buildqueue.Job("queued", "sleep 10", str(tmp_path / "queued.log")))
+    wait_states(client, {"running": "running", "queued": "queued"})
+    with monkeypatch.context() as patch:
+        patch.setattr(builddaemon, "peer_uid", lambda sock: os.getuid() + 1)
+        with pytest.raises(RuntimeError, match="refused"):
+            client.cancel("running")
+    client.cancel("queued")
+    with pytest.raises(RuntimeError, match="cancelled"):
+        queued.result(10)
+    client.cancel("running")
+    assert running.result(10) != 0
+    with pytest.raises(RuntimeError):
+        client.cancel("running")
+    wait_states(client, {"running": "cancelled", "queued": "cancelled"})
+
+
+def test_socket_access(serve):
+    client = serve()
+    assert stat.S_IMODE(os.stat(client.path).st_mode) == 0o666
+    client.request({"command": "status"})
+
+
+def test_group_access(tmp_path, serve):
+    group = grp.getgrgid(os.getgid()).gr_name
+    client = serve(group=group)
+    assert stat.S_IMODE(os.stat(client.path).st_mode) == 0o660
+    assert os.stat(client.path).st_gid == os.getgid()
+    assert stat.S_IMODE(os.stat(tmp_path / "daemon").st_mode) == 0o2770
@@ -0,0 +1,57 @@
+import os
+import subprocess
+
+import pytest
+
+from ugt_fwtools import buildqueue
+
+
+def make_queue(tmp_path, commands, **kwargs):
+    queue = buildqueue.BuildQueue(str(tmp_path / buildqueue.QueueFile))
+    for name, command in commands:
+        queue.add(buildqueue.Job(name, command, str(tmp_path / "logs" / f"{name}.log"), **kwargs))
+    return queue
+
+
+def test_can_start():
+    scheduler = buildqueue.Scheduler(None, jobs=2, max_mem=40)
+    job = buildqueue.Job("module_0", "true", "module_0.log", mem=16)
+    running = [buildqueue.Job("module_1", "true", "module_1.log", mem=30)]
+    assert scheduler.can_start(job, [])
+    assert not scheduler.can_start(job, running)  # exceeds memory budget
+    running[0].mem = 16
+    assert scheduler.can_start(job, running)
+    assert not scheduler.can_start(job, running * 2)  # all slots used
+
+
+def test_scheduler(tmp_path):
+    marker = tmp_path / "running"
+    # fails if another job is running at the same time
+    exclusive = f"test ! -e {marker} && touch {marker} && sleep 0.1 && rm {marker}"
+    queue = make_queue(tmp_path, [("module_0", exclusive), ("module_1", exclusive), ("module_2", "echo failing; exit 3")])
+    with pytest.raises(RuntimeError):
+        queue.add(buildqueue.Job("module_0", "true", "module_0.log"))
+    buildqueue.Scheduler(queue, jobs=1, interval=0.01).run()
+    jobs = {job.name: job for job in queue.jobs()}
+    assert [jobs[name].state for name in ("module_0", "module_1", "module_2")] == ["done", "done", "failed"]
+    assert jobs["module_2"].returncode == 3
+    assert open(jobs["module_2"].log).read() == "failing\n"
+    lines = buildqueue.format_status(queue)
+    assert "0 queued, 0 running, 2 done, 1 failed, 0 cancelled, no scheduler running" in lines[0]
+    assert lines[3].startswith("\tmodule_2\t(failed, exit code 3")
+
+
+def test_adopt_running_job(tmp_path):
+    queue = make_queue(tmp_path, [("module_0", "true")])
+    process = subprocess.Popen(["sleep", "0.2"])
+    with queue.locked() as state:
+        job = state["queue"][0]
+        job.state, job.pid, job.started = "running", process.pid, 0.0
+        os.makedirs(os.path.dirname(job.status_file))
+        with open(job.status_file, "w") as fp:
+            fp.write("0\n")
+    scheduler = buildqueue.Scheduler(queue, interval=0.01)
+    assert scheduler.step()  # still running, adopted
+    process.wait()
+    scheduler.run()
+    assert queue.jobs()[0].state == "done"
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from ugt_fwtools import buildreuse
+from ugt_fwtools import buildstages
+
+snippets = ["algo_index.vhd", "ugt_constants.vhd"]
+
+
+def make_area(path, build, modules, with_bitfiles=True, reuse=""):
+    for module_id, content in enumerate(modules):
+        snippets_dir = path / "src" / f"module_{module_id}" / "vhdl_snippets"
+        snippets_dir.mkdir(parents=True)
+        for name in snippets:
+            (snippets_dir / name).write_text(f"-- {name} {content}")
+        if with_bitfiles:
+            products = path / "proj" / f"module_{module_id}" / "products"
+            products.mkdir(parents=True)
+            (products / f"module_{module_id}.bit").write_text(build)
+    cfg = path / f"build_{build}.cfg"
+    cfg.write_text(f"""[menu]
+build = {build}
+modules = {len(modules)}
+[vivado]
+version = 2021.2
+[firmware]
+ipburl = ipbus.git
+ipbtag = v1.4
+mp7url = mp7.git
+mp7tag = v3.2.2
+ugturl = mp7_ugt_legacy.git
+ugttag = v1.32.1
+type = mp7_ugt_legacy
+buildarea = {path}
+[device]
+name = mp7xe_690
+""" + reuse)
+    return str(cfg)
+
+
+def test_reusable_modules(tmp_path):
+    previous = buildreuse.read_build(make_area(tmp_path / "0x1190", "0x1190", ["a", "b", "c"]))
+    assert previous.n_modules == 3
+    options = dict(previous.options)
+    assert buildreuse.differing_options(previous, options) == []
+    options[("firmware", "ugttag")] = "v1.33.0"
+    assert buildreuse.differing_options(previous, options) == ["firmware.ugttag"]
+
+    ipbb_dir = tmp_path / "0x1191"
+    make_area(ipbb_dir, "0x1191", ["a", "B", "c", "d"], with_bitfiles=False)
+    os.remove(buildreuse.bitfile(previous.buildarea, 2))
+    # module 1 changed, no bitfile of module 2, module 3 is new
+    assert buildreuse.reusable_modules(previous, str(ipbb_dir), [0, 1, 2, 3], snippets) == [0]
+    assert buildreuse.reusable_modules(previous, str(ipbb_dir), [1, 2], snippets) == []
+
+
+def test_reuse_module(tmp_path):
+    previous = buildreuse.read_build(make_area(tmp_path / "0x1190", "0x1190", ["a"]))
+    buildstages.mark(os.path.join(buildreuse.module_dir(previous.buildarea, 0), buildstages.StagesDir), "impl", "key")
+    ipbb_dir = str(tmp_path / "0x1191")
+    buildreuse.reuse_module(previous, ipbb_dir, 0)
+    with open(buildreuse.bitfile(ipbb_dir, 0)) as fp:
+        assert fp.read() == "0x1190"
+    assert buildstages.read_marker(os.path.join(buildreuse.module_dir(ipbb_dir, 0), buildstages.StagesDir), "impl") is None
+
+
+def test_source_builds(tmp_path):
+    # module 1 of build 0x1190 was reused from build 0x1180
+    reuse = "[reuse]\nbuild = 1180\nmodules = 1\nmodule_1 = 1180\n"
+    previous = buildreuse.read_build(make_area(tmp_path / "0x1190", "1190", ["a", "b"], reuse=reuse))
+    assert previous.source_builds == {1: "1180"}
+    assert [buildreuse.source_build(previous, module_id) for module_id in (0, 1)] == ["1190", "1180"]
+
+
+def test_read_build(tmp_path):
+    with pytest.raises(RuntimeError):
+        buildreuse.read_build(str(tmp_path / "build_0x1190.cfg"))
+    (tmp_path / "build_0x1190.cfg").write_text("[menu]\nbuild = 0x1190\n")
+    with pytest.raises(RuntimeError):
+        buildreuse.read_build(str(tmp_path / "build_0x1190.cfg"))
@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from ugt_fwtools import buildsetup
+
+
+def test_setup_graph():
+    calls = []
+    lock = threading.Lock()
+
+    def task(name, delay):
+        time.sleep(delay)
+        with lock:
+            calls.append(name)
+
+    graph = buildsetup.SetupGraph(jobs=4)
+    repos = [graph.add(f"add {name}", "add repository", task, name, 0.2) for name in ("ipbus", "mp7", "ugt")]
+    snippets = graph.add("fetch snippets", "fetch snippets", task, "snippets", 0.0)
+    graph.add("replace module_0", "replace templates", task, "module_0", 0.0, requires=[repos[-1], snippets])
+    t_start = time.monotonic()
+    graph.run()
+    assert time.monotonic() - t_start < 0.5  # repositories are added concurrently
+    assert calls[0] == "snippets" and calls[-1] == "module_0"
+    graph.add("create module_0", "create project", task, "create", 0.0, requires=repos + ["replace module_0"])
+    graph.run()  # runs only new tasks
+    assert len(calls) == 6
+    lines = graph.report()
+    assert lines[0].startswith("add repository") and "3 tasks" in lines[0]
+    assert lines[-1].startswith("setup took")
+
+
+def test_setup_graph_failure():
+    def fail():
+        raise RuntimeError("clone failed")
+
+    called = []
+    graph = buildsetup.SetupGraph()
+    repo = graph.add("add ugt", "add repository", fail)
+    graph.add("patch top package", "patch top package", called.append, "patch", requires=[repo])
+    with pytest.raises(RuntimeError, match="clone failed"):
+        graph.run()
+    assert not called
+    with pytest.raises(RuntimeError):
+        graph.add("create module_0", "create project", called.append, requires=["unknown"])
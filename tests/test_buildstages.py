@@ -0,0 +1,50 @@
+import os
+import subprocess
+
+from ugt_fwtools import buildstages
+
+
+def make_keys(snippet, tcl):
+    return buildstages.stage_keys([
+        ("project", ["v1.32.1", "0"], [str(snippet)]),
+        ("synth", [], []),
+        ("fix_cells", [], [str(tcl)]),
+        ("impl", [], []),
+    ])
+
+
+def test_stage_keys(tmp_path):
+    snippet = tmp_path / "algo_index.vhd"
+    tcl = tmp_path / "vivado_fix_cells.tcl"
+    snippet.write_text("-- algo index")
+    tcl.write_text("# fix cells")
+    keys = make_keys(snippet, tcl)
+    assert list(keys) == list(buildstages.Stages)
+    tcl.write_text("# fixed cells")
+    changed = make_keys(snippet, tcl)
+    assert [keys[stage] == changed[stage] for stage in buildstages.Stages] == [True, True, False, False]
+    snippet.write_text("-- changed algo index")
+    assert all(keys[stage] != value for stage, value in make_keys(snippet, tcl).items())
+
+
+def test_first_stale(tmp_path):
+    directory = str(tmp_path / "build_stages")
+    keys = {stage: f"key_{stage}" for stage in buildstages.Stages}
+    assert buildstages.first_stale(directory, keys) == "project"
+    # markers are written by the build command after every completed stage
+    for stage in ("project", "synth", "fix_cells"):
+        subprocess.run(buildstages.mark_command(directory, stage, keys[stage]), shell=True, check=True)
+    assert buildstages.first_stale(directory, keys) == "impl"
+    buildstages.mark(directory, "impl", keys["impl"])
+    assert buildstages.first_stale(directory, keys) is None
+    assert buildstages.first_stale(directory, dict(keys, synth="changed")) == "synth"
+    buildstages.invalidate(directory, ["fix_cells", "impl"])
+    assert buildstages.first_stale(directory, keys) == "fix_cells"
+    assert buildstages.read_marker(directory, "synth")["key"] == "key_synth"
+
+
+def test_mark_command_quoting(tmp_path):
+    directory = str(tmp_path / "build area; touch injected $(touch substituted)" / "build_stages")
+    subprocess.run(buildstages.mark_command(directory, "synth", "key"), shell=True, check=True)
+    assert buildstages.read_marker(directory, "synth")["key"] == "key"
+    assert sorted(os.listdir(tmp_path)) == ["build area; touch injected $(touch substituted)"]
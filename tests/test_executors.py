@@ -0,0 +1,94 @@
+import subprocess
+import threading
+import time
+
+import pytest
+
+from ugt_fwtools import executors
+
+# Stands in for ssh: runs the remote command locally, "$1" is the host name
+STUB_SSH = ["sh", "-c", 'exec sh -c "$2"', "ssh"]
+
+# Like ssh without a terminal: the remote command runs in its own session
+# (as started by sshd) and is not stopped by signals of the client
+DETACHED_SSH = ["sh", "-c", 'setsid sh -c "$2" & wait', "ssh"]
+
+
+def test_parse_hosts():
+    assert executors.parse_hosts(["a:4", "b", "a"]) == {"a": 5, "b": 1}
+    with pytest.raises(ValueError):
+        executors.parse_hosts([":2"])
+    with pytest.raises(ValueError):
+        executors.parse_hosts(["a:0"])
+
+
+def test_local_executor(tmp_path):
+    executor = executors.LocalExecutor()
+    with executor.slot() as host:
+        process = host.popen(["pwd"], cwd=str(tmp_path), stdout=subprocess.PIPE)
+    assert process.communicate()[0].decode().strip() == str(tmp_path)
+
+
+def running(pid):
+    """Returns True if process *pid* exists and is not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as fp:
+            return fp.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def wait_stopped(pid, timeout=5.0):
+    t_end = time.monotonic() + timeout
+    while running(pid) and time.monotonic() < t_end:
+        time.sleep(0.05)
+    return not running(pid)
+
+
+def test_terminate_process_group():
+    host = executors.Host("localhost")
+    # like vsim starting its vsimk kernel
+    process = host.popen(["sh", "-c", "sleep 30 & echo $!; wait"], stdout=subprocess.PIPE)
+    child = int(process.stdout.readline())
+    assert running(child)
+    process.terminate()
+    process.wait(5)
+    process.stdout.close()
+    assert wait_stopped(child)
+
+
+def test_ssh_executor(tmp_path):
+    executor = executors.SshExecutor({"simhost1": 2, "simhost2": 1}, STUB_SSH)
+    assert executor.slots == 3
+    with executor.slot() as host:
+        process = host.popen(["sh", "-c", "echo $PWD 'quoted arg'"], cwd=str(tmp_path), stdout=subprocess.PIPE)
+        assert process.communicate()[0].decode().strip() == f"{tmp_path} quoted arg"
+        assert host.name == "simhost1"
+    hosts = []
+    with executor.slot() as a, executor.slot() as b, executor.slot() as c:
+        hosts = sorted([a.name, b.name, c.name])
+        blocked = threading.Event()
+
+        def occupy():
+            with executor.slot():
+                blocked.set()
+        thread = threading.Thread(target=occupy)
+        thread.start()
+        assert not blocked.wait(0.1)  # all slots are occupied
+    thread.join(1.0)
+    assert blocked.is_set()
+    assert hosts == ["simhost1", "simhost1", "simhost2"]
+
+
+def test_terminate_remote_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    host = executors.Host("simhost1", DETACHED_SSH)
+    # like vsim starting its vsimk kernel on the remote host
+    process = host.popen(["sh", "-c", "sleep 30 & echo $$ $!; wait"], cwd=str(tmp_path), stdout=subprocess.PIPE)
+    pids = [int(pid) for pid in process.stdout.readline().split()]
+    assert all(running(pid) for pid in pids)
+    process.terminate()
+    process.wait(5)
+    process.stdout.close()
+    assert all(wait_stopped(pid) for pid in pids)
+    assert not list(tmp_path.glob("ugt-fwtools-*.pid"))
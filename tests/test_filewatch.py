@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from ugt_fwtools import filewatch
+
+
+def create_later(filename, delay=0.05):
+    timer = threading.Timer(delay, lambda: open(filename, "w").close())
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_wait_for_file(tmp_path, use_inotify):
+    filename = str(tmp_path / "running.lock")
+    timer = create_later(filename)
+    assert filewatch.wait_for_file(filename, timeout=5.0, use_inotify=use_inotify)
+    timer.join()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_wait_for_file_timeout(tmp_path, use_inotify):
+    filename = str(tmp_path / "missing.lock")
+    with pytest.raises(RuntimeError):
+        filewatch.wait_for_file(filename, timeout=0.05, use_inotify=use_inotify)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_wait_for_file_abort(tmp_path, use_inotify):
+    filename = str(tmp_path / "missing.lock")
+    assert not filewatch.wait_for_file(filename, timeout=5.0, abort=lambda: True, use_inotify=use_inotify)
@@ -0,0 +1,53 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from ugt_fwtools import gitcache
+
+
+def git(*args, cwd):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com"] + list(args), cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = tmp_path / "origin" / "mp7.git"
+    repo.mkdir(parents=True)
+    git("init", "-q", "-b", "master", cwd=repo)
+    (repo / "README").write_text("v1\n")
+    git("add", "README", cwd=repo)
+    git("commit", "-q", "-m", "initial", cwd=repo)
+    git("tag", "v1.0", cwd=repo)
+    return repo
+
+
+def test_repo_name():
+    assert gitcache.repo_name("https://github.com/ipbus/ipbus-firmware.git") == "ipbus-firmware"
+    assert gitcache.repo_name("/path/to/mp7_ugt_legacy/") == "mp7_ugt_legacy"
+
+
+def test_clone_offline(tmp_path, origin):
+    url = origin.as_uri()
+    mirrors = gitcache.MirrorCache(str(tmp_path / "mirrors"))
+    mirror = mirrors.update(url, "v1.0")
+    assert os.path.basename(mirror) == "mp7.git"
+    shutil.rmtree(origin)  # remote no longer reachable
+    dest = tmp_path / "work" / "mp7"
+    mirrors.clone(url, "v1.0", str(dest))
+    assert (dest / "README").read_text() == "v1\n"
+    result = subprocess.run(["git", "remote", "get-url", "origin"], cwd=dest, stdout=subprocess.PIPE, check=True)
+    assert result.stdout.decode().strip() == url
+
+
+def test_fetch_new_tag(tmp_path, origin):
+    url = origin.as_uri()
+    mirrors = gitcache.MirrorCache(str(tmp_path / "mirrors"))
+    mirrors.update(url, "v1.0")
+    (origin / "README").write_text("v2\n")
+    git("commit", "-q", "-am", "update", cwd=origin)
+    git("tag", "v2.0", cwd=origin)
+    dest = tmp_path / "work" / "mp7"
+    mirrors.clone(url, "v2.0", str(dest))
+    assert (dest / "README").read_text() == "v2\n"
@@ -0,0 +1,47 @@
+from ugt_fwtools import progress
+
+
+def test_log_tail(tmp_path):
+    log = tmp_path / "results_module_0.log"
+    tail = progress.LogTail(str(log))
+    assert tail.read() == []
+    log.write_text("line 1\nline")
+    assert tail.read() == ["line 1"]
+    with open(log, "a") as fp:
+        fp.write(" 2\n")
+    assert tail.read() == ["line 2"]
+    assert tail.read() == []
+    log.write_text("new\n")  # truncated
+    assert tail.read() == ["new"]
+
+
+def test_module_progress(tmp_path):
+    log = tmp_path / "results_module_0.log"
+    module = progress.ModuleProgress("module_0", str(log), total_bx=1000)
+    log.write_text("# -- Compiling entity gtl_module\n")
+    module.update(now=0.0)
+    assert module.phase == "compile"
+    with open(log, "a") as fp:
+        fp.write("# Loading work.gtl_fdl_wrapper_tb(beh)\n# bx-nr = 100\n")
+    module.update(now=10.0)
+    assert (module.phase, module.bx) == ("run", 100)
+    with open(log, "a") as fp:
+        fp.write("# ** Note: done\n#    Time: 12500 ns  Iteration: 0\n")
+    module.update(now=20.0)
+    assert module.bx == 500
+    assert module.rate(now=20.0) == 40.0
+    assert module.eta(now=20.0) == 12.5
+    assert module.format(now=20.0) == "module_0 500/1000 (50%) 40 BX/s ETA 0:00:12"
+    module.finish()
+    assert module.format() == "module_0 done"
+
+
+def test_progress_line(tmp_path):
+    tv = tmp_path / "tv.txt"
+    tv.write_text("0\n1\n2\n")
+    assert progress.count_lines(str(tv)) == 3
+    modules = [progress.ModuleProgress(f"module_{i}", str(tmp_path / f"{i}.log")) for i in range(2)]
+    monitor = progress.ProgressMonitor(modules, interval=0)
+    assert monitor.progress_line() == "progress: module_0 queued | module_1 queued"
+    with monitor:
+        pass  # disabled, no thread started
@@ -0,0 +1,36 @@
+import io
+import json
+
+import pytest
+
+from ugt_fwtools import regression
+
+
+def test_parse_sweep_list():
+    text = "# menus\nL1Menu_A-d1.xml tv_1.txt tv_2.txt\n\nL1Menu_B-d1.xml tv_1.txt  # zero bias\n"
+    assert regression.parse_sweep_list(io.StringIO(text)) == [
+        ("L1Menu_A-d1.xml", ["tv_1.txt", "tv_2.txt"]),
+        ("L1Menu_B-d1.xml", ["tv_1.txt"]),
+    ]
+    with pytest.raises(RuntimeError):
+        regression.parse_sweep_list(io.StringIO("L1Menu_A-d1.xml\n"))
+
+
+def test_write_report(tmp_path):
+    rows = {0: (10, 10, "OK"), 1: (5, 4, "ERROR"), 2: (3, 2, "IGNORE")}
+    names = {0: "L1_A", 1: "L1_B", 2: "L1_C"}
+    results = [
+        regression.make_result("L1Menu_A-d1", "tv_1.txt", rows, names, False, "a"),
+        regression.make_error_result("L1Menu_B-d1", "tv_1.txt", "b"),
+    ]
+    assert results[0].status == regression.StatusFailed
+    assert (results[0].n_ok, results[0].n_ignored, results[0].n_errors) == (1, 1, 1)
+    assert results[0].failed_algorithms == ["L1_B"]
+    report_txt = tmp_path / "regression.txt"
+    report_json = tmp_path / "regression.json"
+    regression.write_report(results, str(report_txt), str(report_json))
+    text = report_txt.read_text()
+    assert "0 of 2 simulations passed" in text
+    assert "  L1_B" in text
+    data = json.loads(report_json.read_text())
+    assert [result["status"] for result in data["results"]] == ["FAIL", "ERROR"]
@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from ugt_fwtools import results
+
+
+def test_iter_records_chunked():
+    data = {"counts": [{"algo_index": 0}], "errors": [{"bx-nr": i, "text": "x" * i} for i in range(20)]}
+    fp = io.StringIO(json.dumps(data, indent=2))
+    records = list(results.iter_records(fp, "errors", chunk_size=7))
+    assert records == data["errors"]
+    assert list(results.iter_records(io.StringIO('{"errors": []}'))) == []
+    assert list(results.iter_records(io.StringIO('{"counts": []}'))) == []
+    with pytest.raises(RuntimeError):
+        list(results.iter_records(io.StringIO('{"errors": [{"bx-nr": 1}, {"bx'), chunk_size=4))
+
+
+def test_mismatched_bits():
+    assert list(results.mismatched_bits(0, 0)) == []
+    assert list(results.mismatched_bits(1 << 511, 0)) == [(511, 0, 1)]
+    assert list(results.mismatched_bits(1 << 512, 0)) == []
+
+
+def test_write_results(tmp_path):
+    errors = [
+        {"bx-nr": 3, "algos_sim": "{:0128x}".format(0b101), "algos_tv": "{:0128x}".format(0b011), "finor_sim": 1, "finor_tv": 1},
+        {"bx-nr": 9, "algos_sim": "{:0128x}".format(0), "algos_tv": "{:0128x}".format(0), "finor_sim": 0, "finor_tv": 1},
+    ]
+    results_json = tmp_path / "results_module_0.json"
+    results_json.write_text(json.dumps({"errors": errors, "counts": []}))
+    results_txt = tmp_path / "results_module_0.txt"
+    assert results.write_results(str(results_json), str(results_txt), {1: "L1_A"}) == 2
+    text = results_txt.read_text()
+    assert "algo 1 (L1_A)\n     tv = 1 sim = 0\n" in text
+    assert "algo with index: 2 not found in menu\n" in text
+    assert text.count(results.Separator) == 4
+    assert text.endswith("fin_or_tv  = 1\n" + results.Separator + "\n")
+
+
+def test_error_watch(tmp_path):
+    results_json = tmp_path / "results_module_0.json"
+    log = tmp_path / "results_module_0.log"
+    watch = results.ErrorWatch(str(results_json), str(log))
+    assert watch.poll() == 0
+    results_json.write_text('{"errors": [{"bx-nr": 1, "finor_tv": 0}, {"bx-')
+    assert watch.poll() == 1
+    with open(results_json, "a") as fp:
+        fp.write('nr": 2}, {"bx-nr": 3}')
+    assert watch.poll() == 3
+    log.write_text("# ** Note: start\n# ** Error: algo mismatch\n# ** Error: algo mismatch\n# ** Error: algo mis")
+    assert watch.poll() == 3
+    with open(log, "a") as fp:
+        fp.write("match\n# ** Error: algo mismatch\n")
+    assert watch.poll() == 4
+
+
+def test_error_watch_warmup(tmp_path):
+    results_json = tmp_path / "results_module_0.json"
+    log = tmp_path / "results_module_0.log"
+    watch = results.ErrorWatch(str(results_json), str(log), warmup=2)
+    results_json.write_text('{"errors": [{"bx-nr": 0}, {"bx-nr": 1}, {"bx-nr": 2}, {"bx-nr": "3"}')
+    assert watch.poll() == 2  # records of warm-up BXs 0 and 1 are not counted
+    log.write_text("# ** Error: algo mismatch\n" * 2)
+    assert watch.poll() == 2
+    with open(log, "a") as fp:
+        fp.write("# ** Error: algo mismatch\n" * 3)
+    assert watch.poll() == 3
@@ -0,0 +1,30 @@
+import importlib
+import os
+import re
+
+import pytest
+
+PYPROJECT = os.path.join(os.path.dirname(__file__), "..", "pyproject.toml")
+
+
+def read_scripts():
+    """Returns entry points of section [project.scripts] of pyproject.toml."""
+    with open(PYPROJECT) as fp:
+        text = fp.read()
+    section = re.search(r"^\[project\.scripts\]\n(.*?)(?=^\[|\Z)", text, re.M | re.S).group(1)
+    return re.findall(r'^\s*([\w-]+)\s*=\s*"([\w.]+):(\w+)"', section, re.M)
+
+
+@pytest.mark.parametrize("name, module, function", read_scripts())
+def test_script_entry_point(name, module, function, monkeypatch, tmp_path):
+    # required at import time by the simulation and synthesis scripts
+    monkeypatch.setenv("UGT_QUESTASIM_SIM_PATH", str(tmp_path / "questasim"))
+    monkeypatch.setenv("UGT_QUESTASIM_LIBS_PATH", str(tmp_path / "questasimlibs"))
+    monkeypatch.setenv("UGT_VIVADO_BASE_DIR", str(tmp_path / "Xilinx"))
+    monkeypatch.setenv("UGT_VIVADO_VERSION", "2021.2")
+    (tmp_path / "Xilinx" / "2021.2").mkdir(parents=True)
+    assert callable(getattr(importlib.import_module(module), function)), name
+
+
+def test_scripts_listed():
+    assert ("ugt-implement-module", "ugt_fwtools.resynthesize_one_module", "main") in read_scripts()
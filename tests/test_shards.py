@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from ugt_fwtools import results
+from ugt_fwtools import shards
+
+ALGOS = [0b01, 0b11, 0b00, 0b10, 0b01, 0b11, 0b01, 0b00, 0b10, 0b11]
+
+
+def write_tv(tmp_path):
+    filename = tmp_path / "tv.txt"
+    filename.write_text("".join("{:04d} 0000 {:0128x} {:d}\n".format(bx, algos, bool(algos)) for bx, algos in enumerate(ALGOS)))
+    return str(filename)
+
+
+def test_plan():
+    assert shards.plan(10, 3, 2) == [(0, 3, 0), (3, 6, 2), (6, 10, 2)]
+    assert shards.plan(2, 4, 8) == [(0, 1, 0), (1, 2, 1)]
+    assert shards.plan(0, 4, 8) == [(0, 0, 0)]
+    with pytest.raises(ValueError):
+        shards.plan(10, 3, -1)
+
+
+def test_split(tmp_path):
+    filename = write_tv(tmp_path)
+    parts = shards.split(filename, 3, 2, lambda i: str(tmp_path / f"shard_{i}" / "tv.txt"))
+    assert [(shard.start, shard.stop, shard.warmup) for shard in parts] == [(0, 3, 0), (3, 6, 2), (6, 10, 2)]
+    lines = open(filename).readlines()
+    assert open(parts[0].filename).readlines() == lines[0:3]
+    assert open(parts[1].filename).readlines() == lines[1:6]
+    assert open(parts[2].filename).readlines() == lines[4:10]
+
+
+def simulate(shard, broken_bx):
+    """Returns results of a shard, the simulated algorithms of shard lines in
+    *broken_bx* are cleared."""
+    errors = []
+    sim_values = []
+    for bx, line in enumerate(open(shard.filename)):
+        tv = int(line.split()[-2], 16)
+        sim = 0 if bx in broken_bx else tv
+        sim_values.append(sim)
+        if sim != tv:
+            errors.append({"bx-nr": bx, "algos_sim": "{:0128x}".format(sim), "algos_tv": "{:0128x}".format(tv), "finor_sim": int(bool(sim)), "finor_tv": int(bool(tv))})
+    tv_counts = shards.testvector.count_bits(int(line.split()[-2], 16) for line in open(shard.filename))
+    sim_counts = shards.testvector.count_bits(sim_values)
+    counts = [{"algo_index": i, "algo_sim": sim_counts[i], "algo_tv": tv_counts[i]} for i in range(2)]
+    return {"errors": errors, "counts": counts}
+
+
+def test_merge(tmp_path):
+    parts = shards.split(write_tv(tmp_path), 3, 2, lambda i: str(tmp_path / f"shard_{i}" / "tv.txt"))
+    # Warm-up garbage in shard 1 (line 1 of file) and a real mismatch in shard 2 (line 8 of file)
+    broken = {0: set(), 1: {0}, 2: {4}}
+    results_files = []
+    for shard in parts:
+        results_file = tmp_path / f"shard_{shard.id}" / "results.json"
+        results_file.write_text(json.dumps(simulate(shard, broken[shard.id])))
+        results_files.append(str(results_file))
+    merged_file = tmp_path / "results.json"
+    shards.merge(parts, results_files, str(merged_file))
+    merged = json.loads(merged_file.read_text())
+    assert [error["bx-nr"] for error in merged["errors"]] == [8]
+    expected = shards.testvector.count_bits(ALGOS)
+    assert [count["algo_tv"] for count in merged["counts"]] == expected[:2]
+    assert [count["algo_sim"] for count in merged["counts"]] == [expected[0], expected[1] - 1]
+    assert results.write_results(str(merged_file), str(tmp_path / "results.txt"), {}) == 1
@@ -0,0 +1,38 @@
+import os
+
+from ugt_fwtools import simcache
+from ugt_fwtools import utils
+
+
+def make_library(path, content="compiled"):
+    os.makedirs(path)
+    with open(os.path.join(path, "_info"), "w") as fp:
+        fp.write(content)
+
+
+def test_store_restore(tmp_path):
+    cache = simcache.LibraryCache(str(tmp_path / "cache"))
+    work = str(tmp_path / "work")
+    key = utils.make_key("v1.32.1")
+    assert not cache.restore(key, {"work": work})
+    make_library(work)
+    cache.store(key, {"work": work})
+    os.remove(os.path.join(work, "_info"))
+    assert cache.restore(key, {"work": work})
+    with open(os.path.join(work, "_info")) as fp:
+        assert fp.read() == "compiled"
+
+
+def test_evict(tmp_path):
+    cache = simcache.LibraryCache(str(tmp_path / "cache"))
+    for i in range(3):
+        work = str(tmp_path / f"work_{i}")
+        make_library(work, "x" * 8)
+        key = utils.make_key(str(i))
+        cache.store(key, {"work": work})
+        os.utime(cache.entry_path(key), (i, i))  # ascending access times
+    cache.max_size = cache.entries()[-1][1]  # fits only one entry
+    cache.evict()
+    entries = cache.entries()
+    assert len(entries) == 1
+    assert entries[0][2] == cache.entry_path(utils.make_key("2"))
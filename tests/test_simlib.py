@@ -0,0 +1,97 @@
+import os
+
+from ugt_fwtools import simlib
+
+DO_FILE = """\
+set HDL_DIR /sim/hdl
+set MENU_DIR {module_dir}/vhdl
+vlib work
+vmap work work
+vcom -93 -work work $HDL_DIR/mp7_data_types.vhd
+vcom -93 -work work \\
+    $HDL_DIR/ipbus_package.vhd
+vcom -93 -work work $MENU_DIR/fdl_pkg.vhd
+vcom -93 -work work $HDL_DIR/gtl_fdl_wrapper.vhd
+vsim work.gtl_fdl_wrapper_tb
+"""
+
+
+def write_do_file(tmp_path, module_dir):
+    filename = tmp_path / "gtl_fdl_wrapper.do"
+    filename.write_text(DO_FILE.format(module_dir=module_dir))
+    return str(filename)
+
+
+def test_split_do_file(tmp_path):
+    module_dir = str(tmp_path / "module_0")
+    lines = simlib.read_do_file(write_do_file(tmp_path, module_dir))
+    shared, module = simlib.split_do_file(lines, module_dir)
+    assert simlib.compile_commands(shared) == [
+        "vcom -93 -work work $HDL_DIR/mp7_data_types.vhd\n",
+        "vcom -93 -work work \\\n    $HDL_DIR/ipbus_package.vhd\n",
+    ]
+    assert shared[-1].endswith("ipbus_package.vhd\n")
+    assert simlib.compile_commands(module) == [
+        "vcom -93 -work work $MENU_DIR/fdl_pkg.vhd\n",
+        "vcom -93 -work work $HDL_DIR/gtl_fdl_wrapper.vhd\n",
+    ]
+    assert module[-1] == "vsim work.gtl_fdl_wrapper_tb\n"
+    assert len(module) == len(lines)
+
+
+def test_split_do_file_module_library(tmp_path):
+    module_dir = str(tmp_path / "module_0")
+    lines = simlib.read_do_file(write_do_file(tmp_path, module_dir))
+    lines[2] = f"vlib {module_dir}/work\n"
+    shared, module = simlib.split_do_file(lines, module_dir)
+    assert shared == []
+    assert module == lines
+
+
+def test_library_dirs_and_sources(tmp_path):
+    module_dir = str(tmp_path / "module_0")
+    lines = simlib.read_do_file(write_do_file(tmp_path, module_dir))
+    libraries = simlib.library_dirs(lines, module_dir)
+    assert list(libraries) == ["work"]
+    assert libraries["work"] == os.path.join(module_dir, "work")
+    assert simlib.source_files(lines)[:2] == ["/sim/hdl/mp7_data_types.vhd", "/sim/hdl/ipbus_package.vhd"]
+
+
+def test_simulation_only(tmp_path):
+    module_dir = str(tmp_path / "module_0")
+    lines = simlib.read_do_file(write_do_file(tmp_path, module_dir)) + ["vdel -all\n"]
+    lines = simlib.simulation_only(lines)
+    assert simlib.compile_commands(lines) == []
+    assert [simlib.command_name(line) for line in lines] == ["set", "set", "vlib", "vmap", "", "", "", "", "vsim", ""]
+    assert lines[5] == simlib.CompiledComment + "vcom -93 -work work \\\n" + simlib.CompiledComment + "$HDL_DIR/ipbus_package.vhd\n"
+
+
+def test_module_libraries(tmp_path):
+    # every module compiles its sources into its own work library and only reads the shared library
+    base_dir = tmp_path / "base"
+    module_dirs = [str(base_dir / f"module_{i}") for i in range(2)]
+    shared_libraries = {}
+    module_lines = {}
+    for module_dir in module_dirs:
+        os.makedirs(module_dir)
+        lines = simlib.read_do_file(write_do_file(tmp_path, module_dir))
+        shared, module_lines[module_dir] = simlib.split_do_file(lines, module_dir)
+        shared_libraries = simlib.library_dirs(shared, str(base_dir))
+    assert shared_libraries == {"work": str(base_dir / "work")}
+    mappings = simlib.shared_mappings(shared_libraries)
+    assert mappings == {simlib.SharedLibrary: str(base_dir / "work")}
+    libraries = [simlib.library_dirs(simlib.simulation_only(module_lines[module_dir]), module_dir) for module_dir in module_dirs]
+    assert libraries == [{"work": os.path.join(module_dir, "work")} for module_dir in module_dirs]
+    assert "vmap work work\n" in module_lines[module_dirs[0]]
+    lines = simlib.search_libraries(module_lines[module_dirs[0]], list(mappings))
+    assert [line for line in lines if simlib.command_name(line) == "vsim"] == [f"vsim -L {simlib.SharedLibrary} work.gtl_fdl_wrapper_tb\n"]
+
+
+def test_map_libraries(tmp_path):
+    ini_file = tmp_path / "modelsim.ini"
+    ini_file.write_text("[Library]\nstd = $MODEL_TECH/../std\nugt_shared = /old/work\n\n[vsim]\nResolution = ps\n")
+    simlib.map_libraries(str(ini_file), {"ugt_shared": "/base/work"})
+    assert ini_file.read_text() == "[Library]\nugt_shared = /base/work\nstd = $MODEL_TECH/../std\n\n[vsim]\nResolution = ps\n"
+    ini_file.write_text("[vsim]\nResolution = ps\n")
+    simlib.map_libraries(str(ini_file), {"ugt_shared": "/base/work"})
+    assert ini_file.read_text() == "[vsim]\nResolution = ps\n\n[Library]\nugt_shared = /base/work\n"
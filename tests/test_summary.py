@@ -0,0 +1,34 @@
+import csv
+import json
+
+from ugt_fwtools import summary
+
+
+def test_phase_timer():
+    timer = summary.PhaseTimer()
+    timer.add("simulation", 2.0)
+    timer.add("custom", 1.0)
+    with timer.phase("fetch"):
+        pass
+    timer.add("simulation", 0.5)
+    timings = timer.ordered()
+    assert list(timings) == ["fetch", "simulation", "custom"]
+    assert timings["simulation"] == 2.5
+
+
+def test_write_summary(tmp_path):
+    modules = [summary.ModuleStatus("module_0", "done", 1.23456, 0), summary.ModuleStatus("module_1", "failed")]
+    testvectors = [
+        summary.make_testvector_summary("tv_a.txt", True, [(0, 0, "L1_A", 10, 10, "OK"), (1, 1, "L1_B", 5, 5, "OK")], modules),
+        summary.make_testvector_summary("tv_b.txt", None, [], modules),
+    ]
+    data = summary.make_summary("L1Menu_A-d1", {"ugt": "v1"}, testvectors, {"fetch": 0.5, "simulation": 3.0})
+    assert data["success"] is False
+    summary.write_json(str(tmp_path / "summary.json"), data)
+    loaded = json.loads((tmp_path / "summary.json").read_text())
+    assert loaded["testvectors"][0]["modules"][0] == {"name": "module_0", "status": "done", "duration": 1.235, "mismatches": 0}
+    summary.write_csv(str(tmp_path / "summary.csv"), str(tmp_path / "timings.csv"), data)
+    rows = list(csv.reader(open(tmp_path / "summary.csv")))
+    assert rows[0][:3] == ["menu", "testvector", "module_id"]
+    assert rows[2] == ["L1Menu_A-d1", "tv_a.txt", "1", "1", "L1_B", "5", "5", "OK"]
+    assert list(csv.reader(open(tmp_path / "timings.csv")))[1:] == [["L1Menu_A-d1", "fetch", "0.5"], ["L1Menu_A-d1", "simulation", "3.0"]]
@@ -0,0 +1,43 @@
+from ugt_fwtools import testvector
+
+LINES = [
+    "0001 0000 {:0128x} 1\n".format(0b101),
+    "0002 0000 {:0128x} 1\n".format(0b100),
+    "0003 0000 {:0128x} 0\n".format(0),
+    "0004 0000 {:0128x} 1\n".format(1 << 511),
+]
+
+
+def write_lines(tmp_path):
+    filename = tmp_path / "tv.txt"
+    filename.write_text("".join(LINES))
+    return str(filename)
+
+
+def test_count_bits():
+    assert testvector.count_bits([5, 4, 5], 4) == [2, 0, 3, 0]
+    assert testvector.count_bits([], 4) == [0, 0, 0, 0]
+
+
+def test_split(tmp_path):
+    filename = write_lines(tmp_path)
+    module_0 = tmp_path / "tv_module_0.txt"
+    module_1 = tmp_path / "tv_module_1.txt"
+    counts = testvector.split(filename, [(0b001, str(module_0)), (0b100, str(module_1))])
+    assert len(counts) == testvector.MaxAlgorithms
+    assert counts[0] == 1
+    assert counts[2] == 2
+    assert counts[511] == 1
+    assert sum(counts) == 4
+    assert module_0.read_text().splitlines() == [
+        "0001 0000 {:0128x} 1".format(0b001),
+        "0002 0000 {:0128x} 0".format(0),
+        "0003 0000 {:0128x} 0".format(0),
+        "0004 0000 {:0128x} 0".format(0),
+    ]
+    assert module_1.read_text().splitlines() == [
+        "0001 0000 {:0128x} 1".format(0b100),
+        "0002 0000 {:0128x} 1".format(0b100),
+        "0003 0000 {:0128x} 0".format(0),
+        "0004 0000 {:0128x} 0".format(0),
+    ]
@@ -1,3 +1,8 @@
+import http.server
+import threading
+
+import pytest
+
 from ugt_fwtools import utils
 
 
@@ -5,3 +10,71 @@ def test_build_t():
     assert utils.build_t("42") == "0042"
     assert utils.build_t("1234") == "1234"
     assert utils.build_t("0x1234") == "1234"
+
+
+def test_format_duration():
+    assert utils.format_duration(59.6) == "0:01:00"
+    assert utils.format_duration(3 * 3600 + 62) == "3:01:02"
+
+
+def test_make_key():
+    assert utils.make_key("a", "b") == utils.make_key("a", "b")
+    assert utils.make_key("a", "b") != utils.make_key("ab")
+
+
+def test_hash_files(tmp_path):
+    filename = tmp_path / "a.vhd"
+    missing = utils.hash_files([str(filename)])
+    filename.write_text("entity a")
+    assert utils.hash_files([str(filename)]) != missing
+    assert utils.hash_files([str(filename)]) == utils.hash_files([str(filename)])
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    requests = []
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # persistent connections
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(root), **kwargs)
+
+        def send_response(self, code, message=None):
+            requests.append((self.path, code))
+            super().send_response(code, message)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetcher_http_cache(tmp_path, http_server):
+    root, base_url, requests = http_server
+    (root / "a.vhd").write_text("entity a;\n")
+    (root / "b.vhd").write_text("entity b;\n")
+    fetcher = utils.Fetcher(cache_dir=str(tmp_path / "cache"), max_workers=2)
+    items = [(f"{base_url}/a.vhd", str(tmp_path / "a.vhd")), (f"{base_url}/b.vhd", str(tmp_path / "b.vhd"))]
+    fetcher.fetch_all(items)
+    assert (tmp_path / "a.vhd").read_text() == "entity a;\n"
+    assert (tmp_path / "b.vhd").read_text() == "entity b;\n"
+    fetcher.fetch_all(items)  # revalidated, content from cache
+    assert sorted(code for _, code in requests) == [200, 200, 304, 304]
+    assert (tmp_path / "b.vhd").read_text() == "entity b;\n"
+
+
+def test_fetcher_local(tmp_path):
+    source = tmp_path / "menu.xml"
+    source.write_text("<menu/>")
+    fetcher = utils.Fetcher(cache_dir=None)
+    fetcher.fetch_all([(str(source), str(tmp_path / "copy.xml")), (source.as_uri(), str(tmp_path / "uri.xml"))])
+    assert (tmp_path / "copy.xml").read_text() == "<menu/>"
+    assert (tmp_path / "uri.xml").read_text() == "<menu/>"
@@ -0,0 +1,111 @@
+import os
+
+from ugt_fwtools import xmlmenu
+
+ALGORITHM = """\
+  <algorithm>
+    <name>{name}</name>
+    <expression>{name}_expr</expression>
+    <index>{index}</index>
+    <module_id>{module_id}</module_id>
+    <module_index>{module_index}</module_index>
+    <comment/>
+  </algorithm>
+"""
+
+
+def write_menu(tmp_path, algorithms):
+    filename = tmp_path / "L1Menu_Sample-d1.xml"
+    content = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        "<l1menu>\n",
+        "  <name>L1Menu_Sample</name>\n",
+        "  <uuid_menu>12345678-1234-1234-1234-123456789abc</uuid_menu>\n",
+        "  <n_modules>2</n_modules>\n",
+        "  <comment>NO-body expects the spanish inquisition!</comment>\n",
+    ]
+    for index, name, module_id, module_index in algorithms:
+        content.append(ALGORITHM.format(name=name, index=index, module_id=module_id, module_index=module_index))
+    content.append("</l1menu>\n")
+    filename.write_text("".join(content))
+    return str(filename)
+
+
+def test_read(tmp_path):
+    menu = xmlmenu.XmlMenu(write_menu(tmp_path, [(0, "L1_A", 0, 0), (7, "L1_B", 1, 0), (3, "L1_C", 0, 1)]))
+    assert menu.name == "L1Menu_Sample"
+    assert menu.n_modules == 2
+    assert menu.comment == "NO-body expects the spanish inquisition!"
+    assert [algorithm.index for algorithm in menu.algorithms] == [0, 7, 3]
+    assert menu.algorithms.byName("L1_C").expression == "L1_C_expr"
+
+
+def test_algorithm_container_lookups():
+    algorithms = xmlmenu.AlgorithmContainer()
+    algorithms.append(xmlmenu.Algorithm(0, "L1_A", "", 0, 0))
+    algorithms.append(xmlmenu.Algorithm(7, "L1_B", "", 1, 0))
+    assert algorithms.byIndex(7).name == "L1_B"
+    assert algorithms.byIndex(1) is None
+    algorithms.append(xmlmenu.Algorithm(3, "L1_C", "", 0, 1))  # index kept up to date
+    assert algorithms.byName("L1_C").index == 3
+    assert [algorithm.name for algorithm in algorithms.byModuleId(0)] == ["L1_A", "L1_C"]
+    assert [algorithm.name for algorithm in algorithms.byModuleIndex(0)] == ["L1_A", "L1_B"]
+    del algorithms[0]  # index invalidated
+    assert algorithms.byIndex(0) is None
+    assert algorithms.byName("L1_A") is None
+    assert algorithms.byModuleId(5) == []
+
+
+def test_algorithm_asdict():
+    algorithm = xmlmenu.Algorithm(3, "L1_C", "MU0", 1, 2)
+    assert algorithm.asdict() == {"index": 3, "name": "L1_C", "expression": "MU0", "module_id": 1, "module_index": 2, "comment": ""}
+
+
+def test_sample_menu(tmp_path):
+    filename = str(tmp_path / "L1Menu_Benchmark-d1.xml")
+    xmlmenu.make_sample_menu(filename, 100, n_modules=4)
+    menu = xmlmenu.XmlMenu(filename)
+    assert menu.name == "L1Menu_Benchmark"
+    assert menu.n_modules == 4
+    assert len(menu.algorithms) == 100
+    assert len(menu.algorithms.byModuleId(3)) == 25
+
+
+def test_snapshot_cache(tmp_path):
+    filename = write_menu(tmp_path, [(0, "L1_A", 0, 0), (7, "L1_B", 1, 0)])
+    cache_dir = str(tmp_path / "cache")
+    menu = xmlmenu.XmlMenu(filename, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    cached = xmlmenu.XmlMenu(filename, cache_dir=cache_dir)
+    assert cached.asdict() == menu.asdict()
+    assert cached.algorithms.byIndex(7).name == "L1_B"
+    # Changed content invalidates snapshot
+    filename = write_menu(tmp_path, [(0, "L1_A", 0, 0), (7, "L1_C", 1, 0)])
+    changed = xmlmenu.XmlMenu(filename, cache_dir=cache_dir)
+    assert changed.algorithms.byIndex(7).name == "L1_C"
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_iterparse_filter(tmp_path):
+    filename = write_menu(tmp_path, [(0, "L1_SingleMu", 0, 0), (1, "L1_DoubleMu", 1, 0), (2, "L1_SingleEG", 1, 1)])
+    menu = xmlmenu.XmlMenu()
+    predicate = xmlmenu.algorithm_filter(module_ids=[1], pattern="Mu$")
+    assert [algorithm.name for algorithm in menu.iterparse(filename, predicate)] == ["L1_DoubleMu"]
+    assert menu.name == "L1Menu_Sample"
+    menu.read(filename, xmlmenu.algorithm_filter(pattern="^L1_Single"))
+    assert [algorithm.index for algorithm in menu.algorithms] == [0, 2]
+
+
+def test_stream_formats(tmp_path):
+    import io
+    import json
+    filename = write_menu(tmp_path, [(0, "L1_A", 0, 0), (1, "L1_B", 1, 0)])
+    fp = io.StringIO()
+    xmlmenu.write_ndjson(xmlmenu.XmlMenu().iterparse(filename), fp)
+    assert [json.loads(line)["name"] for line in fp.getvalue().splitlines()] == ["L1_A", "L1_B"]
+    fp = io.StringIO()
+    xmlmenu.write_json_array(xmlmenu.XmlMenu().iterparse(filename), fp)
+    assert [item["index"] for item in json.loads(fp.getvalue())] == [0, 1]
+    fp = io.StringIO()
+    xmlmenu.write_json_array([], fp)
+    assert json.loads(fp.getvalue()) == []